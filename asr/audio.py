@@ -0,0 +1,128 @@
+import os
+import glob
+import hashlib
+import subprocess
+
+import numpy as np
+import soundfile as sf
+
+# Bytes read at a time when hashing files or collecting decoded samples from ffmpeg
+READ_BLOCK_BYTES = 1 << 20
+AUDIO_EXTENSIONS = ['wav', 'm4a', 'mp3', 'flac']
+
+
+def list_audio_files(inputs):
+    """ Expand the given files and directories into a list of audio files. """
+    audio_files = []
+    for path in inputs:
+        if os.path.isdir(path):
+            for extension in AUDIO_EXTENSIONS:
+                audio_files.extend(sorted(glob.glob(os.path.join(path, '*.' + extension))))
+        else:
+            audio_files.append(path)
+    return audio_files
+
+
+def native_sample_rate(audio_path):
+    """ Sample rate of a file if libsndfile can read it (wav, flac, ogg), otherwise None. """
+    try:
+        return sf.info(audio_path).samplerate
+    except RuntimeError:
+        return None
+
+
+def ffmpeg_command(audio_path, sample_rate):
+    """ ffmpeg decoding any input to mono float32 PCM at sample_rate on stdout. """
+    return ['ffmpeg', '-nostdin', '-v', 'error', '-i', audio_path,
+            '-f', 'f32le', '-acodec', 'pcm_f32le', '-ac', '1', '-ar', str(sample_rate), '-']
+
+
+def iter_ffmpeg_blocks(audio_path, sample_rate, block_length):
+    """ Stream mono float32 blocks at sample_rate from ffmpeg through a pipe. """
+    process = subprocess.Popen(ffmpeg_command(audio_path, sample_rate), stdout=subprocess.PIPE,
+                               stderr=subprocess.PIPE)
+    finished = False
+    try:
+        while True:
+            # A buffered read returns a full block unless ffmpeg has reached the end
+            data = process.stdout.read(4 * block_length)
+            if not data:
+                break
+            yield np.frombuffer(data, dtype=np.float32)
+        finished = True
+    finally:
+        if not finished:
+            process.kill()
+        process.stdout.close()
+        stderr = process.stderr.read().decode(errors='replace')
+        process.stderr.close()
+        if process.wait() != 0 and finished:
+            raise RuntimeError(f"ffmpeg failed to decode {audio_path}: {stderr.strip()}")
+
+
+def decode_audio(audio_path, sample_rate):
+    """
+    Decode an audio file into a mono float32 array at sample_rate without
+    writing anything to disk. libsndfile formats are read in-process; others
+    (m4a, mp3, ...) are decoded and resampled by ffmpeg through a pipe.
+    """
+    sr = native_sample_rate(audio_path)
+    if sr is None:
+        blocks = list(iter_ffmpeg_blocks(audio_path, sample_rate, READ_BLOCK_BYTES // 4))
+        return np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+
+    audio, sr = sf.read(audio_path, dtype='float32', always_2d=True)
+    audio = audio.mean(axis=1)
+    if sr != sample_rate:
+        import librosa
+
+        audio = librosa.resample(audio, orig_sr=sr, target_sr=sample_rate)
+    return audio.astype(np.float32, copy=False)
+
+
+def audio_duration(audio_path):
+    """ Duration in seconds, from the file header where possible. """
+    try:
+        return sf.info(audio_path).duration
+    except RuntimeError:
+        output = subprocess.run(['ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'csv=p=0',
+                                 audio_path], capture_output=True, text=True, check=True)
+        return float(output.stdout.strip())
+
+
+def real_time_factor(elapsed, audio_seconds):
+    """ Seconds of processing per second of audio; 0.0 when there was no audio (e.g. no files found). """
+    return elapsed / audio_seconds if audio_seconds else 0.0
+
+
+def content_hash(audio_path, block_size=READ_BLOCK_BYTES):
+    sha = hashlib.sha256()
+    with open(audio_path, 'rb') as fp:
+        for block in iter(lambda: fp.read(block_size), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+class AudioCache:
+    """
+    Decoded, resampled waveforms stored as .npy files keyed by the content
+    hash of the source file and the target sample rate, so renamed or copied
+    recordings are only decoded once.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def path(self, audio_path, sample_rate):
+        return os.path.join(self.cache_dir, f"{content_hash(audio_path)}_{sample_rate}.npy")
+
+    def load(self, audio_path, sample_rate):
+        cached = self.path(audio_path, sample_rate)
+        if os.path.exists(cached):
+            return np.load(cached)
+        audio = decode_audio(audio_path, sample_rate)
+        tmp = cached + f'.{os.getpid()}.tmp.npy'
+        np.save(tmp, audio)
+        os.replace(tmp, cached)
+        return audio
@@ -0,0 +1,124 @@
+import os
+import json
+import hashlib
+import inspect
+
+# torch is imported by the functions that use it, so entry points can read BACKENDS (e.g. for argparse choices)
+# without loading it
+BACKENDS = ['torch', 'int8', 'torchscript', 'onnx']
+
+
+def _logits_module(model):
+    """ Wav2Vec2ForCTC returning the bare logits tensor, so it can be traced and exported. """
+    import torch
+
+    class Logits(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_values, attention_mask=None):
+            return self.model(input_values, attention_mask=attention_mask).logits
+
+    return Logits(model).eval()
+
+
+def model_fingerprint(model_path):
+    """ Name, size and mtime of every file of a local checkpoint (or the hub id), for cache keys. """
+    if not os.path.isdir(model_path):
+        return model_path
+    return sorted((name, os.path.getsize(os.path.join(model_path, name)),
+                   int(os.path.getmtime(os.path.join(model_path, name))))
+                  for name in os.listdir(model_path) if os.path.isfile(os.path.join(model_path, name)))
+
+
+def artifact_path(cache_dir, model_path, backend, use_attention_mask):
+    import torch
+
+    key = hashlib.sha256(json.dumps([model_fingerprint(model_path), backend, use_attention_mask,
+                                     torch.__version__], sort_keys=True).encode('utf-8')).hexdigest()[:16]
+    extension = 'onnx' if backend == 'onnx' else 'pt'
+    return os.path.join(cache_dir, f"{backend}-{key}.{extension}")
+
+
+def _example_inputs(use_attention_mask, samples=16000):
+    import torch
+
+    input_values = torch.randn(1, samples, generator=torch.Generator().manual_seed(samples))
+    if use_attention_mask:
+        return input_values, torch.ones(1, samples, dtype=torch.long)
+    return (input_values,)
+
+
+def _convert(model, backend, path, use_attention_mask):
+    """ Write the converted model for backend to path. """
+    import torch
+
+    module = _logits_module(model)
+    example = _example_inputs(use_attention_mask)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + '.tmp'
+    with torch.no_grad():
+        if backend == 'onnx':
+            names = ['input_values', 'attention_mask'][:len(example)]
+            axes = {name: {0: 'batch', 1: 'samples'} for name in names}
+            axes['logits'] = {0: 'batch', 1: 'frames'}
+            # Opset 14 (torch >= 1.10) is the first with the attention ops. Newer torch releases default to the
+            # dynamo exporter; keep the TorchScript-based one, where the keyword exists, so every torch version
+            # exports the same graph
+            options = {'dynamo': False} if 'dynamo' in inspect.signature(torch.onnx.export).parameters else {}
+            torch.onnx.export(module, example, tmp, input_names=names, output_names=['logits'],
+                              dynamic_axes=axes, opset_version=14, **options)
+        else:
+            if backend == 'int8':
+                # Dynamic quantization: int8 weights for every Linear layer, activations quantized on the fly
+                module = torch.ao.quantization.quantize_dynamic(module, {torch.nn.Linear}, dtype=torch.qint8)
+            # The trace is checked against eager on a second length, so shape-dependent code that was frozen
+            # into the graph fails here rather than on other recordings
+            traced = torch.jit.trace(module, example, check_inputs=[_example_inputs(use_attention_mask, 24000)])
+            torch.jit.save(traced, tmp)
+    os.replace(tmp, path)
+
+
+def load_backend(model, backend, model_path, cache_dir, use_attention_mask=False):
+    """
+    Return a function (input_values, attention_mask) -> logits running model
+    on the given backend. Converted models (int8 and fp32 TorchScript, ONNX)
+    are cached in cache_dir and reused by later runs.
+    """
+    import torch
+
+    if backend == 'torch':
+        def run(input_values, attention_mask=None):
+            return model(input_values, attention_mask=attention_mask).logits
+        return run
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend {backend}, expected one of {BACKENDS}")
+
+    path = artifact_path(cache_dir, model_path, backend, use_attention_mask)
+    if not os.path.exists(path):
+        print(f"Converting the model for the {backend} backend, caching it at {path}")
+        _convert(model, backend, path, use_attention_mask)
+
+    if backend == 'onnx':
+        # Optional dependency, only needed for this backend
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = torch.get_num_threads()
+        session = onnxruntime.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+
+        def run(input_values, attention_mask=None):
+            feed = {'input_values': input_values.numpy()}
+            if use_attention_mask:
+                feed['attention_mask'] = attention_mask.long().numpy()
+            return torch.from_numpy(session.run(None, feed)[0])
+        return run
+
+    traced = torch.jit.load(path)
+
+    def run(input_values, attention_mask=None):
+        if use_attention_mask:
+            return traced(input_values, attention_mask.long())
+        return traced(input_values)
+    return run
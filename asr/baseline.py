@@ -2,27 +2,53 @@ import os
 import argparse
 import glob
 import time
-import torch
-import librosa
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import soundfile as sf
+from jiwer import compute_measures
+
+from audio import decode_audio, real_time_factor
+from backends import BACKENDS
+from logits_store import LogitsStore
+from model import ASR
+from vad import pad_segments, speech_segments
+
+
+class WERAccumulator:
+    """ Corpus WER accumulated one utterance at a time instead of over full lists. """
+
+    def __init__(self):
+        self.errors = 0
+        self.reference_words = 0
+        self.utterances = 0
+
+    def update(self, references, hypotheses):
+        for reference, hypothesis in zip(references, hypotheses):
+            measures = compute_measures(reference, hypothesis)
+            self.errors += measures['substitutions'] + measures['deletions'] + measures['insertions']
+            self.reference_words += measures['substitutions'] + measures['deletions'] + measures['hits']
+            self.utterances += 1
+
+    @property
+    def wer(self):
+        return self.errors / self.reference_words if self.reference_words else 0.0
 
-from jiwer import wer
-from datasets import Dataset
-from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor, Wav2Vec2ProcessorWithLM
 
 class ASRBaseline:
-    def __init__(self, data_path, split, sample_rate, model_path, processor_path, use_lm, use_gpu):
+    def __init__(self, data_path, split, sample_rate, model_path, processor_path, use_lm, use_gpu,
+                 num_threads=None, backend='torch', backend_cache_dir='backend_cache', **asr_options):
+        """ asr_options go to ASR: decoder settings (decode_workers, beam_width, alpha, ...) and decode_only. """
         self.eval_path = data_path
         self.split = split
         self.sr = sample_rate
-        self.device = torch.device("cuda" if use_gpu else "cpu")
-        self.model = Wav2Vec2ForCTC.from_pretrained(model_path)
-        self.model.to(self.device)
-        self.model.eval()
+        self.asr = ASR(sample_rate, model_path, processor_path, use_lm, None, None,
+                       use_gpu=use_gpu, num_threads=num_threads, backend=backend,
+                       backend_cache_dir=backend_cache_dir, **asr_options)
+        self.device = self.asr.device
+        self.model = self.asr.model
         self.use_lm = use_lm
-        if self.use_lm:
-            self.processor = Wav2Vec2ProcessorWithLM.from_pretrained(processor_path)
-        else:
-            self.processor = Wav2Vec2Processor.from_pretrained(processor_path)
+        self.processor = self.asr.processor
 
     def read_txt_file(self, txt_f):
         with open(txt_f, "r") as fp:
@@ -30,51 +56,157 @@ class ASRBaseline:
             samples = {s.split()[0]: " ".join(s.split()[1:]) for s in samples if len(s.split()) > 2}
         return samples
 
-    def read_audio_file(self, audio_path):
-        audio, sr = librosa.load(audio_path, sr=self.sr)
-        file_name = os.path.basename(audio_path).split('.')[0]
-        return {file_name: audio}
-
-    def fetch_audio_text_mapping(self):
-        audio_files = glob.glob(f"{self.eval_path}/{self.split}/*/*/*.flac")
-        txt_files = glob.glob(f"{self.eval_path}/{self.split}/*/*/*.txt")
-
+    def read_references(self):
+        """ {file_id: reference transcript} from the split's .txt files. """
         txt_samples = {}
-        for txt_f in txt_files:
+        for txt_f in glob.glob(f"{self.eval_path}/{self.split}/*/*/*.txt"):
             txt_samples.update(self.read_txt_file(txt_f))
+        return txt_samples
 
-        audio_samples = {}
+    def list_samples(self):
+        """
+        (file_id, audio_path, reference) for every utterance with a transcript,
+        sorted by duration (read from the flac headers) so that consecutive
+        batches need little padding. No audio is decoded here.
+        """
+        audio_files = glob.glob(f"{self.eval_path}/{self.split}/*/*/*.flac")
+        txt_samples = self.read_references()
+
+        samples = []
         for audio_f in audio_files:
-            audio_samples.update(self.read_audio_file(audio_f))
-
-        file_ids = set(audio_samples.keys()) & set(txt_samples.keys())
-        print(f"{len(file_ids)} files are found in LibriSpeech/{self.split}")
-        audio_filtered_samples = [audio_samples[file_id] for file_id in file_ids]
-        txt_filtered_samples = [txt_samples[file_id] for file_id in file_ids]
-        assert len(txt_filtered_samples) == len(audio_filtered_samples), f"Number of transcripts and audio " \
-                                                                         f"files should be equal."
-        samples = {"audio_array": audio_filtered_samples, "text": txt_filtered_samples}
+            file_id = os.path.basename(audio_f).split('.')[0]
+            if file_id in txt_samples:
+                samples.append((file_id, audio_f, txt_samples[file_id]))
+        samples.sort(key=lambda sample: sf.info(sample[1]).frames)
+        print(f"{len(samples)} files are found in LibriSpeech/{self.split}")
         return samples
 
-    def map_to_pred(self, batch):
-        input_values = self.processor(batch["audio_array"], return_tensors="pt", sampling_rate=self.sr).input_values
-        input_values = input_values.to(self.device)
-        with torch.no_grad():
-            logits = self.model(input_values).logits
-        if self.use_lm:
-            transcription = self.processor.batch_decode(logits.detach().cpu().numpy()).text[0]
-        else:
-            predicted_ids = torch.argmax(logits, dim=-1)
-            transcription = self.processor.batch_decode(predicted_ids)[0]
-        batch["transcription"] = transcription
-        return batch
+    def iter_batches(self, samples, batch_size, workers=4, prefetch=4):
+        """
+        Yield (file_ids, audios, references) batches while up to prefetch
+        batches are decoded ahead on a thread pool, so decoding overlaps with
+        inference and at most prefetch + 1 batches of audio are in memory.
+        """
+        batches = [samples[i:i + batch_size] for i in range(0, len(samples), batch_size)]
+        pending = deque()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for batch in batches:
+                pending.append((batch, [pool.submit(decode_audio, path, self.sr) for _, path, _ in batch]))
+                if len(pending) > prefetch:
+                    yield self._collect(*pending.popleft())
+            while pending:
+                yield self._collect(*pending.popleft())
+
+    def _collect(self, batch, futures):
+        return [file_id for file_id, _, _ in batch], [f.result() for f in futures], [text for _, _, text in batch]
+
+    def speech(self, audios, pad_s=0.2):
+        """ Padded speech segments of each waveform, as found by the voice-activity detector. """
+        return [pad_segments(speech_segments(audio, self.sr), int(pad_s * self.sr), len(audio)) for audio in audios]
+
+    def evaluate(self, batch_size=8, workers=4, prefetch=4, vad=False, logits_store=None):
+        """
+        Stream the split through the model and return the WER accumulator and
+        timings. The whole split is one stream, so each batch is decoded while
+        the next one is read and run through the model. With vad only the
+        detected speech is transcribed; detection time is counted as inference.
+        forward and decode are the time spent in the acoustic model and the
+        CTC/LM decoder. With a logits_store, every utterance's logits are saved
+        for evaluate_stored().
+        """
+        accumulator = WERAccumulator()
+        timings = {'audio_wait': 0.0, 'inference': 0.0, 'audio_seconds': 0.0, 'speech_seconds': 0.0}
+        asr_timings = dict(self.asr.timings)
+        batches = self.iter_batches(self.list_samples(), batch_size, workers, prefetch)
+
+        def model_inputs():
+            """ (context, audios, ids) batches for ASR.forward_stream, timing the wait for audio. """
+            while True:
+                start = time.perf_counter()
+                batch = next(batches, None)
+                timings['audio_wait'] += time.perf_counter() - start
+                if batch is None:
+                    return
+                file_ids, audios, references = batch
+                timings['audio_seconds'] += sum(len(audio) for audio in audios) / self.sr
+                if vad:
+                    pieces, owners = self.asr.split_segments(audios, self.speech(audios))
+                    timings['speech_seconds'] += sum(len(piece) for piece in pieces) / self.sr
+                    if not pieces:
+                        # No speech at all: nothing to run through the model
+                        accumulator.update([reference.lower() for reference in references], [""] * len(references))
+                        continue
+                    yield (references, owners), pieces, []
+                else:
+                    timings['speech_seconds'] += sum(len(audio) for audio in audios) / self.sr
+                    yield (references, None), audios, file_ids
+
+        start = time.perf_counter()
+        for (references, owners), transcriptions in self.asr.decode_stream(
+                self.asr.forward_stream(model_inputs(), logits_store)):
+            if owners is not None:
+                transcriptions = self.asr.join_segments(len(references), owners, transcriptions)
+            # Transcriptions are lowercased by ASR; LibriSpeech references are uppercase
+            accumulator.update([reference.lower() for reference in references], transcriptions)
+        timings['inference'] = time.perf_counter() - start - timings['audio_wait']
+        for stage in ['forward', 'decode']:
+            timings[stage] = self.asr.timings[stage] - asr_timings[stage]
+        return accumulator, timings
+
+    def evaluate_stored(self, logits_store, batch_size=8):
+        """
+        WER of the split decoded from logits saved by evaluate(), without audio
+        or the acoustic model. Returns the accumulator and timings like evaluate().
+        """
+        references = {file_id: text for file_id, text in self.read_references().items() if file_id in logits_store}
+        print(f"{len(references)} utterances of LibriSpeech/{self.split} found in {logits_store.root}")
+        file_ids = list(references)
+        decode = self.asr.timings['decode']
+
+        start = time.perf_counter()
+        transcriptions = self.asr.decode_stored(logits_store, file_ids, batch_size)
+        inference = time.perf_counter() - start
+
+        accumulator = WERAccumulator()
+        accumulator.update([references[file_id].lower() for file_id in file_ids], transcriptions)
+        frames = sum(logits_store.frames(file_id) for file_id in file_ids)
+        audio_seconds = frames * self.asr.config.inputs_to_logits_ratio / self.sr
+        return accumulator, {'audio_wait': 0.0, 'inference': inference, 'audio_seconds': audio_seconds,
+                             'speech_seconds': audio_seconds, 'forward': 0.0,
+                             'decode': self.asr.timings['decode'] - decode}
 
 def main(args):
-    baseline = ASRBaseline(args.input_dir, args.split, args.sr, args.model, args.processor, args.use_lm, args.use_gpu)
-    samples = baseline.fetch_audio_text_mapping()
-    data_eval = Dataset.from_dict(samples)
-    result = data_eval.map(baseline.map_to_pred)
-    print("WER: ", wer(result["text"], result["transcription"]))
+    logits_store = None
+    if args.from_logits:
+        logits_store = LogitsStore(args.from_logits)
+        args.model = args.model or logits_store.meta.get('model')
+    elif args.save_logits:
+        logits_store = LogitsStore(args.save_logits, {'model': args.model, 'sr': args.sr, 'backend': args.backend})
+    baseline = ASRBaseline(args.input_dir, args.split, args.sr, args.model, args.processor, args.use_lm, args.use_gpu,
+                           args.num_threads, args.backend, args.backend_cache, decode_workers=args.decode_workers,
+                           beam_width=args.beam_width, beam_prune_logp=args.beam_prune_logp, alpha=args.lm_alpha,
+                           beta=args.lm_beta, decode_only=bool(args.from_logits))
+    start = time.perf_counter()
+    if args.from_logits:
+        # Decode-only: no audio is read and the acoustic model is not loaded
+        accumulator, timings = baseline.evaluate_stored(logits_store, args.batch_size)
+    else:
+        accumulator, timings = baseline.evaluate(args.batch_size, args.io_workers, args.prefetch, args.vad,
+                                                 logits_store)
+    elapsed = time.perf_counter() - start
+    baseline.asr.close()
+    if args.save_logits:
+        logits_store.close()
+        print(f"Saved logits of {len(logits_store)} utterances to {args.save_logits}")
+    print("WER: ", accumulator.wer)
+    if args.vad:
+        print(f"VAD kept {timings['speech_seconds']:.0f}s of speech out of {timings['audio_seconds']:.0f}s")
+    print(f"Real-time factor: {real_time_factor(elapsed, timings['audio_seconds']):.3f} "
+          f"({timings['audio_seconds']:.0f}s of audio in {elapsed:.0f}s; inference {timings['inference']:.0f}s, "
+          f"waiting on audio {timings['audio_wait']:.0f}s)")
+    # Decoding runs alongside the forward pass, so the two can add up to more than the inference time
+    print(f"Forward pass {timings['forward']:.0f}s, decoding {timings['decode']:.0f}s "
+          f"({'LM beam search' if args.use_lm else 'greedy'})")
 
 
 if __name__ == '__main__':
@@ -88,5 +220,27 @@ if __name__ == '__main__':
                                                               "value on which the model was trained on")
     parser.add_argument('--use_lm', type=bool, default=False, help="Set to True if you want to use the language model.")
     parser.add_argument('--use_gpu', type=bool, default=False)
+    parser.add_argument('--batch_size', type=int, default=8, help="Utterances per forward pass.")
+    parser.add_argument('--num_threads', type=int, default=None, help="Torch intra-op threads on CPU.")
+    parser.add_argument('--backend', type=str, default='torch', choices=BACKENDS,
+                        help="CPU inference backend: torch, int8, torchscript or onnx.")
+    parser.add_argument('--backend_cache', type=str, default='backend_cache', help="Converted models are cached here.")
+    parser.add_argument('--io_workers', type=int, default=4, help="Threads decoding audio ahead of inference.")
+    parser.add_argument('--prefetch', type=int, default=4, help="Batches decoded ahead of the model.")
+    parser.add_argument('--decode_workers', type=int, default=None, help="Processes in the LM beam-search pool "
+                                                                        "(default: one per core).")
+    parser.add_argument('--beam_width', type=int, default=None, help="LM beam width (pyctcdecode default 100).")
+    parser.add_argument('--beam_prune_logp', type=float, default=None, help="Drop beams this far (log prob) below "
+                                                                           "the best one (pyctcdecode default -10).")
+    parser.add_argument('--lm_alpha', type=float, default=None, help="LM weight (pyctcdecode default 0.5).")
+    parser.add_argument('--lm_beta', type=float, default=None, help="Word insertion bonus (pyctcdecode default 1.5).")
+    parser.add_argument('--vad', action='store_true', help="Transcribe only the speech found by the voice-activity "
+                                                           "detector.")
+    parser.add_argument('--save_logits', type=str, default=None, help="Also save each utterance's logits (float16) "
+                                                                      "in this directory.")
+    parser.add_argument('--from_logits', type=str, default=None, help="Decode-only: score logits saved with "
+                                                                      "--save_logits instead of running the model.")
     args = parser.parse_args()
+    if args.vad and (args.save_logits or args.from_logits):
+        parser.error("--save_logits/--from_logits store whole utterances and cannot be combined with --vad")
     main(args)
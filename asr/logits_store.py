@@ -0,0 +1,87 @@
+import os
+import json
+
+import numpy as np
+
+
+class LogitsStore():
+    """
+    On-disk store of per-utterance CTC logits, so decoders can be re-run
+    without the acoustic model. All logits are appended as float16 rows to
+    one file (<root>/logits.f16, shape (frames, vocab)) and index.json maps
+    each utterance id to its (first row, frames). Reads are slices of a
+    memory map, so nothing is copied until the decoder converts a batch.
+    meta records what produced the logits; reopening a store for writing
+    with different meta raises ValueError.
+    """
+
+    def __init__(self, root, meta=None):
+        self.root = root
+        self.data_path = os.path.join(root, 'logits.f16')
+        self.index_path = os.path.join(root, 'index.json')
+        self.meta, self.utterances = {}, {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r') as fp:
+                index = json.load(fp)
+            self.meta, self.utterances = index['meta'], index['utterances']
+        for name, value in (meta or {}).items():
+            if self.meta.setdefault(name, value) != value:
+                raise ValueError(f"{root} holds logits with {name}={self.meta[name]!r}, not {value!r}")
+        # Complete rows on disk. After an interrupted write the data file may hold rows the index does not
+        # know about (harmless) or a partial row, which put() truncates before appending
+        self.rows = os.path.getsize(self.data_path) // (2 * self.meta['vocab_size']) \
+            if os.path.exists(self.data_path) and 'vocab_size' in self.meta else 0
+        self._file = None
+        self._memmap = None
+
+    def __contains__(self, utterance_id):
+        return utterance_id in self.utterances
+
+    def __len__(self):
+        return len(self.utterances)
+
+    def frames(self, utterance_id):
+        return self.utterances[utterance_id][1]
+
+    def put(self, utterance_id, logits):
+        """ Append the (frames, vocab) logits of an utterance; a stored id is overwritten. """
+        logits = np.ascontiguousarray(logits, dtype=np.float16)
+        if self.meta.setdefault('vocab_size', logits.shape[1]) != logits.shape[1]:
+            raise ValueError(f"Expected {self.meta['vocab_size']} logits per frame, got {logits.shape[1]}")
+        if self._file is None:
+            os.makedirs(self.root, exist_ok=True)
+            self._file = open(self.data_path, 'ab')
+            # Drop a partial row left by an interrupted write so new rows start on a row boundary
+            self._file.truncate(self.rows * 2 * logits.shape[1])
+        self._file.write(logits.tobytes())
+        self.utterances[utterance_id] = [self.rows, len(logits)]
+        self.rows += len(logits)
+        self._memmap = None
+
+    def get(self, utterance_id):
+        """ Read-only float16 view of an utterance's logits. """
+        start, frames = self.utterances[utterance_id]
+        if frames == 0:
+            return np.zeros((0, self.meta['vocab_size']), dtype=np.float16)
+        if self._memmap is None:
+            if self._file is not None:
+                self._file.flush()
+            self._memmap = np.memmap(self.data_path, dtype=np.float16, mode='r',
+                                     shape=(self.rows, self.meta['vocab_size']))
+        return self._memmap[start:start + frames]
+
+    def flush(self):
+        """ Write buffered logits and the index. """
+        if self._file is not None:
+            self._file.flush()
+        os.makedirs(self.root, exist_ok=True)
+        tmp = f'{self.index_path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as fp:
+            json.dump({'meta': self.meta, 'utterances': self.utterances}, fp)
+        os.replace(tmp, self.index_path)
+
+    def close(self):
+        self.flush()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
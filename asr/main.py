@@ -1,39 +1,172 @@
 import os
+import sys
 import argparse
-import subprocess
-import torch
+import time
 
-from model import ASR
+from audio import audio_duration, content_hash, list_audio_files, real_time_factor
+from backends import BACKENDS
+from logits_store import LogitsStore
+from timestamps import pause_statistics, write_statistics, write_words
+from vad import pad_segments, silence_statistics, speech_segments
 
+# Modules shared with the language pipeline (the on-disk artifact cache) live in common/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from artifact_cache import ArtifactCache
 
-def main(args):
-    device = torch.device("cuda" if args.use_gpu else "cpu")
-    output_file_name = os.path.basename(args.input_audio).split('.')[0] + '.txt'
-    asr = ASR(args.sr, args.model, args.processor, args.use_lm, args.output_path, output_file_name)
-    audio_format = asr.get_input_file_info(args.input_audio)
-    # Convert audio format to .wav if not already in .wav
-    if audio_format != 'wav':
-        wav_audio_path = args.input_audio.split('.')[0]+'.wav'
-        subprocess.call(['ffmpeg', '-i', args.input_audio, wav_audio_path])
-        audio = asr.load_audio(wav_audio_path)
+def read_audio(asr, input_audio):
+    # Validate the input, then decode and resample it in memory (no intermediate .wav)
+    asr.get_input_file_info(input_audio)
+    return asr.load_audio(input_audio)
+
+
+def utterance_id(input_audio):
+    """ Name of a recording's outputs and of its entry in a logits store. """
+    return os.path.basename(input_audio).split('.')[0]
+
+
+def decoder_options(args):
+    return {'decode_workers': args.decode_workers, 'beam_width': args.beam_width,
+            'beam_prune_logp': args.beam_prune_logp, 'alpha': args.lm_alpha, 'beta': args.lm_beta}
+
+
+def detect_speech(args, audio):
+    """ Speech segments of a waveform (padded for transcription) and the silence statistics between them. """
+    segments = speech_segments(audio, args.sr, args.vad_threshold_db, args.vad_max_flatness, args.min_pause)
+    silence = silence_statistics(segments, args.sr, len(audio) / args.sr, args.min_pause)
+    return pad_segments(segments, int(args.vad_pad_s * args.sr), len(audio)), silence
+
+
+def transcribe(args, audio_files):
+    """ Transcripts of the files, and with --vad the silence statistics of each (else Nones). """
+    # transformers is slow to import and only needed when something is not cached
+    from model import ASR
+
+    logits_store = None
+    if args.save_logits:
+        logits_store = LogitsStore(args.save_logits, {'model': args.model, 'sr': args.sr, 'backend': args.backend})
+    asr = ASR(args.sr, args.model, args.processor, args.use_lm, args.output_path, None,
+              use_gpu=args.use_gpu, num_threads=args.num_threads, audio_cache_dir=args.cache_dir,
+              backend=args.backend, backend_cache_dir=args.backend_cache, **decoder_options(args))
+    ids = [utterance_id(input_audio) for input_audio in audio_files]
+
+    silences = [None] * len(audio_files)
+    if args.chunk_length_s > 0:
+        # Streaming mode: each recording is read and transcribed window by window
+        for input_audio in audio_files:
+            asr.get_input_file_info(input_audio)
+        start = time.perf_counter()
+        transcriptions = asr.transcribe_long_many(audio_files, args.chunk_length_s, args.stride_length_s,
+                                                  batch_size=args.batch_size, output_word_offsets=args.word_offsets,
+                                                  logits_store=logits_store, ids=ids)
+        elapsed = time.perf_counter() - start
+        audio_seconds = sum(audio_duration(input_audio) for input_audio in audio_files)
     else:
-        audio = asr.load_audio(args.input_audio)
+        audios = [read_audio(asr, input_audio) for input_audio in audio_files]
+
+        start = time.perf_counter()
+        if args.vad:
+            # Only the speech segments go through the model; the silence between them is measured instead
+            segments, silences = zip(*[detect_speech(args, audio) for audio in audios])
+            transcriptions = asr.transcribe_segments(audios, segments, batch_size=args.batch_size,
+                                                     output_word_offsets=args.word_offsets)
+            speech_seconds = sum(end - begin for audio_segments in segments for begin, end in audio_segments)
+            print(f'\nVAD kept {speech_seconds / args.sr:.1f}s of speech out of '
+                  f'{sum(len(audio) for audio in audios) / args.sr:.1f}s')
+        else:
+            transcriptions = asr.transcribe_batch(audios, batch_size=args.batch_size,
+                                                  output_word_offsets=args.word_offsets, logits_store=logits_store,
+                                                  ids=ids)
+        elapsed = time.perf_counter() - start
+        audio_seconds = sum(len(audio) for audio in audios) / args.sr
+
+    print(f'\nTranscribed {audio_seconds:.1f}s of audio in {elapsed:.1f}s '
+          f'(real-time factor {real_time_factor(elapsed, audio_seconds):.3f}; forward {asr.timings["forward"]:.1f}s, '
+          f'decode {asr.timings["decode"]:.1f}s)')
+    asr.close()
+    if logits_store is not None:
+        logits_store.close()
+        print(f'Saved logits of {len(audio_files)} recording(s) to {args.save_logits}')
+    return transcriptions, list(silences)
+
+
+def decode_logits(args, audio_files):
+    """ Decode-only: transcripts of the files from logits saved with --save_logits, without the acoustic model. """
+    from model import ASR
+
+    logits_store = LogitsStore(args.from_logits)
+    ids = [utterance_id(input_audio) for input_audio in audio_files]
+    missing = [audio_id for audio_id in ids if audio_id not in logits_store]
+    if missing:
+        raise KeyError(f"No logits saved in {args.from_logits} for {', '.join(missing)}")
+    # The acoustic model's config (frame rate) is read from the checkpoint that produced the logits
+    asr = ASR(args.sr, args.model or logits_store.meta['model'], args.processor, args.use_lm, args.output_path, None,
+              decode_only=True, **decoder_options(args))
+
+    start = time.perf_counter()
+    transcriptions = asr.decode_stored(logits_store, ids, batch_size=args.batch_size,
+                                       output_word_offsets=args.word_offsets)
+    print(f'\nDecoded {len(ids)} recording(s) from {args.from_logits} in {time.perf_counter() - start:.1f}s')
+    asr.close()
+    return transcriptions, [None] * len(audio_files)
+
+
+def main(args):
+    audio_files = list_audio_files(args.input_audio)
+
+    # Reuse transcripts of recordings already transcribed with the same model and settings
+    transcriptions, silences, keys = {}, {}, {}
+    # With word offsets a transcript is a [text, words] pair, cached under its own kind
+    kind = 'transcript_words' if args.word_offsets else 'transcript'
+    # Saving or decoding logits always runs the decoder, so the transcript cache is bypassed
+    use_cache = args.transcript_cache and not (args.save_logits or args.from_logits)
+    cache = ArtifactCache(args.transcript_cache, args.cache_max_mb << 20) if use_cache else None
+    if cache is not None:
+        config = {'model': args.model, 'processor': args.processor, 'use_lm': bool(args.use_lm), 'sr': args.sr,
+                  'chunk_length_s': args.chunk_length_s, 'stride_length_s': args.stride_length_s,
+                  'backend': args.backend}
+        if args.use_lm and (args.beam_width, args.beam_prune_logp, args.lm_alpha, args.lm_beta) != (None,) * 4:
+            config['beam'] = [args.beam_width, args.beam_prune_logp, args.lm_alpha, args.lm_beta]
+        if args.vad:
+            config['vad'] = [args.vad_threshold_db, args.vad_max_flatness, args.vad_pad_s, args.min_pause]
+        for input_audio in audio_files:
+            keys[input_audio] = cache.key(content_hash(input_audio), config)
+            transcription = cache.get(kind, keys[input_audio])
+            silence = cache.get('silence', keys[input_audio]) if args.vad else None
+            if transcription is not None and (silence is not None or not args.vad):
+                transcriptions[input_audio], silences[input_audio] = transcription, silence
 
-    input_values = asr.processor(audio, return_tensors="pt", sampling_rate=args.sr).input_values
-    input_values = input_values.to(device)
-    asr.model.to(device)
-    asr.model.eval()
-    with torch.no_grad():
-        logits = asr.model(input_values).logits
+    pending = [input_audio for input_audio in audio_files if input_audio not in transcriptions]
+    if pending:
+        run = decode_logits if args.from_logits else transcribe
+        for input_audio, transcription, silence in zip(pending, *run(args, pending)):
+            transcriptions[input_audio], silences[input_audio] = transcription, silence
+            if cache is not None:
+                cache.put(kind, keys[input_audio], transcription)
+                if silence is not None:
+                    cache.put('silence', keys[input_audio], silence)
+    if cache is not None:
+        cache.report()
 
-    transcription = asr.decode(logits)
-    output_file_name = os.path.basename(args.input_audio).split('.')[0]+'.txt'
-    asr.save_transcripts(transcription)
-    print(f'\nTranscript {output_file_name} saved at {args.output_path}')
+    os.makedirs(args.output_path, exist_ok=True)
+    for input_audio in audio_files:
+        stem = utterance_id(input_audio)
+        output_file_name = stem+'.txt'
+        transcription = transcriptions[input_audio]
+        if args.word_offsets:
+            transcription, words = transcription
+            # Word timestamps and pause/rate statistics go next to the transcript
+            write_words(words, os.path.join(args.output_path, f'{stem}.words.{args.offsets_format}'))
+            write_statistics(pause_statistics(words, audio_duration(input_audio), args.min_pause),
+                             os.path.join(args.output_path, f'{stem}.pauses.json'))
+        if silences[input_audio] is not None:
+            write_statistics(silences[input_audio], os.path.join(args.output_path, f'{stem}.silence.json'))
+        with open(os.path.join(args.output_path, output_file_name), 'w') as fp:
+            fp.write(transcription)
+        print(f'\nTranscript {output_file_name} saved at {args.output_path}')
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
-    parser.add_argument('input_audio', type=str)
+    parser.add_argument('input_audio', type=str, nargs='+', help="Audio files and/or directories of audio files.")
     parser.add_argument('output_path', type=str)
     parser.add_argument('--model', type=str)
     parser.add_argument('--processor', type=str, help="Make sure to give the "
@@ -42,5 +175,50 @@ if __name__ == '__main__':
                                                               "value on which the model was trained on")
     parser.add_argument('--use_lm', type=bool, default=True, help="Set to True if you want to use the language model.")
     parser.add_argument('--use_gpu', type=bool, default=False)
+    parser.add_argument('--batch_size', type=int, default=8, help="Utterances per forward pass.")
+    parser.add_argument('--chunk_length_s', type=float, default=0, help="Transcribe long recordings in windows of "
+                                                                           "this many seconds (0 = one full pass).")
+    parser.add_argument('--stride_length_s', type=float, default=5, help="Overlap in seconds on each side of a "
+                                                                         "window that is discarded when stitching.")
+    parser.add_argument('--cache_dir', type=str, default=None, help="Cache decoded, resampled audio here, keyed "
+                                                                      "by file content.")
+    parser.add_argument('--transcript_cache', type=str, default=None, help="Cache transcripts here, keyed by audio "
+                                                                           "content and model settings.")
+    parser.add_argument('--cache_max_mb', type=int, default=1024, help="Size limit of the transcript cache.")
+    parser.add_argument('--word_offsets', action='store_true', help="Also write word start/end times "
+                                                                     "(<name>.words.parquet) and pause/speech-rate "
+                                                                     "statistics (<name>.pauses.json).")
+    parser.add_argument('--offsets_format', type=str, default='parquet', choices=['parquet', 'csv'])
+    parser.add_argument('--min_pause', type=float, default=0.25, help="Shortest gap between words (seconds) "
+                                                                      "counted as a pause.")
+    parser.add_argument('--backend', type=str, default='torch', choices=BACKENDS,
+                        help="CPU inference backend: eager fp32 torch, int8 dynamic quantization, TorchScript or "
+                             "ONNX Runtime. Converted models are cached in --backend_cache.")
+    parser.add_argument('--backend_cache', type=str, default='backend_cache')
+    parser.add_argument('--num_threads', type=int, default=None, help="Torch intra-op threads on CPU.")
+    parser.add_argument('--decode_workers', type=int, default=None, help="Processes in the LM beam-search pool "
+                                                                        "(default: one per core).")
+    parser.add_argument('--beam_width', type=int, default=None, help="LM beam width (pyctcdecode default 100).")
+    parser.add_argument('--beam_prune_logp', type=float, default=None, help="Drop beams this far (log prob) below "
+                                                                           "the best one (pyctcdecode default -10).")
+    parser.add_argument('--lm_alpha', type=float, default=None, help="LM weight (pyctcdecode default 0.5).")
+    parser.add_argument('--lm_beta', type=float, default=None, help="Word insertion bonus (pyctcdecode default 1.5).")
+    parser.add_argument('--save_logits', type=str, default=None, help="Also save each recording's logits (float16, "
+                                                                      "memory-mapped) in this directory.")
+    parser.add_argument('--from_logits', type=str, default=None, help="Decode-only: transcribe from logits saved "
+                                                                      "with --save_logits, without running the model "
+                                                                      "(--model defaults to the one that saved them).")
+    parser.add_argument('--vad', action='store_true', help="Transcribe only the speech found by an energy/spectral "
+                                                           "voice-activity detector and write silence statistics "
+                                                           "(<name>.silence.json). Full-pass mode only.")
+    parser.add_argument('--vad_threshold_db', type=float, default=12.0, help="Frame energy above the noise floor "
+                                                                             "(dB) counted as speech.")
+    parser.add_argument('--vad_max_flatness', type=float, default=0.5, help="Frames with a flatter (more noise-like) "
+                                                                            "spectrum are not speech unless loud.")
+    parser.add_argument('--vad_pad_s', type=float, default=0.2, help="Audio kept around each speech segment.")
     args = parser.parse_args()
-    main(args)
\ No newline at end of file
+    if args.vad and args.chunk_length_s > 0:
+        parser.error("--vad transcribes whole recordings; it cannot be combined with --chunk_length_s")
+    if args.vad and (args.save_logits or args.from_logits):
+        parser.error("--save_logits/--from_logits store whole recordings and cannot be combined with --vad")
+    main(args)
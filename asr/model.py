@@ -1,31 +1,347 @@
 import os
 import argparse
+import multiprocessing
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import fleep
 import librosa
-import subprocess
+import numpy as np
 import torch
 
-from transformers import Wav2Vec2ForCTC, Wav2Vec2Processor, Wav2Vec2ProcessorWithLM
+from audio import AudioCache, decode_audio, iter_ffmpeg_blocks, native_sample_rate
+from streaming import iter_windows, iter_file_blocks
+from timestamps import offsets_to_words
+from backends import load_backend
+from transformers import Wav2Vec2Config, Wav2Vec2ForCTC, Wav2Vec2Processor, Wav2Vec2ProcessorWithLM
 
 class ASR:
-    def __init__(self, sample_rate, model_path, processor_path, use_lm, output_path, output_file_name):
+    def __init__(self, sample_rate, model_path, processor_path, use_lm, output_path, output_file_name,
+                 use_gpu=False, num_threads=None, audio_cache_dir=None, backend='torch',
+                 backend_cache_dir='backend_cache', decode_workers=None, beam_width=None, beam_prune_logp=None,
+                 token_min_logp=None, alpha=None, beta=None, decode_only=False):
         self.sample_rate = sample_rate
-        self.model = Wav2Vec2ForCTC.from_pretrained(model_path)
+        self.audio_cache = AudioCache(audio_cache_dir) if audio_cache_dir else None
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.device = torch.device("cuda" if use_gpu else "cpu")
+        self.model = None
+        if decode_only:
+            # Decoding stored logits (decode_stored) only needs the model's config, not its weights
+            self.config = Wav2Vec2Config.from_pretrained(model_path)
+        else:
+            self.model = Wav2Vec2ForCTC.from_pretrained(model_path)
+            self.model.to(self.device)
+            self.model.eval()
+            self.config = self.model.config
         self.use_lm = use_lm
         if self.use_lm:
             self.processor = Wav2Vec2ProcessorWithLM.from_pretrained(processor_path)
         else:
             self.processor = Wav2Vec2Processor.from_pretrained(processor_path)
+        # Beam search settings for the LM decoder; unset ones keep the pyctcdecode defaults
+        self.beam_options = {name: value for name, value in [('beam_width', beam_width),
+                                                              ('beam_prune_logp', beam_prune_logp),
+                                                              ('token_min_logp', token_min_logp)]
+                             if value is not None}
+        self.decode_pool = None
+        if self.use_lm:
+            self.start_decode_pool(decode_workers, alpha, beta)
+        # Decoding of one batch runs on this thread while the next batch goes through the model
+        self.decode_thread = ThreadPoolExecutor(max_workers=1)
+        self.timings = {'forward': 0.0, 'decode': 0.0}
         self.output_path = output_path
         self.output_file_name = output_file_name
+        if backend != 'torch' and use_gpu:
+            raise ValueError(f"The {backend} backend runs on CPU only; use --backend torch with --use_gpu")
+        self.backend = backend
+        self.run_model = None
+        if not decode_only:
+            self.run_model = load_backend(self.model, backend, model_path, backend_cache_dir,
+                                          self.processor.feature_extractor.return_attention_mask)
+
+    def start_decode_pool(self, decode_workers=None, alpha=None, beta=None):
+        """
+        Set the LM weight (alpha) and word insertion bonus (beta), then fork one
+        beam-search pool for the lifetime of the model instead of one per
+        batch_decode call. pyctcdecode keeps the LM in a class-level container
+        that workers copy at fork time, so the weights must be set first:
+        passing alpha/beta to batch_decode would only change the parent's copy.
+        """
+        if alpha is not None or beta is not None:
+            self.processor.decoder.reset_params(alpha=alpha, beta=beta)
+        if 'fork' in multiprocessing.get_all_start_methods():
+            self.decode_pool = multiprocessing.get_context('fork').Pool(decode_workers or os.cpu_count())
 
-    def decode(self, logits):
+    def decode(self, logits, output_word_offsets=False):
+        return self.decode_batch(logits, output_word_offsets=output_word_offsets)[0]
+
+    def decode_batch(self, logits, lengths=None, output_word_offsets=False):
+        """
+        Decode a batch of logits into lowercased transcripts. lengths holds the
+        number of valid frames per utterance; frames past it are padding. With
+        output_word_offsets each result is a (transcript, words) pair, words
+        being [{'word', 'start', 'end'}, ...] in seconds from the same logits.
+        """
+        start = time.perf_counter()
+        logits = logits.detach().cpu()
+        padding = None
+        if lengths is not None:
+            padding = torch.arange(logits.shape[1])[None, :] >= lengths[:, None]
         if self.use_lm:
-            transcription = self.processor.batch_decode(logits.detach().cpu().numpy()).text[0].lower()
+            logits = logits.numpy()
+            if padding is not None:
+                # Wav2Vec2ProcessorWithLM drops frames whose logits are all -100
+                logits = logits.copy()
+                logits[padding.numpy()] = -100.0
+            decoded = self.processor.batch_decode(logits, pool=self.decode_pool,
+                                                  output_word_offsets=output_word_offsets, **self.beam_options)
+        else:
+            predicted_ids = torch.argmax(logits, dim=-1)
+            if padding is not None:
+                predicted_ids[padding] = self.processor.tokenizer.pad_token_id
+            decoded = self.processor.batch_decode(predicted_ids, output_word_offsets=output_word_offsets)
+        if not output_word_offsets:
+            transcriptions = decoded.text if self.use_lm else decoded
+            transcriptions = [transcription.lower() for transcription in transcriptions]
         else:
-            predicted_ids = torch.argmax(logits.cpu(), dim=-1)
-            transcription = self.processor.batch_decode(predicted_ids)[0].lower()
-        return transcription
+            seconds_per_frame = self.config.inputs_to_logits_ratio / self.sample_rate
+            transcriptions = [(transcription.lower(), offsets_to_words(word_offsets, seconds_per_frame))
+                              for transcription, word_offsets in zip(decoded.text, decoded.word_offsets)]
+        self.timings['decode'] += time.perf_counter() - start
+        return transcriptions
+
+    def forward(self, audios):
+        """
+        Run a zero-padded batch of waveforms through the acoustic model. Returns
+        the logits and the number of valid logit frames per waveform.
+        """
+        start = time.perf_counter()
+        inputs = self.processor(audios, return_tensors="pt", sampling_rate=self.sample_rate,
+                                padding=True, return_attention_mask=True)
+        attention_mask = None
+        # Models trained without attention masks (e.g. wav2vec2-base) expect plain zero padding
+        if self.processor.feature_extractor.return_attention_mask:
+            attention_mask = inputs.attention_mask.to(self.device)
+        with torch.no_grad():
+            logits = self.run_model(inputs.input_values.to(self.device), attention_mask)
+        lengths = self.model._get_feat_extract_output_lengths(torch.tensor([len(audio) for audio in audios]))
+        self.timings['forward'] += time.perf_counter() - start
+        return logits, lengths
+
+    def forward_stream(self, batches, logits_store=None):
+        """
+        Run an iterable of (context, audios, ids) batches through the model,
+        yielding (context, logits, lengths). With a logits_store each
+        utterance's logits are saved under its id.
+        """
+        for context, audios, ids in batches:
+            logits, lengths = self.forward(audios)
+            if logits_store is not None:
+                for j, utterance_id in enumerate(ids):
+                    logits_store.put(utterance_id, logits[j, :lengths[j]].cpu().numpy())
+            yield context, logits, lengths
+
+    def decode_stream(self, batches, output_word_offsets=False):
+        """
+        Decode an iterable of (context, logits, lengths) batches, yielding
+        (context, transcriptions) in order. Each batch is decoded on the
+        decoding thread (and the LM pool) while the iterable produces the next
+        one, so decoding overlaps the forward pass for as long as the caller
+        keeps handing batches to the same stream.
+        """
+        pending = None
+        for context, logits, lengths in batches:
+            decoded = self.decode_thread.submit(self.decode_batch, logits, lengths, output_word_offsets)
+            if pending is not None:
+                yield pending[0], pending[1].result()
+            pending = context, decoded
+        if pending is not None:
+            yield pending[0], pending[1].result()
+
+    def submit_batch(self, audios, output_word_offsets=False):
+        """
+        Run one batch through the model now and decode it in the background.
+        Returns a concurrent.futures.Future of its transcriptions, so a caller
+        that transcribes batch by batch can start the next forward pass while
+        this batch decodes.
+        """
+        logits, lengths = self.forward(audios)
+        return self.decode_thread.submit(self.decode_batch, logits, lengths, output_word_offsets)
+
+    def transcribe_batch(self, audios, batch_size=8, output_word_offsets=False, logits_store=None, ids=None):
+        """
+        Transcribe a list of waveforms. Utterances are grouped by length so each
+        padded batch wastes as little compute as possible; results come back in
+        input order (as (transcript, words) pairs with output_word_offsets).
+        Each batch is decoded while the next one runs through the model. With
+        a logits_store, each utterance's logits are also saved under its id.
+        """
+        order = sorted(range(len(audios)), key=lambda i: len(audios[i]))
+        batches = ((batch, [audios[i] for i in batch], [ids[i] for i in batch] if ids else [])
+                   for batch in (order[start:start + batch_size] for start in range(0, len(order), batch_size)))
+        transcriptions = [None] * len(audios)
+        for batch, decoded in self.decode_stream(self.forward_stream(batches, logits_store), output_word_offsets):
+            for i, transcription in zip(batch, decoded):
+                transcriptions[i] = transcription
+        return transcriptions
+
+    @staticmethod
+    def pad_logits(logits_list):
+        """ Zero-pad per-utterance (frames, vocab) logits into one batch; returns the batch and the lengths. """
+        lengths = torch.tensor([len(logits) for logits in logits_list])
+        batch = torch.zeros(len(logits_list), int(lengths.max()), logits_list[0].shape[1])
+        for j, logits in enumerate(logits_list):
+            batch[j, :len(logits)] = torch.as_tensor(np.asarray(logits, dtype=np.float32))
+        return batch, lengths
+
+    def decode_stored(self, logits_store, ids, batch_size=8, output_word_offsets=False):
+        """
+        Decode the logits saved under ids in a LogitsStore, without running the
+        acoustic model. Like transcribe_batch, utterances are batched by length,
+        the next batch is read while the current one is decoded and results come
+        back in input order.
+        """
+        order = sorted(range(len(ids)), key=lambda i: logits_store.frames(ids[i]))
+        batches = ((batch, *self.pad_logits([logits_store.get(ids[i]) for i in batch]))
+                   for batch in (order[start:start + batch_size] for start in range(0, len(order), batch_size)))
+        transcriptions = [None] * len(ids)
+        for batch, decoded in self.decode_stream(batches, output_word_offsets):
+            for i, transcription in zip(batch, decoded):
+                transcriptions[i] = transcription
+        return transcriptions
+
+    def split_segments(self, audios, segments):
+        """
+        The (start, end) sample ranges of each waveform as separate pieces, and
+        for each piece the index of its waveform and its offset in seconds.
+        """
+        pieces, owners = [], []
+        for i, (audio, audio_segments) in enumerate(zip(audios, segments)):
+            for start, end in audio_segments:
+                pieces.append(audio[start:end])
+                owners.append((i, start / self.sample_rate))
+        return pieces, owners
+
+    def join_segments(self, n_audios, owners, transcriptions, output_word_offsets=False):
+        """
+        Join the transcripts of the pieces from split_segments per waveform,
+        shifting word times back onto the waveform's clock.
+        """
+        texts, words = [[] for _ in range(n_audios)], [[] for _ in range(n_audios)]
+        for (i, offset), transcription in zip(owners, transcriptions):
+            if output_word_offsets:
+                transcription, segment_words = transcription
+                words[i].extend({'word': word['word'], 'start': round(word['start'] + offset, 3),
+                                 'end': round(word['end'] + offset, 3)} for word in segment_words)
+            if transcription:
+                texts[i].append(transcription)
+
+        transcriptions = [" ".join(text) for text in texts]
+        return list(zip(transcriptions, words)) if output_word_offsets else transcriptions
+
+    def transcribe_segments(self, audios, segments, batch_size=8, output_word_offsets=False):
+        """
+        Transcribe only the given (start, end) sample ranges of each waveform
+        (e.g. the speech found by vad.speech_segments). The segments of all
+        recordings are batched together; their transcripts are joined per
+        recording and word times are shifted back onto the recording's clock.
+        """
+        pieces, owners = self.split_segments(audios, segments)
+        transcriptions = self.transcribe_batch(pieces, batch_size, output_word_offsets)
+        return self.join_segments(len(audios), owners, transcriptions, output_word_offsets)
+
+    def stream_audio(self, audio, chunk_length_s=30, stride_length_s=5):
+        """
+        Yield overlapping (window, left, right) chunks at self.sample_rate from a
+        file path or waveform. wav/flac files are read block by block, so the
+        whole recording is never held in memory.
+        """
+        if not isinstance(audio, str):
+            sr, pieces = self.sample_rate, [audio]
+        else:
+            sr = native_sample_rate(audio)
+            if sr is None:
+                # Formats libsndfile cannot read (e.g. m4a) are decoded by ffmpeg through a pipe
+                sr = self.sample_rate
+                pieces = iter_ffmpeg_blocks(audio, sr, int(chunk_length_s * sr))
+            else:
+                pieces = iter_file_blocks(audio, int(chunk_length_s * sr))
+        chunk_length, stride_length = int(chunk_length_s * sr), int(stride_length_s * sr)
+
+        for window, left, right in iter_windows(pieces, chunk_length, stride_length):
+            if sr != self.sample_rate:
+                # Resampling per window only disturbs the edges, which fall in the strides
+                window = librosa.resample(window, orig_sr=sr, target_sr=self.sample_rate)
+                left = int(round(left * self.sample_rate / sr))
+                right = int(round(right * self.sample_rate / sr))
+            yield window, left, right
+
+    def stream_logits(self, audio, chunk_length_s=30, stride_length_s=5, batch_size=1):
+        """
+        Logits of a recording of any length with memory bounded by the window
+        size. Each window is run through the model on its own, the logits of the
+        overlapping strides are dropped and the rest are stitched together.
+        """
+        ratio = self.config.inputs_to_logits_ratio
+        kept, batch = [], []
+
+        def flush():
+            logits, lengths = self.forward([window for window, _, _ in batch])
+            for i, (_, left, right) in enumerate(batch):
+                start = int(round(left / ratio))
+                end = int(lengths[i]) - int(round(right / ratio))
+                kept.append(logits[i, start:end].cpu())
+            batch.clear()
+
+        for chunk in self.stream_audio(audio, chunk_length_s, stride_length_s):
+            batch.append(chunk)
+            if len(batch) == batch_size:
+                flush()
+        if batch:
+            flush()
+        return torch.cat(kept)
+
+    def transcribe_long(self, audio, chunk_length_s=30, stride_length_s=5, batch_size=1, output_word_offsets=False,
+                        logits_store=None, utterance_id=None):
+        """
+        Transcribe one recording of any length from its stitched logits
+        (stream_logits), decoded once and saved under utterance_id in
+        logits_store, if given.
+        """
+        return self.transcribe_long_many([audio], chunk_length_s, stride_length_s, batch_size, output_word_offsets,
+                                         logits_store=logits_store, ids=[utterance_id])[0]
+
+    def transcribe_long_many(self, audios, chunk_length_s=30, stride_length_s=5, batch_size=1,
+                             output_word_offsets=False, decode_batch_size=8, logits_store=None, ids=None):
+        """
+        Transcribe recordings of any length window by window. The stitched
+        logits of decode_batch_size recordings are decoded together, so the LM
+        pool works on several recordings at once, while the next recordings are
+        streamed through the model.
+        """
+        def recordings():
+            for start in range(0, len(audios), decode_batch_size):
+                group = list(range(start, min(start + decode_batch_size, len(audios))))
+                stitched = [self.stream_logits(audios[i], chunk_length_s, stride_length_s, batch_size) for i in group]
+                if logits_store is not None:
+                    for i, logits in zip(group, stitched):
+                        logits_store.put(ids[i], logits.numpy())
+                yield (group, *self.pad_logits(stitched))
+
+        transcriptions = [None] * len(audios)
+        for group, decoded in self.decode_stream(recordings(), output_word_offsets):
+            for i, transcription in zip(group, decoded):
+                transcriptions[i] = transcription
+        return transcriptions
+
+    def close(self):
+        """ Shut down the LM decoding pool and the decoding thread. """
+        if self.decode_pool is not None:
+            self.decode_pool.terminate()
+            self.decode_pool.join()
+            self.decode_pool = None
+        self.decode_thread.shutdown()
 
     def get_input_file_info(self, input_path):
         with open(input_path, "rb") as file:
@@ -34,11 +350,12 @@ class ASR:
         return info.extension[0]
 
     def load_audio(self, audio_path):
-        audio, sr = librosa.load(audio_path, sr=self.sample_rate)
-        return audio
+        if self.audio_cache is not None:
+            return self.audio_cache.load(audio_path, self.sample_rate)
+        return decode_audio(audio_path, self.sample_rate)
 
-    def save_transcripts(self, transcript):
+    def save_transcripts(self, transcript, output_file_name=None):
         if not os.path.exists(self.output_path):
             os.makedirs(self.output_path)
-        with open(self.output_path+'/'+self.output_file_name, 'w') as fp:
+        with open(self.output_path+'/'+(output_file_name or self.output_file_name), 'w') as fp:
             fp.write(transcript)
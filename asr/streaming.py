@@ -0,0 +1,33 @@
+import numpy as np
+import soundfile as sf
+
+
+def iter_windows(pieces, chunk_length, stride_length):
+    """
+    Re-cut a stream of audio pieces into windows of chunk_length samples that
+    overlap their neighbours by 2 * stride_length. Yields (window, left, right)
+    where left/right are the number of samples at each edge that are shared
+    with the previous/next window and should be dropped after inference.
+    Only one window is buffered at a time.
+    """
+    step = chunk_length - 2 * stride_length
+    assert step > 0, "chunk length must be more than twice the stride length"
+    buffer = np.zeros(0, dtype=np.float32)
+    first = True
+    for piece in pieces:
+        buffer = np.concatenate([buffer, piece])
+        # Only emit a window once we know it is not the last one
+        while len(buffer) > chunk_length:
+            yield buffer[:chunk_length], (0 if first else stride_length), stride_length
+            buffer = buffer[step:]
+            first = False
+    if len(buffer) > 0:
+        yield buffer, (0 if first else stride_length), 0
+
+
+def iter_file_blocks(audio_path, block_length):
+    """ Read a file libsndfile understands (wav, flac, ogg) as mono float32 blocks. """
+    with sf.SoundFile(audio_path) as f:
+        for block in f.blocks(blocksize=block_length, dtype='float32', always_2d=True):
+            yield block.mean(axis=1)
+
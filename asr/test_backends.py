@@ -0,0 +1,47 @@
+import tempfile
+import unittest
+
+import torch
+from transformers import Wav2Vec2Config, Wav2Vec2ForCTC
+
+from backends import load_backend
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+
+class BackendsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        config = Wav2Vec2Config(vocab_size=32, hidden_size=64, num_hidden_layers=2, num_attention_heads=2,
+                                intermediate_size=128, conv_dim=(64,) * 7, num_conv_pos_embeddings=16,
+                                num_conv_pos_embedding_groups=4)
+        torch.manual_seed(0)
+        self.model = Wav2Vec2ForCTC(config).eval()
+        # Neither the 16000-sample example the model is converted with nor the 24000-sample check input
+        self.input_values = torch.randn(2, 20000)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assert_matches_eager(self, backend):
+        run = load_backend(self.model, backend, self.tmp.name, self.tmp.name)
+        with torch.no_grad():
+            expected = self.model(self.input_values).logits
+            actual = run(self.input_values)
+        self.assertEqual(expected.shape, actual.shape)
+        self.assertTrue(torch.allclose(expected, actual, atol=1e-4), f"{backend} differs from eager")
+
+    def test_torchscript_other_length(self):
+        self.assert_matches_eager('torchscript')
+
+    @unittest.skipIf(onnxruntime is None, "onnxruntime is not installed")
+    def test_onnx_other_length(self):
+        self.assert_matches_eager('onnx')
+
+
+if __name__ == '__main__':
+    unittest.main()
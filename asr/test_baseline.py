@@ -0,0 +1,17 @@
+import unittest
+
+from audio import real_time_factor
+from baseline import WERAccumulator
+
+
+class BaselineTestCase(unittest.TestCase):
+
+    def test_no_files(self):
+        # An empty split must report, not divide by zero
+        self.assertEqual(0.0, WERAccumulator().wer)
+        self.assertEqual(0.0, real_time_factor(3.0, 0.0))
+        self.assertEqual(0.5, real_time_factor(3.0, 6.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
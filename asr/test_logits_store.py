@@ -0,0 +1,51 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from logits_store import LogitsStore
+
+
+class LogitsStoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = os.path.join(self.tmp.name, 'logits')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_put_get(self):
+        store = LogitsStore(self.root, {'model': 'm'})
+        store.put('a', np.full((3, 4), 1.5))
+        store.put('b', np.full((2, 4), -2.0))
+        np.testing.assert_array_equal(np.full((3, 4), 1.5), store.get('a'))
+        store.close()
+
+        store = LogitsStore(self.root)
+        self.assertEqual(2, len(store))
+        self.assertEqual(2, store.frames('b'))
+        self.assertEqual(np.float16, store.get('b').dtype)
+        np.testing.assert_array_equal(np.full((2, 4), -2.0), store.get('b'))
+        with self.assertRaises(ValueError):
+            LogitsStore(self.root, {'model': 'other'})
+
+    def test_interrupted_write(self):
+        store = LogitsStore(self.root)
+        store.put('a', np.full((3, 4), 1.0))
+        store.close()
+        # A write cut off mid-row leaves stray bytes after the last complete row
+        with open(store.data_path, 'ab') as fp:
+            fp.write(b'\x01\x02\x03')
+
+        store = LogitsStore(self.root)
+        store.put('b', np.full((2, 4), 7.0))
+        store.close()
+        store = LogitsStore(self.root)
+        np.testing.assert_array_equal(np.full((3, 4), 1.0), store.get('a'))
+        np.testing.assert_array_equal(np.full((2, 4), 7.0), store.get('b'))
+
+
+if __name__ == '__main__':
+    unittest.main()
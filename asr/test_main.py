@@ -0,0 +1,65 @@
+import os
+import argparse
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import soundfile as sf
+
+import main
+
+
+class FakeASR():
+    """ Stands in for model.ASR: every recording decodes to no samples and an empty transcript. """
+
+    def __init__(self, *args, **kwargs):
+        self.timings = {'forward': 0.0, 'decode': 0.0}
+
+    def get_input_file_info(self, input_audio):
+        pass
+
+    def load_audio(self, input_audio):
+        return np.zeros(0, dtype=np.float32)
+
+    def transcribe_batch(self, audios, batch_size=8, output_word_offsets=False, logits_store=None, ids=None):
+        return [''] * len(audios)
+
+    def close(self):
+        pass
+
+
+def arguments(input_audio, output_path):
+    return argparse.Namespace(
+        input_audio=input_audio, output_path=output_path, model='model', processor='processor', sr=16000,
+        use_lm=False, use_gpu=False, batch_size=8, chunk_length_s=0, stride_length_s=5, cache_dir=None,
+        transcript_cache=None, cache_max_mb=1024, word_offsets=False, offsets_format='parquet', min_pause=0.25,
+        backend='torch', backend_cache='backend_cache', num_threads=None, decode_workers=None, beam_width=None,
+        beam_prune_logp=None, lm_alpha=None, lm_beta=None, save_logits=None, from_logits=None, vad=False,
+        vad_threshold_db=12.0, vad_max_flatness=0.5, vad_pad_s=0.2)
+
+
+class MainTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.output_path = os.path.join(self.tmp.name, 'transcripts')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_no_audio(self):
+        # A directory without recordings, then a recording without samples: no real-time factor to divide out
+        main.main(arguments([self.tmp.name], self.output_path))
+        self.assertEqual([], os.listdir(self.output_path))
+
+        empty = os.path.join(self.tmp.name, 'empty.wav')
+        sf.write(empty, np.zeros(0, dtype=np.float32), 16000)
+        with mock.patch('model.ASR', FakeASR):
+            main.main(arguments([self.tmp.name], self.output_path))
+        with open(os.path.join(self.output_path, 'empty.txt')) as fp:
+            self.assertEqual('', fp.read())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+import torch
+
+from model import ASR
+from transformers import Wav2Vec2ProcessorWithLM
+
+
+class FakeDecoder:
+    """ Mimics pyctcdecode: the LM (here just its weights) lives in a class-level container. """
+    model_container = {'lm': {'alpha': 0.5, 'beta': 1.5}}
+
+    def reset_params(self, alpha=None, beta=None):
+        params = FakeDecoder.model_container['lm']
+        params.update({name: value for name, value in [('alpha', alpha), ('beta', beta)] if value is not None})
+
+
+def decode_one(_):
+    params = FakeDecoder.model_container['lm']
+    return f"alpha {params['alpha']} beta {params['beta']}"
+
+
+class FakeProcessorWithLM:
+    """
+    Like Wav2Vec2ProcessorWithLM.batch_decode: alpha/beta are applied in the
+    calling process only. The signature is that of the pinned transformers
+    release (4.24.0), so a keyword it does not take fails here too.
+    """
+
+    def __init__(self):
+        self.decoder = FakeDecoder()
+
+    def batch_decode(self, logits, pool=None, num_processes=None, beam_width=None, beam_prune_logp=None,
+                     token_min_logp=None, hotwords=None, hotword_weight=None, alpha=None, beta=None,
+                     unk_score_offset=None, lm_score_boundary=None, output_word_offsets=False):
+        self.decoder.reset_params(alpha, beta)
+        return SimpleNamespace(text=pool.map(decode_one, range(len(logits))))
+
+
+class DecodePoolTestCase(unittest.TestCase):
+
+    def setUp(self):
+        FakeDecoder.model_container['lm'] = {'alpha': 0.5, 'beta': 1.5}
+
+    def test_workers_use_lm_weights(self):
+        asr = ASR.__new__(ASR)
+        asr.use_lm, asr.beam_options, asr.timings = True, {}, {'forward': 0.0, 'decode': 0.0}
+        asr.processor = FakeProcessorWithLM()
+        asr.start_decode_pool(2, alpha=0.9, beta=0.1)
+        try:
+            transcriptions = asr.decode_batch(torch.from_numpy(np.zeros((3, 5, 4), dtype=np.float32)))
+        finally:
+            asr.decode_pool.terminate()
+        self.assertEqual(["alpha 0.9 beta 0.1"] * 3, transcriptions)
+
+    def test_decode_batch_matches_installed_processor(self):
+        # The installed Wav2Vec2ProcessorWithLM must take every keyword decode_batch passes (pool= needs >= 4.24)
+        asr = ASR.__new__(ASR)
+        asr.use_lm, asr.decode_pool, asr.timings = True, mock.sentinel.pool, {'forward': 0.0, 'decode': 0.0}
+        asr.beam_options = {'beam_width': 10, 'beam_prune_logp': -10.0, 'token_min_logp': -5.0}
+        asr.processor = mock.create_autospec(Wav2Vec2ProcessorWithLM, instance=True)
+        asr.processor.batch_decode.return_value = SimpleNamespace(text=["A", "B"])
+
+        self.assertEqual(["a", "b"], asr.decode_batch(torch.zeros(2, 5, 4), torch.tensor([5, 3])))
+        self.assertIs(mock.sentinel.pool, asr.processor.batch_decode.call_args.kwargs['pool'])
+
+
+if __name__ == '__main__':
+    unittest.main()
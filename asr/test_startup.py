@@ -0,0 +1,35 @@
+import os
+import sys
+import subprocess
+import unittest
+
+ASR_DIR = os.path.dirname(os.path.abspath(__file__))
+HEAVY = ['torch', 'transformers', 'librosa', 'pandas', 'onnxruntime', 'pyctcdecode']
+
+
+def import_in_subprocess(statement):
+    """ Seconds taken by statement in a fresh interpreter, and the top-level packages it loaded. """
+    code = ("import sys, time\n"
+            "start = time.perf_counter()\n"
+            f"{statement}\n"
+            "print(time.perf_counter() - start)\n"
+            "print(' '.join(sorted({name.split('.')[0] for name in sys.modules})))")
+    output = subprocess.run([sys.executable, '-c', code], cwd=ASR_DIR, check=True,
+                            capture_output=True, text=True).stdout.splitlines()
+    return float(output[-2]), set(output[-1].split())
+
+
+class StartupTestCase(unittest.TestCase):
+
+    def test_main_imports_no_models(self):
+        seconds, modules = import_in_subprocess("import main")
+        self.assertFalse(modules & set(HEAVY))
+        self.assertLess(seconds, 1.5, f"import main took {seconds:.2f}s")
+
+    def test_backends_list_imports_no_torch(self):
+        _, modules = import_in_subprocess("from backends import BACKENDS")
+        self.assertFalse(modules & set(HEAVY))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import json
+
+import numpy as np
+
+# Hesitation tokens counted as filled pauses
+FILLED_PAUSES = {'uh', 'um', 'uhm', 'umm', 'er', 'erm', 'ah', 'eh', 'hm', 'hmm', 'mm', 'mhm'}
+
+
+def offsets_to_words(word_offsets, seconds_per_frame):
+    """ Convert decoder word offsets (in logit frames) to [{'word', 'start', 'end'}, ...] in seconds. """
+    return [{'word': offset['word'].lower(),
+             'start': round(float(offset['start_offset'] * seconds_per_frame), 3),
+             'end': round(float(offset['end_offset'] * seconds_per_frame), 3)} for offset in word_offsets]
+
+
+def pause_statistics(words, duration=None, min_pause=0.25, long_pause=2.0):
+    """
+    Pause, speech-rate and filled-pause statistics from word timestamps.
+    Gaps between consecutive words of at least min_pause seconds count as
+    pauses; duration (seconds) defaults to the span from the first to the
+    last word.
+    """
+    starts = np.array([w['start'] for w in words], dtype=np.float64)
+    ends = np.array([w['end'] for w in words], dtype=np.float64)
+    filled = np.array([w['word'] in FILLED_PAUSES for w in words], dtype=bool)
+
+    if duration is None:
+        duration = float(ends[-1] - starts[0]) if len(words) else 0.0
+    gaps = starts[1:] - ends[:-1]
+    pauses = gaps[gaps >= min_pause]
+    speech_time = float(np.sum(ends - starts))
+    minutes = duration / 60
+
+    return {
+        'words': len(words),
+        'duration': duration,
+        'speech_time': speech_time,
+        'speech_rate': len(words) / minutes if minutes else 0.0,
+        'articulation_rate': len(words) / speech_time if speech_time else 0.0,
+        'pause_count': int(pauses.size),
+        'pause_time': float(pauses.sum()),
+        'pause_mean': float(pauses.mean()) if pauses.size else 0.0,
+        'pause_median': float(np.median(pauses)) if pauses.size else 0.0,
+        'pause_max': float(pauses.max()) if pauses.size else 0.0,
+        'long_pause_count': int(np.count_nonzero(pauses >= long_pause)),
+        'pause_rate': pauses.size / minutes if minutes else 0.0,
+        'pause_ratio': float(pauses.sum()) / duration if duration else 0.0,
+        'filled_pause_count': int(filled.sum()),
+        'filled_pause_rate': int(filled.sum()) / minutes if minutes else 0.0,
+    }
+
+
+def write_words(words, path):
+    """ Write word timestamps as a word/start/end table: Parquet for .parquet paths, else CSV. """
+    import pandas as pd
+
+    table = pd.DataFrame(words, columns=['word', 'start', 'end'])
+    if path.endswith('.parquet'):
+        table.to_parquet(path, index=False)
+    else:
+        table.to_csv(path, index=False)
+
+
+def write_statistics(statistics, path):
+    with open(path, 'w') as fp:
+        json.dump(statistics, fp, indent=2)
@@ -0,0 +1,113 @@
+import numpy as np
+
+# Analysis frames: 25 ms windows every 10 ms
+FRAME_S = 0.025
+HOP_S = 0.010
+# Frames whose spectra are analysed together, bounding the memory of the FFT
+FFT_BLOCK_FRAMES = 4096
+
+
+def frame_energy(audio, sample_rate):
+    """ Log energy (dB) of every analysis frame, from a running sum of squares (no frame copies). """
+    frame, hop = int(FRAME_S * sample_rate), int(HOP_S * sample_rate)
+    if len(audio) < frame:
+        return np.zeros(0)
+    power = np.concatenate([[0.0], np.cumsum(np.square(audio, dtype=np.float64))])
+    starts = np.arange(0, len(audio) - frame + 1, hop)
+    energy = (power[starts + frame] - power[starts]) / frame
+    return 10 * np.log10(energy + 1e-10)
+
+
+def spectral_flatness(audio, sample_rate):
+    """
+    Spectral flatness (geometric over arithmetic mean of the power spectrum)
+    of every analysis frame: near 1 for noise, low for voiced speech.
+    """
+    frame, hop = int(FRAME_S * sample_rate), int(HOP_S * sample_rate)
+    if len(audio) < frame:
+        return np.zeros(0)
+    frames = np.lib.stride_tricks.sliding_window_view(audio.astype(np.float32), frame)[::hop]
+    window = np.hanning(frame).astype(np.float32)
+    flatness = np.empty(len(frames))
+    for start in range(0, len(frames), FFT_BLOCK_FRAMES):
+        spectrum = np.abs(np.fft.rfft(frames[start:start + FFT_BLOCK_FRAMES] * window, axis=1)) ** 2 + 1e-10
+        flatness[start:start + FFT_BLOCK_FRAMES] = (np.exp(np.mean(np.log(spectrum), axis=1))
+                                                    / np.mean(spectrum, axis=1))
+    return flatness
+
+
+def _runs(mask):
+    """ (start, end) frame indices of the runs of True in a boolean array. """
+    edges = np.diff(np.concatenate([[0], mask.astype(np.int8), [0]]))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def speech_segments(audio, sample_rate, threshold_db=12.0, max_flatness=0.5, min_silence=0.25,
+                    min_speech=0.1):
+    """
+    Speech regions of a waveform as [(start, end), ...] in samples. A frame
+    is speech when its energy is threshold_db above the noise floor (10th
+    percentile of the frame energies) and its spectrum is not noise-like
+    (flatness below max_flatness), or when it is a further 10 dB louder
+    whatever its spectrum (fricatives). Regions closer than min_silence
+    seconds are merged and regions shorter than min_speech are dropped.
+    """
+    energy = frame_energy(audio, sample_rate)
+    if energy.size == 0:
+        return []
+    floor = np.percentile(energy, 10)
+    loud = energy > max(floor + threshold_db, -60.0)
+    speech = loud & ((spectral_flatness(audio, sample_rate) < max_flatness) | (energy > floor + threshold_db + 10))
+
+    hop, frame = int(HOP_S * sample_rate), int(FRAME_S * sample_rate)
+    starts, ends = _runs(speech)
+    if starts.size == 0:
+        return []
+    # Merge regions separated by less than min_silence, then drop the short ones
+    starts_s, ends_s = starts * hop, (ends - 1) * hop + frame
+    keep = np.concatenate([[True], starts_s[1:] - ends_s[:-1] >= min_silence * sample_rate])
+    starts_s, ends_s = starts_s[keep], ends_s[np.concatenate([keep[1:], [True]])]
+    long_enough = ends_s - starts_s >= min_speech * sample_rate
+    return [(int(start), int(min(end, len(audio)))) for start, end in zip(starts_s[long_enough], ends_s[long_enough])]
+
+
+def pad_segments(segments, pad, n_samples):
+    """ Widen every segment by pad samples on each side, merging the ones that then overlap. """
+    padded = []
+    for start, end in segments:
+        start, end = max(start - pad, 0), min(end + pad, n_samples)
+        if padded and start <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], end)
+        else:
+            padded.append((start, end))
+    return padded
+
+
+def silence_statistics(segments, sample_rate, duration, min_pause=0.25, long_pause=2.0):
+    """
+    Silence and pause statistics from the speech segments found by
+    speech_segments(). Gaps between segments of at least min_pause seconds
+    are pauses; silence before the first and after the last segment is
+    reported separately.
+    """
+    bounds = np.array(segments, dtype=np.float64).reshape(-1, 2) / sample_rate
+    starts, ends = bounds[:, 0], bounds[:, 1]
+    gaps = starts[1:] - ends[:-1]
+    pauses = gaps[gaps >= min_pause]
+    speech_time = float(np.sum(ends - starts))
+
+    return {
+        'speech_segments': len(segments),
+        'duration': duration,
+        'speech_time': speech_time,
+        'silence_time': duration - speech_time,
+        'silence_ratio': (duration - speech_time) / duration if duration else 0.0,
+        'leading_silence': float(starts[0]) if len(segments) else duration,
+        'trailing_silence': float(duration - ends[-1]) if len(segments) else 0.0,
+        'pause_count': int(pauses.size),
+        'pause_time': float(pauses.sum()),
+        'pause_mean': float(pauses.mean()) if pauses.size else 0.0,
+        'pause_median': float(np.median(pauses)) if pauses.size else 0.0,
+        'pause_max': float(pauses.max()) if pauses.size else 0.0,
+        'long_pause_count': int(np.count_nonzero(pauses >= long_pause)),
+    }
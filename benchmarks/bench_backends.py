@@ -0,0 +1,71 @@
+import os
+import sys
+import argparse
+import json
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'asr'))
+
+from backends import BACKENDS
+
+
+def evaluate(args, backend):
+    """ WER and real-time factor of one backend on the split, using the baseline harness. """
+    from audio import real_time_factor
+    from baseline import ASRBaseline
+
+    baseline = ASRBaseline(args.input_dir, args.split, 16000, args.model, args.processor, args.use_lm, False,
+                           args.num_threads, backend, args.backend_cache)
+    start = time.perf_counter()
+    accumulator, timings = baseline.evaluate(args.batch_size, args.io_workers, args.prefetch)
+    elapsed = time.perf_counter() - start
+    return {'backend': backend, 'wer': accumulator.wer, 'utterances': accumulator.utterances,
+            'audio_seconds': timings['audio_seconds'], 'inference_seconds': timings['inference'],
+            'rtf': real_time_factor(elapsed, timings['audio_seconds'])}
+
+
+def main(args):
+    stand_in = args.model is None
+    if stand_in:
+        from stand_in import tiny_wav2vec2
+
+        args.model = args.processor = tiny_wav2vec2()
+        print(f"No --model given; using an untrained stand-in at {args.model}. WERs are meaningless, "
+              f"only the timings and the WER deltas between backends are informative.")
+
+    results = [evaluate(args, backend) for backend in args.backends]
+    reference = results[0]
+    print(f"\n{'backend':<12} {'WER':>8} {'dWER':>8} {'RTF':>8} {'speedup':>8}")
+    for r in results:
+        r['wer_delta'] = r['wer'] - reference['wer']
+        r['speedup'] = reference['inference_seconds'] / r['inference_seconds']
+        r['within_tolerance'] = abs(r['wer_delta']) <= args.tolerance
+        flag = '' if r['within_tolerance'] else '  (WER outside tolerance)'
+        print(f"{r['backend']:<12} {r['wer']:>8.4f} {r['wer_delta']:>+8.4f} {r['rtf']:>8.3f} "
+              f"{r['speedup']:>7.2f}x{flag}")
+
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump({'split': args.split, 'model': args.model, 'stand_in': stand_in,
+                       'num_threads': args.num_threads, 'batch_size': args.batch_size, 'results': results},
+                      fp, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="WER vs. speed of the CPU inference backends on LibriSpeech.")
+    parser.add_argument('input_dir', type=str, help="LibriSpeech directory, as for asr/baseline.py")
+    parser.add_argument('--split', type=str, default='test-clean')
+    parser.add_argument('--model', type=str, default=None, help="Defaults to a tiny untrained stand-in.")
+    parser.add_argument('--processor', type=str, default=None)
+    parser.add_argument('--use_lm', type=bool, default=False)
+    parser.add_argument('--backends', type=str, nargs='+', default=BACKENDS, choices=BACKENDS,
+                        help="The first backend is the reference for WER deltas and speedups.")
+    parser.add_argument('--backend_cache', type=str, default='backend_cache')
+    parser.add_argument('--tolerance', type=float, default=0.005, help="Allowed absolute WER difference.")
+    parser.add_argument('--batch_size', type=int, default=8)
+    parser.add_argument('--num_threads', type=int, default=None)
+    parser.add_argument('--io_workers', type=int, default=4)
+    parser.add_argument('--prefetch', type=int, default=4)
+    parser.add_argument('--output', type=str, default=None, help="Write the results as JSON.")
+    main(parser.parse_args())
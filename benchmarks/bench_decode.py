@@ -0,0 +1,87 @@
+import os
+import sys
+import argparse
+import json
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'asr'))
+
+
+def utterance_logits(asr, utterances, seconds, seed=0):
+    """ Logits of synthetic utterances, computed once and shared by every decoder setting. """
+    rng = np.random.default_rng(seed)
+    audios = [rng.standard_normal(int(16000 * s)).astype(np.float32) * 0.1
+              for s in rng.uniform(0.5 * seconds, 1.5 * seconds, utterances)]
+    logits = []
+    for audio in audios:
+        utterance, lengths = asr.forward([audio])
+        logits.append(utterance[0, :lengths[0]].cpu())
+    return logits, sum(len(audio) for audio in audios) / 16000
+
+
+def time_decode(asr, logits, batch_size):
+    """ Seconds to decode every utterance, batch by batch through the pool. """
+    start = time.perf_counter()
+    for i in range(0, len(logits), batch_size):
+        asr.decode_batch(*asr.pad_logits(logits[i:i + batch_size]))
+    return time.perf_counter() - start
+
+
+def main(args):
+    from model import ASR
+
+    stand_in = args.model is None
+    if stand_in:
+        from stand_in import tiny_wav2vec2
+
+        args.model = args.processor = tiny_wav2vec2()
+        print(f"No --model given; using an untrained stand-in at {args.model} with beam search but no KenLM. "
+              f"Its near-uniform logits make beams expensive, so keep --beam_width small.")
+    asr = ASR(16000, args.model, args.processor, not stand_in, None, None, num_threads=args.num_threads,
+              decode_workers=1, beam_width=args.beam_width)
+    if stand_in:
+        from stand_in import use_beam_search_without_lm
+
+        use_beam_search_without_lm(asr, 1)
+
+    logits, audio_seconds = utterance_logits(asr, args.utterances, args.seconds)
+    print(f"{os.cpu_count()} CPU(s); decoding {len(logits)} utterances ({audio_seconds:.0f}s of audio), "
+          f"beam width {args.beam_width}")
+
+    results = []
+    for workers in args.workers:
+        asr.decode_pool.terminate()
+        asr.start_decode_pool(workers)
+        seconds = time_decode(asr, logits, args.batch_size)
+        results.append({'workers': workers, 'seconds': seconds, 'utterances_per_s': len(logits) / seconds})
+
+    print(f"\n{'workers':>8} {'decode (s)':>11} {'utt/s':>8} {'speedup':>8}")
+    for r in results:
+        r['speedup'] = results[0]['seconds'] / r['seconds']
+        print(f"{r['workers']:>8} {r['seconds']:>11.2f} {r['utterances_per_s']:>8.2f} {r['speedup']:>7.2f}x")
+    if max(args.workers) > os.cpu_count():
+        print(f"Runs with more workers than the {os.cpu_count()} CPU(s) here cannot speed up.")
+    asr.close()
+
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump({'model': args.model, 'stand_in': stand_in, 'cpus': os.cpu_count(),
+                       'beam_width': args.beam_width, 'audio_seconds': audio_seconds, 'results': results},
+                      fp, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Beam-search decoding throughput vs. the number of pool workers.")
+    parser.add_argument('--model', type=str, default=None, help="Defaults to a tiny untrained stand-in.")
+    parser.add_argument('--processor', type=str, default=None, help="Processor with a language model.")
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, 2, 4, os.cpu_count()}))
+    parser.add_argument('--beam_width', type=int, default=10)
+    parser.add_argument('--utterances', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=2.0, help="Mean utterance length.")
+    parser.add_argument('--batch_size', type=int, default=8)
+    parser.add_argument('--num_threads', type=int, default=None)
+    parser.add_argument('--output', type=str, default=None, help="Write the results as JSON.")
+    main(parser.parse_args())
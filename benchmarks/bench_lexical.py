@@ -0,0 +1,69 @@
+import os
+import sys
+import argparse
+import contextlib
+import io
+import time
+
+import numpy as np
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'language'))
+
+from bench_pipeline import synthetic_transcript
+from stand_in_language import StandInPunctuation, use_nltk_stand_ins_if_missing
+
+MEASURES = ['Type to token ratio: Lemmatized text', 'Type to token ratio', 'honore_statistics',
+            'Automatic Readability Index', 'brunet_index', 'Coleman Liau\'s index']
+
+
+def synthetic_corpus(n_texts, words):
+    """ Punctuated transcripts of varying length, so that every readability index is defined. """
+    punctuation = StandInPunctuation()
+    texts = [synthetic_transcript(words // 2 + (i * 7919) % words, seed=i) for i in range(n_texts)]
+    return punctuation.add_punctuation_capitalization(texts)
+
+
+def main(args):
+    from lexical_complexity import LexicalComplexity
+    from lexical_corpus import LexicalCorpus
+
+    use_nltk_stand_ins_if_missing()
+    complexity = LexicalComplexity()
+    print(f"{'texts':>7} {'loop':>9} {'corpus':>9} {'speedup':>8} {'loop measures':>14} {'matrices':>9} "
+          f"{'speedup':>8} {'max diff':>9}")
+    for n_texts in args.texts:
+        texts = synthetic_corpus(n_texts, args.words)
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            looped = np.array([complexity.get_lexical_measures(text) for text in texts])
+        loop_seconds = time.perf_counter() - start
+
+        # The measures alone, from texts that are already tokenized, tagged and lemmatized
+        analyses = [complexity.analyze(text) for text in texts]
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            for analysis in analyses:
+                complexity.get_lexical_measures(analysis)
+        loop_measures_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        corpus = LexicalCorpus(texts)
+        built = time.perf_counter()
+        table = corpus.measures()
+        corpus_seconds = time.perf_counter() - start
+        # Time spent on the array operations alone, after tokenizing and tagging
+        matrix_seconds = time.perf_counter() - built
+
+        diff = np.nanmax(np.abs(table[MEASURES].to_numpy() - looped))
+        print(f"{n_texts:>7} {loop_seconds:>8.2f}s {corpus_seconds:>8.2f}s {loop_seconds / corpus_seconds:>7.1f}x "
+              f"{loop_measures_seconds:>13.3f}s {matrix_seconds:>8.3f}s "
+              f"{loop_measures_seconds / matrix_seconds:>7.1f}x {diff:>9.1e}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="LexicalCorpus vs. looping get_lexical_measures.")
+    parser.add_argument('--texts', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--words', type=int, default=200, help="Typical transcript length in words.")
+    main(parser.parse_args())
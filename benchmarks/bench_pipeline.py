@@ -0,0 +1,177 @@
+import os
+import sys
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import statistics
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'asr'))
+sys.path.insert(0, os.path.join(BENCH_DIR, '..', 'language'))
+
+VOCABULARY = ("the a my her his we they she he it was is are went saw took made little boy girl mother cookie jar "
+              "stool kitchen sink water window plate dish curtain falling reaching washing overflowing standing "
+              "and but so then because when while outside inside on off up down over under").split()
+
+
+def synthetic_transcript(n_words, seed=0):
+    """ Lowercase, unpunctuated text shaped like a raw ASR transcript. """
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCABULARY) for _ in range(n_words))
+
+
+def synthetic_recording(path, seconds, sr=44100, seed=0):
+    """ Amplitude-modulated tone plus noise at a non-model sample rate so loading includes resampling. """
+    rng = np.random.RandomState(seed)
+    t = np.arange(int(seconds * sr)) / sr
+    audio = np.sin(2 * np.pi * 180 * t) * np.abs(np.sin(2 * np.pi * 0.7 * t)) + 0.05 * rng.randn(len(t))
+    sf.write(path, audio.astype(np.float32), sr, subtype='FLOAT')
+
+
+def timed(fn, repeats):
+    """
+    Run fn once to warm up, then repeats times with its stdout silenced.
+    Returns the median and min seconds and the last result.
+    """
+    times = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn()
+    for _ in range(repeats):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = fn()
+            times.append(time.perf_counter() - start)
+    return statistics.median(times), min(times), result
+
+
+def record(results, stage, size, unit, median, fastest, repeats):
+    results.append({'stage': stage, 'size': size, 'unit': unit, 'seconds': median, 'min_seconds': fastest,
+                    'seconds_per_unit': median / size, 'repeats': repeats})
+    print("{:<20} {:>8} {:<8} {:>10.4f}s {:>12.2e}s/{}".format(stage, size, unit, median, median / size, unit))
+
+
+def bench_asr(args, results, stand_ins, environment):
+    import torch
+    from model import ASR
+
+    model = args.model
+    stand_ins['wav2vec2'] = model is None
+    if model is None:
+        from stand_in import tiny_wav2vec2
+        model = tiny_wav2vec2()
+    with contextlib.redirect_stdout(io.StringIO()):
+        asr = ASR(args.sr, model, args.processor or model, args.use_lm, None, None, num_threads=args.num_threads)
+    environment['torch'] = torch.__version__
+    environment['torch_threads'] = torch.get_num_threads()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for seconds in args.audio_seconds:
+            path = os.path.join(tmp, f'{seconds}s.wav')
+            synthetic_recording(path, seconds)
+
+            median, fastest, audio = timed(lambda: asr.load_audio(path), args.repeats)
+            record(results, 'audio_load', seconds, 'second', median, fastest, args.repeats)
+
+            median, fastest, (logits, _) = timed(lambda: asr.forward([audio]), args.repeats)
+            record(results, 'asr_forward', seconds, 'second', median, fastest, args.repeats)
+
+            median, fastest, _ = timed(lambda: asr.decode(logits), args.repeats)
+            record(results, 'asr_decode', seconds, 'second', median, fastest, args.repeats)
+
+
+def bench_language(args, results, stand_ins):
+    from stand_in_language import OfflineLanguagePipeline, use_nltk_stand_ins_if_missing
+
+    pipeline = OfflineLanguagePipeline()
+    pipeline.load()
+    stand_ins.update(pipeline.stand_ins)
+    stand_ins['nltk'] = use_nltk_stand_ins_if_missing()
+
+    for words in args.text_words:
+        text = synthetic_transcript(words)
+
+        median, fastest, refined_text = timed(lambda: str(pipeline.punctuate(text, args.spell_check)), args.repeats)
+        record(results, 'punctuation', words, 'word', median, fastest, args.repeats)
+
+        median, fastest, parse = timed(lambda: pipeline.parse(refined_text), args.repeats)
+        record(results, 'constituency_parse', words, 'word', median, fastest, args.repeats)
+
+        median, fastest, _ = timed(lambda: pipeline.syntactic.sentence_complexity(
+            parse['trees'], parse['heads']), args.repeats)
+        record(results, 'syntactic', words, 'word', median, fastest, args.repeats)
+
+        median, fastest, _ = timed(lambda: pipeline.lexical.get_lexical_measures(refined_text), args.repeats)
+        record(results, 'lexical', words, 'word', median, fastest, args.repeats)
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCH_DIR, capture_output=True,
+                              text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def compare(current, baseline_path):
+    """ Print the ratio of current to baseline median time for every stage/size in both runs. """
+    with open(baseline_path) as fp:
+        baseline = json.load(fp)
+    previous = {(r['stage'], r['size']): r['seconds'] for r in baseline['results']}
+    print(f"\nCompared with {baseline.get('commit')} ({baseline_path}); < 1.0 is faster")
+    for r in current['results']:
+        key = (r['stage'], r['size'])
+        if key in previous and previous[key] > 0:
+            print("{:<20} {:>8} {:>8.2f}x".format(r['stage'], r['size'], r['seconds'] / previous[key]))
+    if baseline.get('stand_ins') != current['stand_ins']:
+        print("Warning: the two runs used different stand-in models:", baseline.get('stand_ins'),
+              current['stand_ins'])
+
+
+def main(args):
+    results, stand_ins = [], {}
+    environment = {'python': platform.python_version(), 'cpu_count': os.cpu_count()}
+    if 'asr' in args.stages:
+        bench_asr(args, results, stand_ins, environment)
+    if 'language' in args.stages:
+        bench_language(args, results, stand_ins)
+
+    output = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': environment,
+        'stand_ins': stand_ins,
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump(output, fp, indent=2)
+        print(f"\nWrote {args.output}")
+    if args.compare:
+        compare(output, args.compare)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Per-stage timings of the audio -> transcript -> measures pipeline')
+    parser.add_argument('--stages', nargs='+', default=['asr', 'language'], choices=['asr', 'language'])
+    parser.add_argument('--audio_seconds', type=float, nargs='+', default=[5, 30, 120])
+    parser.add_argument('--text_words', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--model', type=str, default=None, help="Wav2Vec2 checkpoint; defaults to a tiny stand-in.")
+    parser.add_argument('--processor', type=str, default=None)
+    parser.add_argument('--use_lm', action='store_true')
+    parser.add_argument('--spell_check', action='store_true')
+    parser.add_argument('--sr', type=int, default=16000)
+    parser.add_argument('--num_threads', type=int, default=None)
+    parser.add_argument('--output', type=str, default=None, help="Write results as JSON here.")
+    parser.add_argument('--compare', type=str, default=None, help="Earlier JSON results to compare against.")
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,106 @@
+import os
+import sys
+import argparse
+import json
+import resource
+import subprocess
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'asr'))
+
+SAMPLE_RATE = 16000
+
+
+def write_synthetic_recording(path, minutes, sr=SAMPLE_RATE, block_s=60):
+    """ Speech-like amplitude-modulated tones plus noise, written block by block. """
+    rng = np.random.RandomState(0)
+    with sf.SoundFile(path, 'w', samplerate=sr, channels=1, subtype='FLOAT') as f:
+        for start in range(0, int(minutes * 60), block_s):
+            t = np.arange(int(block_s * sr)) / sr + start
+            block = np.sin(2 * np.pi * 180 * t) * np.abs(np.sin(2 * np.pi * 0.7 * t)) + 0.05 * rng.randn(len(t))
+            f.write(block.astype(np.float32))
+
+
+def run_worker(args):
+    """ Transcribe one file in this process and report time and peak RSS as JSON. """
+    from model import ASR
+
+    asr = ASR(SAMPLE_RATE, args.model, args.processor, False, None, None, num_threads=args.num_threads)
+    start = time.perf_counter()
+    if args.mode == 'stream':
+        transcription = asr.transcribe_long(args.audio, args.chunk_length_s, args.stride_length_s)
+    else:
+        audio = asr.load_audio(args.audio)
+        logits, _ = asr.forward([audio])
+        transcription = asr.decode(logits)
+    elapsed = time.perf_counter() - start
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({'seconds': elapsed, 'peak_rss_mb': peak_mb, 'transcription': transcription}))
+
+
+def measure(args, mode, audio_path):
+    command = [sys.executable, os.path.abspath(__file__), '--worker', '--mode', mode, '--audio', audio_path,
+               '--model', args.model, '--processor', args.processor,
+               '--chunk_length_s', str(args.chunk_length_s), '--stride_length_s', str(args.stride_length_s)]
+    if args.num_threads:
+        command += ['--num_threads', str(args.num_threads)]
+    output = subprocess.run(command, capture_output=True, text=True)
+    if output.returncode != 0:
+        return None
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def main(args):
+    from jiwer import cer
+
+    if args.model is None:
+        from stand_in import tiny_wav2vec2
+        args.model = args.processor = tiny_wav2vec2()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        print("{:>8} {:>8} {:>10} {:>8} {:>14} {:>10}".format("minutes", "mode", "seconds", "RTF", "peak RSS (MB)",
+                                                             "CER vs full"))
+        for minutes in args.minutes:
+            audio_path = os.path.join(tmp, f'{minutes}min.wav')
+            write_synthetic_recording(audio_path, minutes)
+            stream = measure(args, 'stream', audio_path)
+            full = measure(args, 'full', audio_path) if minutes <= args.full_max else None
+            for mode, result in [('stream', stream), ('full', full)]:
+                if result is None:
+                    continue
+                difference = cer(full['transcription'], stream['transcription']) if full and stream else None
+                print("{:>8} {:>8} {:>10.2f} {:>8.3f} {:>14.0f} {:>10}".format(
+                    minutes, mode, result['seconds'], result['seconds'] / (60 * minutes), result['peak_rss_mb'],
+                    '' if difference is None else '{:.4f}'.format(difference)))
+                results.append({'minutes': minutes, 'mode': mode, 'seconds': result['seconds'],
+                                'peak_rss_mb': result['peak_rss_mb'], 'cer_vs_full': difference})
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump(results, fp, indent=2)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Streaming vs. full-pass transcription time and peak memory')
+    parser.add_argument('--minutes', type=float, nargs='+', default=[1, 10, 60])
+    parser.add_argument('--model', type=str, default=None, help="Defaults to a tiny random stand-in model.")
+    parser.add_argument('--processor', type=str, default=None)
+    parser.add_argument('--chunk_length_s', type=float, default=30)
+    parser.add_argument('--stride_length_s', type=float, default=5)
+    parser.add_argument('--full_max', type=float, default=1,
+                        help="Longest recording (minutes) to also run as one full pass; attention memory grows "
+                             "quadratically with length.")
+    parser.add_argument('--num_threads', type=int, default=None)
+    parser.add_argument('--output', type=str, default=None, help="Optional JSON results file.")
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--mode', type=str, default='stream', help=argparse.SUPPRESS)
+    parser.add_argument('--audio', type=str, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker:
+        run_worker(args)
+    else:
+        main(args)
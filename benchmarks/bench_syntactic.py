@@ -0,0 +1,69 @@
+import os
+import sys
+import argparse
+import random
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'language'))
+
+from nltk.tree import Tree
+from syntactic_complexity import Complexity
+
+
+def synthetic_tree(rng, depth=0, max_depth=6):
+    """ Random bracketed parse tree roughly shaped like a benepar sentence. """
+    if depth >= max_depth or (depth > 1 and rng.random() < 0.35):
+        return "(NN w%d)" % rng.randint(0, 999)
+    label = rng.choice(['S', 'NP', 'VP', 'PP', 'SBAR', 'ADJP'])
+    children = " ".join(synthetic_tree(rng, depth + 1, max_depth) for _ in range(rng.randint(1, 3)))
+    return "(%s %s)" % (label, children)
+
+
+def synthetic_trees(n, seed=0):
+    rng = random.Random(seed)
+    return ["(TOP %s)" % synthetic_tree(rng) for _ in range(n)]
+
+
+def legacy_scores(complexity, sentences):
+    """ The pre single-pass loop: every sentence re-scores the whole list. """
+    yngve_scores, frazier_scores = [], []
+    for _ in sentences:
+        yngve_scores.append(complexity.get_mean_yngve(sentences))
+        frazier_scores.append(complexity.get_mean_frazier(sentences))
+    return sum(yngve_scores) / len(yngve_scores), sum(frazier_scores) / len(frazier_scores)
+
+
+def nltk_scores(complexity, sentences):
+    """ score_sentences before CompactTree: an nltk.Tree per sentence, scored recursively. """
+    return complexity.mean_scores([list(complexity.score_tree(Tree.fromstring(s))) for s in sentences])
+
+
+def time_call(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main(args):
+    complexity = Complexity()
+    print("{:>8} {:>12} {:>14} {:>12} {:>12}".format("n", "single (s)", "us / sentence", "nltk (s)", "legacy (s)"))
+    for n in args.sizes:
+        sentences = synthetic_trees(n)
+        elapsed, scores = time_call(lambda s: complexity.mean_scores(complexity.score_sentences(s)), sentences)
+        nltk_elapsed, nltk_result = time_call(nltk_scores, complexity, sentences)
+        assert all(abs(a - b) < 1e-9 for a, b in zip(scores, nltk_result)), "compact tree scores diverged"
+        legacy = ''
+        if n <= args.legacy_max:
+            legacy_elapsed, legacy_result = time_call(legacy_scores, complexity, sentences)
+            assert all(abs(a - b) < 1e-9 for a, b in zip(scores, legacy_result)), "single-pass scores diverged"
+            legacy = "{:.4f}".format(legacy_elapsed)
+        print("{:>8} {:>12.4f} {:>14.1f} {:>12.4f} {:>12}".format(n, elapsed, 1e6 * elapsed / n, nltk_elapsed, legacy))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Yngve/Frazier scoring scaling benchmark')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10, 100, 1000, 10000])
+    parser.add_argument('--legacy_max', type=int, default=100,
+                        help="Largest size to also time with the quadratic per-sentence loop.")
+    args = parser.parse_args()
+    main(args)
@@ -0,0 +1,102 @@
+import os
+import sys
+import argparse
+import json
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'asr'))
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'data')
+
+
+def evaluate(baseline, args, vad):
+    """ WER, speech kept and inference time on the split, with or without VAD. """
+    accumulator, timings = baseline.evaluate(args.batch_size, args.io_workers, args.prefetch, vad)
+    return {'vad': vad, 'wer': accumulator.wer, 'utterances': accumulator.utterances,
+            'audio_seconds': timings['audio_seconds'], 'speech_seconds': timings['speech_seconds'],
+            'inference_seconds': timings['inference']}
+
+
+def compare_recording(baseline, path, batch_size=8):
+    """
+    Full-pass vs. VAD transcription of one recording. Without a reference
+    transcript, the WER of the VAD transcript is measured against the
+    full-pass one.
+    """
+    from jiwer import wer
+    from audio import decode_audio
+    from vad import silence_statistics, speech_segments
+
+    audio = decode_audio(path, baseline.sr)
+    start = time.perf_counter()
+    full = baseline.asr.transcribe_batch([audio], batch_size=1)[0]
+    full_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    segments = baseline.speech([audio])
+    transcript = baseline.asr.transcribe_segments([audio], segments, batch_size=batch_size)[0]
+    vad_seconds = time.perf_counter() - start
+
+    silence = silence_statistics(speech_segments(audio, baseline.sr), baseline.sr, len(audio) / baseline.sr)
+    return {'recording': path, 'audio_seconds': len(audio) / baseline.sr,
+            'speech_seconds': sum(end - begin for begin, end in segments[0]) / baseline.sr,
+            'full_seconds': full_seconds, 'vad_seconds': vad_seconds,
+            'wer_vs_full': wer(full, transcript) if full.strip() else 0.0, 'silence': silence}
+
+
+def main(args):
+    from baseline import ASRBaseline
+
+    stand_in = args.model is None
+    if stand_in:
+        from stand_in import tiny_wav2vec2
+
+        args.model = args.processor = tiny_wav2vec2()
+        print(f"No --model given; using an untrained stand-in at {args.model}. WERs are meaningless, "
+              f"only the compute saved is informative.")
+    baseline = ASRBaseline(args.input_dir, args.split, 16000, args.model, args.processor, args.use_lm, False,
+                           args.num_threads)
+
+    results = [evaluate(baseline, args, vad) for vad in [False, True]] if args.input_dir else []
+    if results:
+        full, vad = results
+        print(f"\n{args.split}: WER {full['wer']:.4f} -> {vad['wer']:.4f} ({vad['wer'] - full['wer']:+.4f}), "
+              f"kept {vad['speech_seconds'] / vad['audio_seconds']:.1%} of {vad['audio_seconds']:.0f}s, "
+              f"inference {full['inference_seconds']:.1f}s -> {vad['inference_seconds']:.1f}s "
+              f"({full['inference_seconds'] / vad['inference_seconds']:.2f}x)")
+
+    recordings = [compare_recording(baseline, path, args.batch_size) for path in args.recordings]
+    print(f"\n{'recording':<24} {'audio (s)':>10} {'kept':>7} {'full (s)':>9} {'VAD (s)':>9} {'speedup':>8} "
+          f"{'WER vs full':>12} {'pauses':>7}")
+    for r in recordings:
+        print(f"{os.path.basename(r['recording']):<24} {r['audio_seconds']:>10.1f} "
+              f"{r['speech_seconds'] / r['audio_seconds']:>7.1%} {r['full_seconds']:>9.2f} {r['vad_seconds']:>9.2f} "
+              f"{r['full_seconds'] / r['vad_seconds']:>7.2f}x {r['wer_vs_full']:>12.4f} "
+              f"{r['silence']['pause_count']:>7}")
+
+    if args.output:
+        with open(args.output, 'w') as fp:
+            json.dump({'split': args.split, 'model': args.model, 'stand_in': stand_in,
+                       'num_threads': args.num_threads, 'librispeech': results, 'recordings': recordings},
+                      fp, indent=2)
+        print(f"Wrote {args.output}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compute saved vs. WER change from transcribing only the speech "
+                                                 "found by the voice-activity detector.")
+    parser.add_argument('input_dir', type=str, nargs='?', default=None,
+                        help="LibriSpeech directory, as for asr/baseline.py (optional).")
+    parser.add_argument('--split', type=str, default='test-clean')
+    parser.add_argument('--recordings', type=str, nargs='*', default=[os.path.join(DATA_DIR, 'example.m4a')],
+                        help="Recordings without references, compared against their full-pass transcripts.")
+    parser.add_argument('--model', type=str, default=None, help="Defaults to a tiny untrained stand-in.")
+    parser.add_argument('--processor', type=str, default=None)
+    parser.add_argument('--use_lm', type=bool, default=False)
+    parser.add_argument('--batch_size', type=int, default=8)
+    parser.add_argument('--num_threads', type=int, default=None)
+    parser.add_argument('--io_workers', type=int, default=4)
+    parser.add_argument('--prefetch', type=int, default=4)
+    parser.add_argument('--output', type=str, default=None, help="Write the results as JSON.")
+    args = parser.parse_args()
+    main(args)
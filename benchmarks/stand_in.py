@@ -0,0 +1,60 @@
+import os
+import json
+
+import torch
+from transformers import (Wav2Vec2Config, Wav2Vec2CTCTokenizer, Wav2Vec2FeatureExtractor, Wav2Vec2ForCTC,
+                          Wav2Vec2Processor)
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '.stand_in', 'wav2vec2')
+
+
+def tiny_wav2vec2(output_dir=DEFAULT_DIR):
+    """
+    Save a randomly initialised, few-layer Wav2Vec2ForCTC and its processor so
+    the ASR benchmarks run offline on CPU. Its transcripts are gibberish, but
+    it has the real architecture (conv front end, 320x downsampling,
+    transformer, CTC head), so timings and memory scale like the real model.
+    Returns the directory, usable as both --model and --processor.
+    """
+    if os.path.exists(os.path.join(output_dir, 'config.json')):
+        return output_dir
+    os.makedirs(output_dir, exist_ok=True)
+
+    vocab = {"<pad>": 0, "<s>": 1, "</s>": 2, "<unk>": 3, "|": 4}
+    for i, c in enumerate("ETAONISRHDLUCMFWGYPBVKXJQZ'"):
+        vocab[c] = len(vocab)
+    vocab_path = os.path.join(output_dir, 'vocab.json')
+    with open(vocab_path, 'w') as fp:
+        json.dump(vocab, fp)
+
+    tokenizer = Wav2Vec2CTCTokenizer(vocab_path, word_delimiter_token='|')
+    feature_extractor = Wav2Vec2FeatureExtractor(feature_size=1, sampling_rate=16000, padding_value=0.0,
+                                                 do_normalize=True, return_attention_mask=False)
+    Wav2Vec2Processor(feature_extractor=feature_extractor, tokenizer=tokenizer).save_pretrained(output_dir)
+
+    config = Wav2Vec2Config(vocab_size=len(vocab), hidden_size=64, num_hidden_layers=2, num_attention_heads=2,
+                            intermediate_size=128, conv_dim=(64,) * 7, num_conv_pos_embeddings=16,
+                            num_conv_pos_embedding_groups=4)
+    torch.manual_seed(0)
+    Wav2Vec2ForCTC(config).save_pretrained(output_dir)
+    return output_dir
+
+
+def use_beam_search_without_lm(asr, decode_workers=None):
+    """
+    Switch a greedy ASR to pyctcdecode beam search over its own vocabulary,
+    without a KenLM model (so it runs where kenlm is not installed). The beam
+    search itself is the same CPU-bound code the LM path runs.
+    """
+    from pyctcdecode import build_ctcdecoder
+    from transformers import Wav2Vec2ProcessorWithLM
+
+    tokenizer = asr.processor.tokenizer
+    labels = [token for token, _ in sorted(tokenizer.get_vocab().items(), key=lambda item: item[1])]
+    special = {tokenizer.pad_token: '', tokenizer.word_delimiter_token: ' '}
+    decoder = build_ctcdecoder([special.get(label, label) for label in labels])
+    asr.processor = Wav2Vec2ProcessorWithLM(feature_extractor=asr.processor.feature_extractor, tokenizer=tokenizer,
+                                            decoder=decoder)
+    asr.use_lm = True
+    asr.start_decode_pool(decode_workers)
+    return asr
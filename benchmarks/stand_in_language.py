@@ -0,0 +1,110 @@
+import os
+import re
+import sys
+
+import nltk
+import spacy
+from spacy.tokens import Doc, Span
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'language'))
+
+import lexical_complexity
+from pipeline import LanguagePipeline
+
+
+class StandInPunctuation():
+    """ Capitalizes and ends a sentence every words_per_sentence words, like NeMo's add_punctuation_capitalization. """
+
+    def __init__(self, words_per_sentence=12):
+        self.words_per_sentence = words_per_sentence
+
+    def add_punctuation_capitalization(self, queries, batch_size=None):
+        punctuated = []
+        for query in queries:
+            words = query.split()
+            sentences = [words[i:i + self.words_per_sentence] for i in range(0, len(words), self.words_per_sentence)]
+            punctuated.append(" ".join(" ".join(s).capitalize() + "." for s in sentences))
+        return punctuated
+
+
+def stand_in_parse_string(span):
+    """ A right-branching S/NP/VP bracketing over the words of a span. """
+    words = [token.text for token in span if not token.is_punct]
+    tree = "(NN {})".format(words[-1]) if words else "(NN .)"
+    for word in reversed(words[:-1]):
+        tree = "(S (NP (NN {})) (VP {}))".format(word, tree)
+    return tree
+
+
+def blank_nlp(sentencizer=True):
+    nlp = spacy.blank('en')
+    if sentencizer:
+        nlp.add_pipe('sentencizer')
+    return nlp
+
+
+class OfflineLanguagePipeline(LanguagePipeline):
+    """
+    LanguagePipeline that falls back to cheap stand-ins (blank spaCy, rule
+    based punctuation and parses) for any model that cannot be loaded
+    offline. stand_ins records which models were replaced.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stand_ins = {}
+
+    def _fallback(self, name, load, stand_in):
+        try:
+            model = load()
+            self.stand_ins[name] = False
+        except Exception as e:
+            print(f"Using stand-in for {name}: {type(e).__name__}: {e}")
+            model = stand_in()
+            self.stand_ins[name] = True
+        return model
+
+    def load_punctuation_model(self):
+        return self._fallback('punctuation', super().load_punctuation_model, StandInPunctuation)
+
+    def load_spell_nlp(self):
+        def stand_in():
+            Doc.set_extension('outcome_spellCheck', getter=lambda doc: doc.text, force=True)
+            return blank_nlp(sentencizer=False)
+        return self._fallback('spell_check', super().load_spell_nlp, stand_in)
+
+    def load_parser_nlp(self):
+        def stand_in():
+            Span.set_extension('parse_string', getter=stand_in_parse_string, force=True)
+            return blank_nlp()
+        return self._fallback('constituency_parser', super().load_parser_nlp, stand_in)
+
+
+class _IdentityLemmatizer():
+    def lemmatize(self, word, pos='n'):
+        return word
+
+
+def use_nltk_stand_ins_if_missing():
+    """
+    Replace NLTK's tokenizer, tagger and WordNet lemmatizer with regex/rule
+    stand-ins when their data packages are not installed. Returns True if
+    the stand-ins are in use.
+    """
+    try:
+        nltk.pos_tag(nltk.word_tokenize("Trees are green."))
+        lexical_complexity.lmtzr.lemmatize('trees')
+        return False
+    except LookupError:
+        pass
+
+    def pos_tag(tokens):
+        return [(t, 'VBG' if t.endswith('ing') else 'VBD' if t.endswith('ed') else 'NNS' if t.endswith('s')
+                 else 'NN') for t in tokens]
+
+    nltk.word_tokenize = lambda text: re.findall(r"\w+|[^\w\s]", text)
+    nltk.pos_tag = pos_tag
+    nltk.pos_tag_sents = lambda sentences: [pos_tag(tokens) for tokens in sentences]
+    lexical_complexity.lmtzr = _IdentityLemmatizer()
+    print("Using stand-ins for the NLTK tokenizer, tagger and lemmatizer (nltk data not installed)")
+    return True
@@ -0,0 +1,97 @@
+import os
+import json
+import hashlib
+from collections import OrderedDict
+
+
+class ArtifactCache():
+    """
+    Content-addressed on-disk cache for intermediate pipeline artifacts (ASR
+    transcripts, punctuated text, parse trees, dependency parses). Entries
+    are JSON files under <root>/<kind>/, keyed by a hash of the input and the
+    identity of the model/config that produced them. When the total size
+    exceeds max_bytes the least recently used entries are evicted. Shared by
+    the ASR and language stages, so it lives in common/ rather than either.
+    """
+
+    def __init__(self, root, max_bytes=1 << 30):
+        self.root = root
+        self.max_bytes = max_bytes
+        os.makedirs(root, exist_ok=True)
+        self.hits = {}
+        self.misses = {}
+        # LRU index of the entries on disk, path -> size, least recently used first. The directory is scanned
+        # once; entries written later by other processes sharing root are indexed when this one reads them
+        self.entries = OrderedDict((path, size) for path, _, size in sorted(self._entries(), key=lambda e: e[1]))
+        self.size = sum(self.entries.values())
+
+    def key(self, *parts):
+        """ Stable hash of the input and the model/config identity. """
+        return hashlib.sha256(json.dumps(parts, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _path(self, kind, key):
+        return os.path.join(self.root, kind, key[:2], key + '.json')
+
+    def _entries(self):
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if name.endswith('.json'):
+                    path = os.path.join(directory, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    yield path, stat.st_mtime, stat.st_size
+
+    def _touch(self, path, size):
+        """ Make path the most recently used entry, replacing any size recorded for it. """
+        self.size += size - self.entries.pop(path, 0)
+        self.entries[path] = size
+
+    def get(self, kind, key):
+        """ Cached value or None. A hit refreshes the entry's LRU position. """
+        path = self._path(kind, key)
+        try:
+            with open(path, 'r') as fp:
+                value = json.load(fp)
+                size = os.fstat(fp.fileno()).st_size
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            self.misses[kind] = self.misses.get(kind, 0) + 1
+            return None
+        self.hits[kind] = self.hits.get(kind, 0) + 1
+        self._touch(path, size)
+        return value
+
+    def put(self, kind, key, value):
+        path = self._path(kind, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as fp:
+            json.dump(value, fp)
+        os.replace(tmp, path)
+        self._touch(path, os.path.getsize(path))
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def cached(self, kind, key, compute):
+        """ Return the cached value for key, computing and storing it on a miss. """
+        value = self.get(kind, key)
+        if value is None:
+            value = compute()
+            self.put(kind, key, value)
+        return value
+
+    def evict(self):
+        """ Delete least recently used entries until the cache fits in max_bytes. """
+        while self.size > self.max_bytes and self.entries:
+            path, size = self.entries.popitem(last=False)
+            self.size -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def report(self):
+        for kind in sorted(set(self.hits) | set(self.misses)):
+            print(f"Cache {kind}: {self.hits.get(kind, 0)} hits, {self.misses.get(kind, 0)} misses")
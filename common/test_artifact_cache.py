@@ -0,0 +1,70 @@
+import os
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from artifact_cache import ArtifactCache
+
+
+class ArtifactCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_get_put(self):
+        cache = ArtifactCache(self.tmp.name)
+        key = cache.key("some text", {'models': ['punctuation_en_bert']})
+        self.assertEqual(key, cache.key("some text", {'models': ['punctuation_en_bert']}))
+        self.assertNotEqual(key, cache.key("some text", {'models': ['other']}))
+
+        self.assertIsNone(cache.get('punctuated', key))
+        cache.put('punctuated', key, "Some text.")
+        self.assertEqual("Some text.", cache.get('punctuated', key))
+        self.assertEqual({'punctuated': 1}, cache.hits)
+        self.assertEqual({'punctuated': 1}, cache.misses)
+
+        computed = []
+        value = ArtifactCache(self.tmp.name).cached('punctuated', key, lambda: computed.append(1))
+        self.assertEqual("Some text.", value)
+        self.assertEqual([], computed)
+
+    def test_lru_eviction(self):
+        cache = ArtifactCache(self.tmp.name, max_bytes=10 ** 6)
+        keys = [cache.key(i) for i in range(3)]
+        for i, key in enumerate(keys):
+            cache.put('parsed', key, "x" * 100)
+            os.utime(cache._path('parsed', key), (i, i))
+        # Reading the oldest entry makes it the most recently used
+        cache.get('parsed', keys[0])
+
+        cache.max_bytes = 2 * os.path.getsize(cache._path('parsed', keys[0]))
+        cache.evict()
+        self.assertIsNotNone(cache.get('parsed', keys[0]))
+        self.assertIsNone(cache.get('parsed', keys[1]))
+        self.assertIsNotNone(cache.get('parsed', keys[2]))
+
+    def test_overwrite_keeps_size(self):
+        cache = ArtifactCache(self.tmp.name)
+        key = cache.key("text")
+        cache.put('parsed', key, "x" * 100)
+        cache.put('parsed', key, "x" * 10)
+        self.assertEqual(os.path.getsize(cache._path('parsed', key)), cache.size)
+        self.assertEqual(cache.size, ArtifactCache(self.tmp.name).size)
+
+    def test_put_over_limit_does_not_rescan(self):
+        cache = ArtifactCache(self.tmp.name, max_bytes=250)
+        with mock.patch.object(cache, '_entries', side_effect=AssertionError('rescanned')):
+            for i in range(10):
+                cache.put('parsed', cache.key(i), "x" * 100)
+        self.assertEqual(2, len(cache.entries))
+        self.assertEqual(sum(os.path.getsize(path) for path in cache.entries), cache.size)
+        self.assertIsNotNone(cache.get('parsed', cache.key(9)))
+        self.assertIsNone(cache.get('parsed', cache.key(7)))
+
+
+if __name__ == '__main__':
+    unittest.main()
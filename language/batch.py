@@ -0,0 +1,172 @@
+import os
+import glob
+import time
+import traceback
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import pandas as pd
+
+from pipeline import LanguagePipeline
+
+# One pipeline per worker process, created by the pool initializer
+_worker_pipeline = None
+_worker_spell_check = False
+_worker_measures = 'all'
+
+
+def list_transcripts(input_dir=None, manifest=None, pattern='*.txt'):
+    """
+    Transcript paths from a directory (matching pattern) or from a manifest
+    file listing one path per line, relative to the manifest's directory.
+    """
+    if manifest is not None:
+        base = os.path.dirname(os.path.abspath(manifest))
+        with open(manifest, "r") as fp:
+            lines = [line.strip() for line in fp]
+        return [os.path.join(base, line) for line in lines if line and not line.startswith('#')]
+    return sorted(glob.glob(os.path.join(input_dir, pattern)))
+
+
+def _init_worker(spell_check, cache_dir=None, cache_max_bytes=1 << 30, measures='all'):
+    global _worker_pipeline, _worker_spell_check, _worker_measures
+    _worker_pipeline = LanguagePipeline(cache_dir=cache_dir, cache_max_bytes=cache_max_bytes)
+    _worker_spell_check = spell_check
+    _worker_measures = measures
+
+
+def _read(path):
+    with open(path, "r") as f:
+        return f.read().replace('\n', '')
+
+
+def _score_file(path):
+    """ Score one transcript in a worker. Errors are returned, not raised. """
+    row = {'transcript': path, 'error': None}
+    start = time.perf_counter()
+    try:
+        text = _read(path)
+        _, _, measures = _worker_pipeline.score(text, _worker_spell_check, _worker_measures)
+        row.update(measures)
+    except Exception:
+        row['error'] = traceback.format_exc(limit=1).strip().splitlines()[-1]
+    row['seconds'] = time.perf_counter() - start
+    return row
+
+
+def _score_in_pool(paths, workers, initargs):
+    """
+    Score transcripts over a pool of spawned workers, at most `workers` at a
+    time. A worker killed by the OOM killer or a segfault breaks the pool and
+    fails every transcript in flight, so those are retried one at a time in a
+    new pool, and one that breaks the pool on its own is recorded as failed.
+    Returns (input index, row) pairs in completion order.
+    """
+    # spawn so that every worker loads torch/NeMo/spaCy cleanly
+    ctx = multiprocessing.get_context('spawn')
+    queue, suspects, rows = list(enumerate(paths))[::-1], [], []
+    while queue or suspects:
+        with ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_worker, initargs=initargs) as pool:
+            running, broken = {}, []
+            while (queue or suspects or running) and not broken:
+                source, limit = (suspects, 1) if suspects else (queue, workers)
+                while source and len(running) < limit:
+                    index, path = source.pop()
+                    running[pool.submit(_score_file, path)] = (index, path)
+                in_flight = len(running)
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, path = running.pop(future)
+                    try:
+                        row = future.result()
+                    except BrokenProcessPool:
+                        broken.append((index, path))
+                        continue
+                    rows.append((index, row))
+                    status = 'FAILED: ' + row['error'] if row['error'] else 'done'
+                    print(f"[{len(rows)}/{len(paths)}] {path} {status}")
+            broken += running.values()
+        if len(broken) == 1 and in_flight == 1:
+            index, path = broken[0]
+            rows.append((index, {'transcript': path, 'seconds': 0.0,
+                                 'error': 'BrokenProcessPool: the worker scoring this transcript died'}))
+            print(f"[{len(rows)}/{len(paths)}] {path} FAILED: worker died")
+        elif broken:
+            print(f"A worker died while scoring {len(broken)} transcripts, retrying them one at a time")
+            suspects += sorted(broken, reverse=True)
+    return rows
+
+
+def score_transcripts(paths, workers=1, spell_check=False, cache_dir=None, cache_max_bytes=1 << 30, measures='all'):
+    """
+    Score every transcript over a pool of worker processes, each holding its
+    own loaded models. Workers may share one cache_dir. Returns a DataFrame
+    with one row per transcript, in the order of paths. measures is passed
+    to LanguagePipeline.score.
+    """
+    if workers <= 1:
+        _init_worker(spell_check, cache_dir, cache_max_bytes, measures)
+        rows = [_score_file(path) for path in paths]
+    else:
+        indexed = _score_in_pool(paths, workers, (spell_check, cache_dir, cache_max_bytes, measures))
+        # Sort by input position, not path: a manifest may list a path more than once
+        rows = [row for _, row in sorted(indexed, key=lambda item: item[0])]
+
+    table = pd.DataFrame(rows)
+    columns = ['transcript'] + [c for c in table.columns if c not in ('transcript', 'error', 'seconds')]
+    return table[columns + ['seconds', 'error']]
+
+
+def score_transcripts_batched(paths, spell_check=False, batch_size=32, punctuation_batch_size=64, chunk_size=256,
+                              cache_dir=None, cache_max_bytes=1 << 30, measures='all'):
+    """
+    Score transcripts in this process with LanguagePipeline.score_many,
+    chunk_size transcripts at a time: the spaCy pipelines run through
+    nlp.pipe(batch_size) and NeMo punctuates each chunk in one call. A chunk
+    that fails is re-scored one transcript at a time so errors stay per row.
+    Returns the same table as score_transcripts.
+    """
+    _init_worker(spell_check, cache_dir, cache_max_bytes, measures)
+    rows = []
+    for chunk_start in range(0, len(paths), chunk_size):
+        chunk = []
+        for path in paths[chunk_start:chunk_start + chunk_size]:
+            row = {'transcript': path, 'error': None}
+            try:
+                chunk.append((row, _read(path)))
+            except Exception:
+                row['error'] = traceback.format_exc(limit=1).strip().splitlines()[-1]
+                row['seconds'] = 0.0
+            rows.append(row)
+
+        if not chunk:
+            continue
+        start = time.perf_counter()
+        try:
+            results = _worker_pipeline.score_many([text for _, text in chunk], spell_check, batch_size,
+                                                  punctuation_batch_size, measures)
+        except Exception:
+            error = traceback.format_exc(limit=1).strip().splitlines()[-1]
+            print(f"Batch failed ({error}), scoring its transcripts one at a time")
+            for row, _ in chunk:
+                row.update(_score_file(row['transcript']))
+            continue
+        seconds = (time.perf_counter() - start) / len(chunk)
+        for (row, _), (_, _, measures) in zip(chunk, results):
+            row.update(measures)
+            row['seconds'] = seconds
+        print(f"[{len(rows)}/{len(paths)}] done")
+
+    _worker_pipeline.report()
+    table = pd.DataFrame(rows)
+    columns = ['transcript'] + [c for c in table.columns if c not in ('transcript', 'error', 'seconds')]
+    return table[columns + ['seconds', 'error']]
+
+
+def write_table(table, output_path):
+    """ Write the per-transcript table as Parquet (.parquet) or CSV. """
+    if output_path.endswith('.parquet'):
+        table.to_parquet(output_path, index=False)
+    else:
+        table.to_csv(output_path, index=False)
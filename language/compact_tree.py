@@ -0,0 +1,145 @@
+import re
+from array import array
+
+TOKENS = re.compile(r'\(|\)|[^\s()]+')
+
+# Node label id of leaves (words)
+LEAF = -1
+
+
+class LabelTable():
+    """ Interned constituent labels, shared by every CompactTree, with per-label flags used by the metrics. """
+
+    def __init__(self):
+        self.ids = {}
+        self.labels = []
+        self.sentence = []
+        self.neutral = []
+
+    def intern(self, label):
+        label_id = self.ids.get(label)
+        if label_id is None:
+            label_id = self.ids[label] = len(self.labels)
+            self.labels.append(label)
+            # Same tests as Complexity.is_sent and the ROOT/TOP check in the Frazier score
+            self.sentence.append(len(label) > 0 and label[0] == "S")
+            self.neutral.append(label in ('', 'ROOT', 'TOP'))
+        return label_id
+
+
+LABELS = LabelTable()
+
+
+class CompactTree():
+    """
+    A bracketed parse tree stored as flat arrays in preorder: for node i,
+    parent[i] is the index of its parent (-1 for the root), position[i] its
+    index among its siblings, n_children[i] the number of children and
+    label[i] an id into the shared LABELS table (LEAF for words). Parents
+    always come before their children, so every metric is one forward loop
+    over the arrays: no recursion and no per-node objects, whatever the depth.
+    Parsed directly from the string, with the same conventions as
+    nltk.Tree.fromstring (e.g. an empty top label for "( (S ...) )").
+    """
+
+    __slots__ = ['label', 'parent', 'position', 'n_children', 'words']
+
+    def __init__(self, treestring):
+        label, parent = array('i'), array('i')
+        position, n_children = array('i'), array('i')
+        words = []
+        stack = []
+        expect_label = False
+        intern = LABELS.intern
+        empty = intern('')
+
+        for token in TOKENS.findall(treestring):
+            if token == '(':
+                if expect_label:
+                    label[stack[-1]] = empty
+                node_label = empty
+                expect_label = True
+            elif token == ')':
+                if not stack:
+                    raise ValueError(f"Unbalanced ')' in {treestring[:50]!r}")
+                expect_label = False
+                stack.pop()
+                continue
+            elif expect_label:
+                label[stack[-1]] = intern(token)
+                expect_label = False
+                continue
+            elif stack:
+                node_label = LEAF
+                words.append(token)
+            else:
+                raise ValueError(f"Word {token!r} outside of a tree in {treestring[:50]!r}")
+
+            # New node (a constituent or a word) under the innermost open constituent
+            if stack:
+                node_parent = stack[-1]
+                position.append(n_children[node_parent])
+                n_children[node_parent] += 1
+            elif len(parent):
+                raise ValueError(f"More than one tree in {treestring[:50]!r}")
+            else:
+                node_parent = -1
+                position.append(0)
+            label.append(node_label)
+            parent.append(node_parent)
+            n_children.append(0)
+            if node_label != LEAF:
+                stack.append(len(parent) - 1)
+
+        if stack or not len(parent):
+            raise ValueError(f"Incomplete tree {treestring[:50]!r}")
+
+        self.label, self.parent, self.position, self.n_children, self.words = (
+            label, parent, position, n_children, words)
+
+    def __len__(self):
+        return len(self.parent)
+
+    def leaves(self):
+        return list(self.words)
+
+    def word_count(self):
+        return len(self.words)
+
+    def scores(self):
+        """
+        (yngve, frazier, words) totals of the tree; the same values as
+        Complexity.score_tree (and calc_yngve_score, calc_frazier_score and
+        word_score) on the nltk.Tree.
+        """
+        label, parent, position, n_children = self.label, self.parent, self.position, self.n_children
+        sentence, neutral = LABELS.sentence, LABELS.neutral
+        n = len(parent)
+        # Score handed down to each node by its parent, as in the recursive versions
+        yngve = array('i', [0]) * n
+        frazier = array('d', [0.0]) * n
+        total_yngve, total_frazier, words = 0, 0.0, 0
+
+        for i in range(1, n):
+            p = parent[i]
+            yngve[i] = yngve[p] + n_children[p] - 1 - position[i]
+            if position[i] == 0:
+                parent_label = label[p]
+                if sentence[parent_label]:
+                    grandparent = parent[p]
+                    frazier[i] = 0 if grandparent >= 0 and sentence[label[grandparent]] else frazier[p] + 1.5
+                elif not neutral[parent_label]:
+                    frazier[i] = frazier[p] + 1
+            if label[i] == LEAF:
+                total_yngve += yngve[i]
+                total_frazier += frazier[i] - 1
+                words += 1
+        return total_yngve, total_frazier, words
+
+    def height(self):
+        """ Same as nltk.Tree.height(): nodes on the longest root-to-word path, counting the word. """
+        parent = self.parent
+        depth = array('i', [0]) * len(parent)
+        for i in range(1, len(parent)):
+            depth[i] = depth[parent[i]] + 1
+        return max(depth) + 1
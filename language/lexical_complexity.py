@@ -1,18 +1,88 @@
 import nltk
-import numpy as np
-import pandas as pd
 import math
-from nltk.corpus import brown
-from collections import Counter
+from collections import Counter, OrderedDict
 from nltk.stem.wordnet import WordNetLemmatizer 
 lmtzr = WordNetLemmatizer()
 
 
+class LemmaCache():
+    """
+    Size-bounded LRU cache of lemmas keyed by (token, WordNet POS), shared by
+    every text in the process. Transcripts reuse a small vocabulary, so each
+    distinct type is lemmatized once and later tokens are dictionary lookups.
+    """
+
+    def __init__(self, max_size=100000):
+        self.max_size = max_size
+        self.lemmas = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def lemmatize(self, token, pos='n'):
+        key = (token, pos)
+        lemma = self.lemmas.get(key)
+        if lemma is not None:
+            self.hits += 1
+            self.lemmas.move_to_end(key)
+            return lemma
+        self.misses += 1
+        lemma = self.lemmas[key] = lmtzr.lemmatize(token, pos)
+        if len(self.lemmas) > self.max_size:
+            self.lemmas.popitem(last=False)
+        return lemma
+
+    def clear(self):
+        self.lemmas.clear()
+        self.hits = self.misses = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {'size': len(self.lemmas), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0}
+
+
+lemma_cache = LemmaCache()
+
+# Names of the get_lexical_measures() values in the language pipeline output
+LEXICAL_MEASURES = ['Type to token ratio', 'Type to token ratio: Lemmatized text', 'honore_statistics',
+                    'Automatic Readability Index', 'brunet_index', 'Coleman Liau\'s index']
+
+
 '''Calculating type-token ratio - documents lexical richness or variety in vocabulary. 
 total number of unique words divided by total number of tokens. Word lemmatization reduces 
 each word to its root. eg. studying and studies is considered as the same word (vocabulary). Hence it is more
 accurate'''
 
+class TextCounts():
+    """
+    Character, word and sentence counts of a text: all the readability
+    measures (ARI, Coleman-Liau, words per sentence) need, with no NLP pass.
+    """
+
+    def __init__(self, text):
+        self.text = text
+        self.num_char = sum(1 for c in text if c.isdigit() or c.isalpha())
+        self.num_words = len([word for word in text.split(' ') if not word=='' and not word=='.'])
+        self.num_sentences = text.count('.') + text.count('?')
+
+
+class AnalyzedText(TextCounts):
+    """
+    Tokens, POS tags, lemmas and character/word/sentence counts of a text,
+    computed once so that every lexical measure can share a single NLP pass.
+    """
+
+    def __init__(self, text, verb_list):
+        super().__init__(text)
+        self.tokens = nltk.word_tokenize(text)
+        self.tags = [tag for _, tag in nltk.pos_tag(self.tokens)]
+        self.lemmas = [lemma_cache.lemmatize(token, 'v' if tag in verb_list else 'n')
+                       for token, tag in zip(self.tokens, self.tags)]
+        self.num_tokens = len(self.tokens)
+        self.token_counts = Counter(self.tokens)
+        self.lemma_counts = Counter(self.lemmas)
+
+
 class LexicalComplexity():
 
     def __init__(self):
@@ -27,41 +97,36 @@ class LexicalComplexity():
             CLAUSE: {<NP><VP>} 
             """  
 
+    def analyze(self, sentence):
+        """ Build the shared AnalyzedText for a string, or return one unchanged. """
+        if isinstance(sentence, AnalyzedText):
+            return sentence
+        return AnalyzedText(sentence, self.verb_list)
+
+    def counts(self, sentence):
+        """ TextCounts of a string without tokenizing it, or the counts of an existing analysis. """
+        if isinstance(sentence, TextCounts):
+            return sentence
+        return TextCounts(sentence)
+
     def get_freq_token_type(self, sentence):
-        text = nltk.word_tokenize(sentence)
-        num_tokens = len(text)
-        freq_token_type = Counter(text)
-        return freq_token_type
+        return self.analyze(sentence).token_counts
 
     def get_freq_token_type_lem(self, sentence):
-        text = nltk.word_tokenize(sentence)
-        numtokens = len(text)
-        tag_info = np.array(nltk.pos_tag(text))
-        text_root = [lmtzr.lemmatize(j) for indexj, j in enumerate(text)]
-        for indexj, j in enumerate(text):
-            if tag_info[indexj,1] in self.noun_list:
-                text_root[indexj] = lmtzr.lemmatize(j) 
-            elif tag_info[indexj,1] in self.verb_list:
-                text_root[indexj] = lmtzr.lemmatize(j,'v')
-        freq_lemmtoken_type = Counter(text_root)
-        return freq_lemmtoken_type
+        return self.analyze(sentence).lemma_counts
 
     def calculate_ttr(self, sentence):
-        text = nltk.word_tokenize(sentence)
-        num_tokens = len(text)
-        freq_token_type = self.get_freq_token_type(sentence)
-        num_types = len(freq_token_type)
-        ttr = float(num_types)/num_tokens
+        analysis = self.analyze(sentence)
+        num_types = len(analysis.token_counts)
+        ttr = float(num_types)/analysis.num_tokens
         print("Type to token ratio:",ttr)
         return ttr
 
     #Lemmatizes each word eg. studying and studies is the same thing
     def calculate_ttr_lematized(self, sentence):
-        text = nltk.word_tokenize(sentence)
-        numtokens = len(text)
-        freq_lemmtoken_type = self.get_freq_token_type_lem(sentence)
-        num_types_lem = len(freq_lemmtoken_type)
-        ttr_lemmatized = float(num_types_lem)/numtokens  
+        analysis = self.analyze(sentence)
+        num_types_lem = len(analysis.lemma_counts)
+        ttr_lemmatized = float(num_types_lem)/analysis.num_tokens
         print("Type to token ratio lemmatized:",ttr_lemmatized)
         return ttr_lemmatized
 
@@ -70,42 +135,31 @@ class LexicalComplexity():
     are linearly associated. R=100×log(N/(1−V 1/V))where N is the total text length. Higher values correspond to
     a richer vocabulary. As with standardized word entropy, stemming is done on words and only the stems are considered. '''
     def calculate_honore_statistics(self, sentence):
-        text = nltk.word_tokenize(sentence)
-        numtokens = len(text)
-        freq_token_root = self.get_freq_token_type_lem(sentence)
-        freq_token_type = Counter(text)  
-        v = len(freq_token_type)
-        occur_once = 0
-        for j in freq_token_root:
-            if freq_token_root[j] == 1:
-                occur_once = occur_once + 1
-        v1 = occur_once
-        
-        honoroe_stats = 100 * math.log(numtokens / (1 - (v1/v)))
+        analysis = self.analyze(sentence)
+        v = len(analysis.token_counts)
+        v1 = sum(1 for count in analysis.lemma_counts.values() if count == 1)
+
+        honoroe_stats = 100 * math.log(analysis.num_tokens / (1 - (v1/v)))
         print("Honoroe's statistics:",honoroe_stats)
         return honoroe_stats
 
     def automatic_readability_index(self, sentence):
-        num_char = len([c for c in sentence if c.isdigit() or c.isalpha()])
-        num_words = len([word for word in sentence.split(' ') if not word=='' and not word=='.'])
-        num_sentences = sentence.count('.') + sentence.count('?')
+        analysis = self.counts(sentence)
+        num_char, num_words, num_sentences = analysis.num_char, analysis.num_words, analysis.num_sentences
         ARI = 4.71*(num_char/num_words) + 0.5*(num_words/num_sentences) - 21.43
         print("Automatic Readability Index:",ARI)
         return ARI
         
     def calculate_brunet_index(self, sentence):
-        text = nltk.word_tokenize(sentence)
-        numtokens = len(text)
-        freq_lemmtoken_type = self.get_freq_token_type_lem(sentence)
-        vl = len(freq_lemmtoken_type)
-        brunet_index = float(vl)**(numtokens**-0.0165)
+        analysis = self.analyze(sentence)
+        vl = len(analysis.lemma_counts)
+        brunet_index = float(vl)**(analysis.num_tokens**-0.0165)
         print("Brunet's index:",brunet_index)
         return brunet_index
         
     def calculate_coleman_liau_index(self, sentence):
-        num_char = len([c for c in sentence if c.isdigit() or c.isalpha()])
-        num_words = len([word for word in sentence.split(' ') if not word=='' and not word=='.'])
-        num_sentences = sentence.count('.') + sentence.count('?')
+        analysis = self.counts(sentence)
+        num_char, num_words, num_sentences = analysis.num_char, analysis.num_words, analysis.num_sentences
         L = (num_char/num_words)*100
         S = (num_sentences/num_words)*100
         CLI = 0.0588*L - 0.296*S - 15.8 
@@ -113,24 +167,23 @@ class LexicalComplexity():
         return CLI
 
     def calculate_word_to_sentence_ration(self, sentence):
-        num_words = len([word for word in sentence.split(' ') if not word=='' and not word=='.'])
-        num_sentences = sentence.count('.') + sentence.count('?')
-        word_sentence_ratio = num_words/num_sentences
+        analysis = self.counts(sentence)
+        word_sentence_ratio = analysis.num_words/analysis.num_sentences
         print("Word to sentence ratio:",word_sentence_ratio)
         return word_sentence_ratio
         
     def get_frequency_counts(self, sentence):
-        text = nltk.word_tokenize(sentence)
-        tag_info = np.array(nltk.pos_tag(text))
-        tag_fd = nltk.FreqDist(tag for i, (word, tag) in enumerate(tag_info))
-        freq_tag = tag_fd.most_common()
-        sent = nltk.pos_tag(text)
-        cp = nltk.RegexpParser(self.grammar)
-        phrase_type = cp.parse(sent)  
-        # print(phrase_type)
-        prp_count = sum([pos[1] for pos in freq_tag if pos[0]=='PRP' or pos[0]=='PRP$'])
-        noun_count = sum([pos[1] for pos in freq_tag if pos[0] in noun_list])
-        vg_count = sum([pos[1] for pos in freq_tag if pos[0]=='VBG'])
+        """
+        Pronoun-to-noun ratio and the number of noun, verb and gerund verb
+        phrases found by the chunk grammar. Constituency based phrase counts
+        are in syntactic_measures.PhraseCounts.
+        """
+        analysis = self.analyze(sentence)
+        tag_counts = Counter(analysis.tags)
+        phrase_type = nltk.RegexpParser(self.grammar).parse(list(zip(analysis.tokens, analysis.tags)))
+        prp_count = tag_counts['PRP'] + tag_counts['PRP$']
+        noun_count = sum(tag_counts[tag] for tag in self.noun_list)
+        vg_count = tag_counts['VBG']
 
         # ------- Pronoun-to-Noun ratio -------
         if noun_count != 0:
@@ -138,20 +191,25 @@ class LexicalComplexity():
         else:
             prp_noun_ratio = prp_count
 
-        # Noun phrase, Verb phrase, Verb gerund phrase frequency        
-        NP_count = 0
-        VP_count = 0
-        VGP_count = 0
-        for index_t, t in enumerate(phrase_type):
-            if not isinstance(phrase_type[index_t],tuple):
-                if phrase_type[index_t].label() == 'NP':
-                    NP_count = NP_count + 1
-                elif phrase_type[index_t].label() == 'VP': 
-                    VP_count = VP_count + 1
-                elif phrase_type[index_t].label() == 'VGP':
-                    VGP_count = VGP_count + 1
+        # Noun phrase, Verb phrase, Verb gerund phrase frequency
+        phrase_counts = Counter(chunk.label() for chunk in phrase_type if isinstance(chunk, nltk.Tree))
+
+        return {
+            'Pronoun to noun ratio': prp_noun_ratio,
+            'Gerund count': vg_count,
+            'NP_chunks': phrase_counts['NP'],
+            'VP_chunks': phrase_counts['VP'],
+            'VPG_chunks': phrase_counts['VPG'],
+        }
+
+    def lexical_measures(self, content):
+        """ get_lexical_measures() as a dict, named as in the language pipeline output. """
+        ttr_lematized, ttr, honore_statistics, ARI, brunet_index, CLI = self.get_lexical_measures(content)
+        return dict(zip(LEXICAL_MEASURES, [ttr, ttr_lematized, honore_statistics, ARI, brunet_index, CLI]))
 
     def get_lexical_measures(self, content):
+        # Tokenize, tag and lemmatize once and share the result across measures
+        content = self.analyze(content)
         ttr_lematized = self.calculate_ttr_lematized(content)
         ttr = self.calculate_ttr(content)
         honore_statistics = self.calculate_honore_statistics(content)
@@ -0,0 +1,104 @@
+import nltk
+import numpy as np
+import pandas as pd
+from scipy import sparse
+
+import lexical_complexity
+from lexical_complexity import LexicalComplexity
+
+
+def _csr(columns, indptr, n_columns):
+    counts = sparse.csr_matrix((np.ones(len(columns)), np.array(columns, dtype=np.int64),
+                                np.array(indptr, dtype=np.int64)), shape=(len(indptr) - 1, n_columns))
+    counts.sum_duplicates()
+    return counts
+
+
+class LexicalCorpus():
+    """
+    Lexical measures for many texts at once. Every text is tokenized and
+    tagged once, each distinct (token, tag) pair is lemmatized once, and the
+    counts go into sparse document-term and document-lemma matrices over a
+    shared vocabulary. TTR, Honore, Brunet, hapax counts and the readability
+    indices are then array operations over all documents. Values match
+    LexicalComplexity.get_lexical_measures, except that undefined ones (empty
+    texts, Honore when every lemma is a hapax) are NaN instead of raising.
+    """
+
+    def __init__(self, texts, verb_list=None):
+        self.verb_list = verb_list or LexicalComplexity().verb_list
+        tokenized = [nltk.word_tokenize(text) for text in texts]
+        tagged = nltk.pos_tag_sents(tokenized)
+
+        # Document x (token, tag) counts; tokens and lemmas are column merges of it
+        pairs, columns, indptr = {}, [], [0]
+        for sentence in tagged:
+            columns.extend(pairs.setdefault(pair, len(pairs)) for pair in sentence)
+            indptr.append(len(columns))
+        pair_counts = _csr(columns, indptr, len(pairs))
+
+        self.vocabulary, self.lemmas = {}, {}
+        token_of, lemma_of = [], []
+        for token, tag in pairs:
+            lemma = lexical_complexity.lemma_cache.lemmatize(token, 'v' if tag in self.verb_list else 'n')
+            token_of.append(self.vocabulary.setdefault(token, len(self.vocabulary)))
+            lemma_of.append(self.lemmas.setdefault(lemma, len(self.lemmas)))
+        self.token_counts = pair_counts @ self._merge(token_of, len(self.vocabulary))
+        self.lemma_counts = pair_counts @ self._merge(lemma_of, len(self.lemmas))
+
+        self.num_char = np.array([sum(1 for c in text if c.isdigit() or c.isalpha()) for text in texts],
+                                 dtype=np.float64)
+        self.num_words = np.array([len([w for w in text.split(' ') if not w == '' and not w == '.'])
+                                   for text in texts], dtype=np.float64)
+        self.num_sentences = np.array([text.count('.') + text.count('?') for text in texts], dtype=np.float64)
+
+    def _merge(self, targets, n_targets):
+        """ Sparse 0/1 matrix mapping every (token, tag) column onto its token or lemma column. """
+        return sparse.csr_matrix((np.ones(len(targets)), (np.arange(len(targets)), targets)),
+                                 shape=(len(targets), n_targets))
+
+    def __len__(self):
+        return self.token_counts.shape[0]
+
+    def measures(self):
+        """ One row of lexical measures per text, named as in the language pipeline output. """
+        n = np.asarray(self.token_counts.sum(axis=1)).ravel()
+        types = np.diff(self.token_counts.indptr).astype(np.float64)
+        lemma_types = np.diff(self.lemma_counts.indptr).astype(np.float64)
+        hapax = np.asarray((self.token_counts == 1).sum(axis=1)).ravel()
+        hapax_lemmas = np.asarray((self.lemma_counts == 1).sum(axis=1)).ravel()
+        chars, words, sentences = self.num_char, self.num_words, self.num_sentences
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ttr = types / n
+            ttr_lemmatized = lemma_types / n
+            honore = 100 * np.log(n / (1 - (hapax_lemmas / types)))
+            brunet = lemma_types ** (n ** -0.0165)
+            ari = 4.71 * (chars / words) + 0.5 * (words / sentences) - 21.43
+            cli = 0.0588 * (chars / words) * 100 - 0.296 * (sentences / words) * 100 - 15.8
+
+        table = pd.DataFrame({
+            'Type to token ratio': ttr,
+            'Type to token ratio: Lemmatized text': ttr_lemmatized,
+            'honore_statistics': honore,
+            'Automatic Readability Index': ari,
+            'brunet_index': brunet,
+            'Coleman Liau\'s index': cli,
+            'tokens': n.astype(np.int64),
+            'types': types.astype(np.int64),
+            'lemma_types': lemma_types.astype(np.int64),
+            'hapax': hapax.astype(np.int64),
+            'hapax_lemmas': hapax_lemmas.astype(np.int64),
+        })
+        return table.replace([np.inf, -np.inf], np.nan)
+
+    def reference_coverage(self, reference, lemmas=True):
+        """
+        Share of each text's tokens whose lemma (or surface token) is in the
+        reference vocabulary, e.g. the words of a healthy-control corpus.
+        """
+        index, counts = (self.lemmas, self.lemma_counts) if lemmas else (self.vocabulary, self.token_counts)
+        mask = np.zeros(len(index))
+        mask[[index[word] for word in reference if word in index]] = 1
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (counts @ mask) / np.asarray(counts.sum(axis=1)).ravel()
@@ -1,44 +1,36 @@
+import os
 import argparse
 
-# Punctuation and spell correct dependencies
-from nemo.collections.nlp.models import PunctuationCapitalizationModel
-import contextualSpellCheck
-import spacy
-from textblob import TextBlob
+from pipeline import LanguagePipeline, MEASURE_SETS
+from syntactic_measures import measure_names
 
-import benepar, spacy
-from nltk.tree import Tree
-import numpy as np
-from syntactic_complexity import Complexity
-from lexical_complexity import LexicalComplexity
+# Shared across calls so the models are only loaded once per process
+_pipeline = None
 
 
-def prepare_input(path, spell_check = False):
-    nlp = spacy.load("en_core_web_sm") 
+def get_pipeline(**kwargs):
+    global _pipeline
+    if _pipeline is None:
+        _pipeline = LanguagePipeline(**kwargs)
+    return _pipeline
 
-    contextualSpellCheck.add_to_pipe(nlp)
-
-    # Download and load the pre-trained BERT-based model
-    model = PunctuationCapitalizationModel.from_pretrained("punctuation_en_bert")
-
-    print("\nReading input file and preparing punctuated and spell-corrected text...")
 
+def read_transcript(path):
     # Read raw file provided by the ASR team
     with open(path, "r") as f:
-        text = f.read().replace('\n', '')
-        
-    # Punctuate the text using nemo
-    punkted = model.add_punctuation_capitalization([text.lower()])[0]
+        return f.read().replace('\n', '')
 
-    # Using contextual spell check to correct spellings
-    if spell_check:
-        doc = nlp(punkted.lower())
-        print("\n\n Spell-correction: FINISHED")
 
-    else:
-        doc = nlp(punkted)
+def prepare_input(path, spell_check = False, pipeline = None):
+    pipeline = pipeline or get_pipeline()
+
+    print("\nReading input file and preparing punctuated and spell-corrected text...")
+    text = read_transcript(path)
 
-    refined_text = doc._.outcome_spellCheck
+    # Punctuate the text using nemo and correct spellings with contextual spell check
+    refined_text = pipeline.punctuate(text, spell_check)
+    if spell_check:
+        print("\n\n Spell-correction: FINISHED")
 
     f = open('punctuated.txt', "w")
     f.write(str(refined_text))
@@ -47,19 +39,12 @@ def prepare_input(path, spell_check = False):
     print("\n\nPunctuation: FINISHED")
     return refined_text
 
-def constituency_parser(refined_text):
-    nlp = spacy.load('en_core_web_md')
-    nlp.add_pipe('benepar', config={'model': 'benepar_en3'})
+def constituency_parser(refined_text, pipeline = None):
+    pipeline = pipeline or get_pipeline()
 
     print("\nParsing punctuated text...")
 
-    doc = nlp(refined_text)
-
-    sentences = list(doc.sents)
-
-    parsed = ""
-    for s in sentences:
-        parsed += s._.parse_string
+    parsed = pipeline.constituency_parse(refined_text)
 
     with open("parsed.txt", "w") as parsed_output_file:
         parsed_output_file.write(parsed)
@@ -68,67 +53,115 @@ def constituency_parser(refined_text):
     return parsed
 
 
+def write_measures(measures, output_path):
+    syntactic = [name for name in measure_names() if name in measures]
+    rows = [('Syntactic Measures', '')]
+    rows += [(name, str(measures[name])) for name in syntactic]
+    rows += [('', ''), ('Lexical Measures', '')]
+    rows += [(name, str(value)) for name, value in measures.items() if name not in syntactic]
+
+    f = open(output_path, "w")
+    f.write("{},{}\n".format("Complexity Measures", "Values"))
+    for x in rows:
+        f.write("{},{}\n".format(x[0], x[1]))
+    f.close()
+
+
+def write_series(series, output_path):
+    """ Write each time series next to output_path, e.g. series.tokens.csv and series.sentences.csv. """
+    stem, ext = os.path.splitext(output_path)
+    for unit, table in series.items():
+        path = f"{stem}.{unit}{ext or '.csv'}"
+        if path.endswith('.parquet'):
+            table.to_parquet(path, index=False)
+        else:
+            table.to_csv(path, index=False)
+        print(f"Wrote {len(table)} {unit} rows to {path}")
+
+
 def main():
 
     parser = argparse.ArgumentParser(description='baseline')
     parser.add_argument('--path', type=str, default='./input.txt')
     parser.add_argument('--normalize', action = 'store_true')
+    parser.add_argument('--measures', type=str, default='all', choices=MEASURE_SETS,
+                        help="'lexical' or 'syntactic' only scores those measures, on the transcript as given: the "
+                             "punctuation and spell-check models are never loaded (nor the parser for 'lexical').")
+    parser.add_argument('--input_dir', type=str, default=None,
+                        help="Score every .txt transcript in this directory (batch mode).")
+    parser.add_argument('--manifest', type=str, default=None,
+                        help="Score the transcripts listed one per line in this file (batch mode).")
+    parser.add_argument('--workers', type=int, default=1, help="Worker processes for batch mode.")
+    parser.add_argument('--batch_size', type=int, default=None,
+                        help="Batch mode: score in this process, feeding transcripts through nlp.pipe with this "
+                             "batch size instead of one transcript per worker.")
+    parser.add_argument('--punctuation_batch_size', type=int, default=64,
+                        help="Batch size for NeMo punctuation (with --batch_size).")
+    parser.add_argument('--chunk_size', type=int, default=256,
+                        help="Transcripts held in memory per batch (with --batch_size).")
+    parser.add_argument('--cache_dir', type=str, default=None,
+                        help="Cache punctuated text, parse trees and dependency parses here so re-scoring only "
+                             "recomputes the measures.")
+    parser.add_argument('--cache_max_mb', type=int, default=1024, help="Size limit of the cache (LRU eviction).")
+    parser.add_argument('--series', type=str, default=None,
+                        help="Also write sliding-window time series (per token and per sentence) to this path "
+                             "(.csv or .parquet); single-file mode only.")
+    parser.add_argument('--timestamps', type=str, default=None,
+                        help="Word timestamps from the ASR stage (table with start/end columns) to align the "
+                             "time series to.")
+    parser.add_argument('--window_tokens', type=int, default=50, help="Lexical window size in tokens.")
+    parser.add_argument('--window_sentences', type=int, default=1, help="Syntactic window size in sentences.")
+    parser.add_argument('--window_seconds', type=float, default=None,
+                        help="Bound both windows to this many seconds of speech (needs --timestamps).")
+    parser.add_argument('--series_step', type=int, default=1, help="Emit a lexical row every N tokens.")
+    parser.add_argument('--output', type=str, default=None,
+                        help="Output table; .parquet or .csv. Defaults to 'Complexity Measures.csv' "
+                             "for a single file and 'complexity_measures.csv' in batch mode.")
 
     args = parser.parse_args()
     path = args.path
     spell_check = args.normalize
-
-    # Punctuate and spell-correct text
-    refined_text = prepare_input(path, spell_check)
-
-    # Calculating syntactic complexity
-    parser_output = constituency_parser(refined_text) # generating constituency parse tree
-
-    syntactic_c = Complexity()
-    yngve_mean, frazier_mean, sdl_mean = syntactic_c.syntactic_complexity(parser_output)
-
-    # Calculating lexical complexity
-    lexical_c = LexicalComplexity()
-    print("Passing to lexical ",refined_text)
-    ttr_lematized, ttr, honore_statistics, ARI, brunet_index, CLI = lexical_c.get_lexical_measures(refined_text)
-
-
-    measures_type = [
-        'Syntactic Measures',
-        'Yngve_mean',
-        'Frazier_mean',
-        'Mean Syntactic Dependency Length',
-        '',
-        'Lexical Measures',
-        'Type to token ratio',
-        'Type to token ratio: Lemmatized text',
-        'honore_statistics',
-        'Automatic Readability Index',
-        'brunet_index',
-        'Coleman Liau\'s index'
-        ''
-    ]
-
-    measures_value = [
-        '', 
-        str(yngve_mean),
-        str(frazier_mean),
-        str(sdl_mean),
-        '',
-        '',
-        str(ttr),
-        str(ttr_lematized),
-        str(honore_statistics),
-        str(ARI),
-        str(brunet_index),
-        str(CLI)
-    ]
-
-    f = open("Complexity Measures.csv", "w")
-    f.write("{},{}\n".format("Complexity Measures", "Values"))
-    for x in zip(measures_type, measures_value):
-        f.write("{},{}\n".format(x[0], x[1]))
-    f.close()
+    cache = {'cache_dir': args.cache_dir, 'cache_max_bytes': args.cache_max_mb << 20}
+
+    if args.input_dir or args.manifest:
+        from batch import list_transcripts, score_transcripts, score_transcripts_batched, write_table
+
+        paths = list_transcripts(args.input_dir, args.manifest)
+        if args.batch_size:
+            print(f"Scoring {len(paths)} transcripts in batches of {args.batch_size}...")
+            table = score_transcripts_batched(paths, spell_check, args.batch_size,
+                                              punctuation_batch_size=args.punctuation_batch_size,
+                                              chunk_size=args.chunk_size, measures=args.measures, **cache)
+        else:
+            print(f"Scoring {len(paths)} transcripts with {args.workers} worker(s)...")
+            table = score_transcripts(paths, args.workers, spell_check, measures=args.measures, **cache)
+        output_path = args.output or 'complexity_measures.csv'
+        write_table(table, output_path)
+        failed = table['error'].notna().sum()
+        print(f"Wrote {len(table)} rows to {output_path} ({failed} failed)")
+        return
+
+    pipeline = get_pipeline(**cache)
+
+    # Punctuate and spell-correct text, parse it and compute syntactic and lexical complexity
+    refined_text, parser_output, measures = pipeline.score(read_transcript(path), spell_check, args.measures)
+
+    if args.measures == 'all':
+        with open('punctuated.txt', "w") as f:
+            f.write(refined_text)
+    if args.measures != 'lexical':
+        with open("parsed.txt", "w") as parsed_output_file:
+            parsed_output_file.write(parser_output)
+
+    write_measures(measures, args.output or "Complexity Measures.csv")
+    if args.series:
+        from windowed import read_word_times
+
+        word_times = read_word_times(args.timestamps) if args.timestamps else None
+        series = pipeline.time_series(refined_text, word_times, args.window_tokens, args.window_sentences,
+                                      args.window_seconds, args.series_step)
+        write_series(series, args.series)
+    pipeline.report()
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
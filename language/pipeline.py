@@ -0,0 +1,326 @@
+import os
+import sys
+import time
+
+# Modules shared with the ASR stage (the on-disk artifact cache) live in common/
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'common'))
+from artifact_cache import ArtifactCache
+from syntactic_complexity import Complexity
+
+# Measures computed by score(): 'lexical' and 'syntactic' score the text as
+# given, without the punctuation and spell-check models
+MEASURE_SETS = ['all', 'lexical', 'syntactic']
+SUMMARY_MEASURES = ['Yngve_mean', 'Frazier_mean', 'Mean Syntactic Dependency Length']
+
+
+class LanguagePipeline():
+    """
+    Owns the punctuation, spell-check and parsing models. Each model is
+    loaded the first time it is needed and then reused, so many transcripts
+    can be scored in one process while paying the model startup cost once.
+    The parser (spaCy + benepar) runs once per text and its Doc supplies the
+    sentences, constituency trees and dependency arcs for every syntactic
+    measure. With a cache_dir, punctuated text and parses are cached on
+    disk, so re-scoring only recomputes the measures and models are only
+    loaded on a cache miss. spaCy, NeMo and NLTK are imported on first use
+    too, so a lexical-only run never imports the parsing stack.
+    """
+
+    def __init__(self, punctuation_model="punctuation_en_bert", spell_model='en_core_web_sm',
+                 parser_model='en_core_web_md', benepar_model='benepar_en3',
+                 cache_dir=None, cache_max_bytes=1 << 30):
+        self.punctuation_model_name = punctuation_model
+        self.spell_model_name = spell_model
+        self.parser_model_name = parser_model
+        self.benepar_model_name = benepar_model
+
+        self._punctuation_model = None
+        self._spell_nlp = None
+        self._parser_nlp = None
+        self.syntactic = Complexity()
+        self._lexical = None
+        self.cache = ArtifactCache(cache_dir, cache_max_bytes) if cache_dir else None
+        self._last_parse = None
+
+        # Seconds spent loading each model, and per-transcript stage timings
+        self.load_times = {}
+        self.timings = []
+
+    def _load(self, name, loader):
+        start = time.perf_counter()
+        model = loader()
+        self.load_times[name] = time.perf_counter() - start
+        print(f"Loaded {name} in {self.load_times[name]:.2f}s")
+        return model
+
+    def load_punctuation_model(self):
+        from nemo.collections.nlp.models import PunctuationCapitalizationModel
+        return PunctuationCapitalizationModel.from_pretrained(self.punctuation_model_name)
+
+    def load_spell_nlp(self):
+        import spacy
+        import contextualSpellCheck
+        nlp = spacy.load(self.spell_model_name)
+        contextualSpellCheck.add_to_pipe(nlp)
+        return nlp
+
+    def load_parser_nlp(self):
+        import spacy
+        import benepar
+        nlp = spacy.load(self.parser_model_name)
+        nlp.add_pipe('benepar', config={'model': self.benepar_model_name})
+        return nlp
+
+    @property
+    def lexical(self):
+        if self._lexical is None:
+            from lexical_complexity import LexicalComplexity
+            self._lexical = LexicalComplexity()
+        return self._lexical
+
+    @property
+    def punctuation_model(self):
+        if self._punctuation_model is None:
+            self._punctuation_model = self._load('punctuation', self.load_punctuation_model)
+        return self._punctuation_model
+
+    @property
+    def spell_nlp(self):
+        if self._spell_nlp is None:
+            self._spell_nlp = self._load('spell_check', self.load_spell_nlp)
+        return self._spell_nlp
+
+    @property
+    def parser_nlp(self):
+        if self._parser_nlp is None:
+            self._parser_nlp = self._load('constituency_parser', self.load_parser_nlp)
+        return self._parser_nlp
+
+    def load(self):
+        """ Load every model up front, e.g. before timing a batch of transcripts. """
+        for name in ['punctuation_model', 'spell_nlp', 'parser_nlp']:
+            getattr(self, name)
+        return self
+
+    def punctuate(self, text, spell_check=False):
+        """ Punctuate, case and (optionally) spell-correct a raw ASR transcript. """
+        punkted = self.punctuation_model.add_punctuation_capitalization([text.lower()])[0]
+
+        # contextualSpellCheck always runs; --normalize lowercases its input first
+        if spell_check:
+            doc = self.spell_nlp(punkted.lower())
+        else:
+            doc = self.spell_nlp(punkted)
+        return doc._.outcome_spellCheck
+
+    def parse(self, refined_text):
+        """
+        Parse the text once and return {'trees': [...], 'heads': [...]}, the
+        benepar tree string and dependency head offsets of every sentence.
+        """
+        trees, heads = self.syntactic.parse_doc(self.parser_nlp(refined_text))
+        return {'trees': trees, 'heads': heads}
+
+    def punctuate_many(self, texts, spell_check=False, batch_size=32, punctuation_batch_size=64):
+        """
+        punctuate() for a list of transcripts: one NeMo call over the whole
+        list, then contextualSpellCheck through nlp.pipe.
+        """
+        punkted = self.punctuation_model.add_punctuation_capitalization(
+            [text.lower() for text in texts], batch_size=punctuation_batch_size)
+        docs = self.spell_nlp.pipe([p.lower() if spell_check else p for p in punkted],
+                                   batch_size=batch_size)
+        return [str(doc._.outcome_spellCheck) for doc in docs]
+
+    def parse_many(self, texts, batch_size=32):
+        """ parse() for a list of texts, streamed through nlp.pipe. """
+        parses = []
+        for doc in self.parser_nlp.pipe(texts, batch_size=batch_size):
+            trees, heads = self.syntactic.parse_doc(doc)
+            parses.append({'trees': trees, 'heads': heads})
+        return parses
+
+    def cached_parse(self, refined_text):
+        """ parse() through the disk cache, remembering the last result for time_series(). """
+        if self._last_parse is None or self._last_parse[0] != refined_text:
+            self._last_parse = (refined_text, self._cached('parse', refined_text, lambda: self.parse(refined_text)))
+        return self._last_parse[1]
+
+    def constituency_parse(self, refined_text):
+        """ Concatenated benepar parse strings, one tree per sentence. """
+        return "".join(self.parse(refined_text)['trees'])
+
+    def syntactic_measures(self, sentences, return_sentences=False):
+        """
+        Mean Yngve, Frazier and SDL scores of a parsed Doc, a list of sentence
+        Spans, or a list of sentence strings (parsed here in one pipe call).
+        """
+        if isinstance(sentences, list) and sentences and isinstance(sentences[0], str):
+            sentences = [sent for doc in self.parser_nlp.pipe(sentences) for sent in doc.sents]
+        return self.syntactic.doc_complexity(sentences, return_sentences)
+
+    def model_identity(self, kind, **config):
+        """ Names of the models (and settings) that produce an artifact, for cache keys. """
+        import spacy
+
+        models = {
+            'punctuated': [self.punctuation_model_name, self.spell_model_name],
+            'parse': [self.parser_model_name, self.benepar_model_name, spacy.__version__],
+        }[kind]
+        return {'kind': kind, 'models': models, 'config': config}
+
+    def _cached(self, kind, value, compute, **config):
+        if self.cache is None:
+            return compute()
+        key = self.cache.key(value, self.model_identity(kind, **config))
+        return self.cache.cached(kind, key, compute)
+
+    def _cached_many(self, kind, values, compute, **config):
+        """ _cached() for a list of values; compute(misses) runs once on every uncached value. """
+        if self.cache is None:
+            return compute(values)
+        keys = [self.cache.key(value, self.model_identity(kind, **config)) for value in values]
+        results = [self.cache.get(kind, key) for key in keys]
+        misses = [i for i, result in enumerate(results) if result is None]
+        if misses:
+            for i, result in zip(misses, compute([values[i] for i in misses])):
+                self.cache.put(kind, keys[i], result)
+                results[i] = result
+        return results
+
+    def _timed(self, timing, stage, compute):
+        """ Run a stage, billing model loading to load_times rather than the stage. """
+        loading = sum(self.load_times.values())
+        start = time.perf_counter()
+        result = compute()
+        timing[stage] = time.perf_counter() - start - (sum(self.load_times.values()) - loading)
+        return result
+
+    def score(self, text, spell_check=False, measures='all'):
+        """
+        Run the full language pipeline on a raw transcript and return the
+        refined text, the parse trees and a dict of complexity measures.
+        measures='lexical' or 'syntactic' scores the text as given (no
+        punctuation or spell-check model) and computes only those measures;
+        the lexical ones need no parse.
+        """
+        timing = {'punctuation': 0.0, 'parse': 0.0}
+        if measures == 'all':
+            refined_text = self._timed(timing, 'punctuation', lambda: self._cached(
+                'punctuated', text, lambda: str(self.punctuate(text, spell_check)), spell_check=spell_check))
+        else:
+            refined_text = text
+
+        if measures == 'lexical':
+            parse = {'trees': [], 'heads': []}
+        else:
+            parse = self._timed(timing, 'parse', lambda: self.cached_parse(refined_text))
+
+        result = self.measures(refined_text, parse, timing, measures)
+        timing['total'] = sum(timing.values())
+        timing['sentences'] = len(parse['trees'])
+        self.timings.append(timing)
+        return refined_text, "".join(parse['trees']), result
+
+    def score_many(self, texts, spell_check=False, batch_size=32, punctuation_batch_size=64, measures='all'):
+        """
+        score() for a list of transcripts. Each model runs once over the whole
+        list: NeMo gets every uncached transcript in one call (batched by
+        punctuation_batch_size) and the spaCy pipelines stream them through
+        nlp.pipe(batch_size=batch_size). Returns a list of (refined_text,
+        parsed, measures) in the order of texts. With measures='lexical' the
+        whole list goes through one LexicalCorpus, and undefined measures are
+        NaN instead of raising.
+        """
+        batch = {'punctuation': 0.0, 'parse': 0.0}
+        if measures == 'all':
+            refined = self._timed(batch, 'punctuation', lambda: self._cached_many(
+                'punctuated', texts, lambda misses: self.punctuate_many(
+                    misses, spell_check, batch_size, punctuation_batch_size), spell_check=spell_check))
+        else:
+            refined = list(texts)
+
+        if measures == 'lexical':
+            from lexical_complexity import LEXICAL_MEASURES
+            from lexical_corpus import LexicalCorpus
+
+            parses = [{'trees': [], 'heads': []} for _ in texts]
+            table = self._timed(batch, 'lexical', lambda: LexicalCorpus(refined).measures())
+            lexical = table[LEXICAL_MEASURES].to_dict('records')
+        else:
+            parses = self._timed(batch, 'parse', lambda: self._cached_many(
+                'parse', refined, lambda misses: self.parse_many(misses, batch_size)))
+
+        results = []
+        for i, (refined_text, parse) in enumerate(zip(refined, parses)):
+            # the batched stages are billed evenly to every transcript
+            timing = {stage: seconds / len(texts) for stage, seconds in batch.items()}
+            if measures == 'lexical':
+                timing['syntactic'] = 0.0
+                result = lexical[i]
+            else:
+                result = self.measures(refined_text, parse, timing, measures)
+            timing['total'] = sum(timing.values())
+            timing['sentences'] = len(parse['trees'])
+            self.timings.append(timing)
+            results.append((refined_text, "".join(parse['trees']), result))
+        return results
+
+    def measures(self, refined_text, parse, timing, measures='all'):
+        """ Syntactic and/or lexical measures of a punctuated text and its parse(). """
+        syntactic, lexical = {}, {}
+        timing.setdefault('syntactic', 0.0)
+        timing.setdefault('lexical', 0.0)
+        if measures != 'lexical':
+            syntactic = self._timed(timing, 'syntactic', lambda: (
+                self.syntactic.sentence_measures(parse['trees'], parse['heads'])))
+        if measures != 'syntactic':
+            lexical = self._timed(timing, 'lexical', lambda: self.lexical.lexical_measures(refined_text))
+
+        result = {name: syntactic[name] for name in SUMMARY_MEASURES if name in syntactic}
+        result.update(lexical)
+        # The other syntactic measures follow, so existing columns keep their positions
+        result.update((name, value) for name, value in syntactic.items() if name not in result)
+        return result
+
+    def time_series(self, refined_text, word_times=None, window_tokens=50, window_sentences=1,
+                    window_seconds=None, step=1):
+        """
+        Sliding-window lexical (per token) and syntactic (per sentence) measures
+        of a punctuated text, as {'tokens': DataFrame, 'sentences': DataFrame}.
+        With word_times ([(start, end), ...] per ASR word) rows carry the time
+        of their last word and window_seconds can bound the windows by time.
+        """
+        import windowed
+
+        parse = self.cached_parse(refined_text)
+        analysis = self.lexical.analyze(refined_text)
+        return {
+            'tokens': windowed.lexical_series(analysis, window_tokens, window_seconds, word_times, step),
+            'sentences': windowed.syntactic_series(self.syntactic, refined_text, parse['trees'], parse['heads'],
+                                                   window_sentences, window_seconds, word_times),
+        }
+
+    def report(self):
+        """ Print model load time separately from the per-transcript time. """
+        load_total = sum(self.load_times.values())
+        print(f"\nModel load time: {load_total:.2f}s " +
+              ", ".join(f"{name}={seconds:.2f}s" for name, seconds in self.load_times.items()))
+        if self.timings:
+            n = len(self.timings)
+            per_transcript = sum(t['total'] for t in self.timings) / n
+            print(f"Scored {n} transcript(s), {per_transcript:.2f}s per transcript on average")
+            for stage in ['punctuation', 'parse', 'syntactic', 'lexical']:
+                print(f"  {stage}: {sum(t[stage] for t in self.timings) / n:.2f}s")
+            sentences = sum(t['sentences'] for t in self.timings)
+            seconds = sum(t['total'] for t in self.timings)
+            if seconds > 0:
+                print(f"  {sentences} sentences, {sentences / seconds:.1f} sentences/s")
+        if self._lexical is not None:
+            from lexical_complexity import lemma_cache
+
+            lemmas = lemma_cache.stats()
+            if lemmas['hits'] + lemmas['misses']:
+                print(f"Lemma cache: {lemmas['hit_rate']:.1%} hits, {lemmas['size']} types cached")
+        if self.cache is not None:
+            self.cache.report()
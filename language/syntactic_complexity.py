@@ -1,15 +1,29 @@
-from nltk.tree import Tree
-
-import spacy
 import numpy as np
 
-en_nlp = spacy.load('en_core_web_sm')
+from compact_tree import CompactTree
+from syntactic_measures import SyntacticMeasures
+
+
+def _tree(treestring):
+    # nltk (and spaCy in get_nlp) are slow to import; only the nltk.Tree based scorers need it
+    from nltk.tree import Tree
+    return Tree.fromstring(treestring)
+
 
 class Complexity():
-    def __init__(self):
+    def __init__(self, nlp=None):
         self.total_score = 0
-        
-    
+        # spaCy model used for the dependency based SDL score, loaded on first use
+        self.nlp = nlp
+        # Registered syntactic_measures, computed together by sentence_measures()
+        self.measures = SyntacticMeasures()
+
+    def get_nlp(self):
+        if self.nlp is None:
+            import spacy
+            self.nlp = spacy.load('en_core_web_sm')
+        return self.nlp
+
     def extract_sentences(self, trees):
         stack = 0
         startIndex = None
@@ -46,7 +60,7 @@ class Complexity():
         """
         For the given treestring, return the word count and the Yngve score.
         """
-        tree = Tree.fromstring(treestring)
+        tree = _tree(treestring)
         total = float(self.calc_yngve_score(tree, 0))
         words = float(self.word_score(tree))
 
@@ -115,7 +129,7 @@ class Complexity():
         for tree_line in treestrings:
             if tree_line.strip() == "":
                 continue
-            tree = Tree.fromstring(tree_line)
+            tree = _tree(tree_line)
             sentences += 1
             raw_frazier_score = self.calc_frazier_score(tree, 0, "")
 
@@ -130,31 +144,179 @@ class Complexity():
 
         return score
 
+    def score_tree(self, tree, yngve_parent=0, frazier_parent=0, parent_label=""):
+        """
+        Return the Yngve score, Frazier score and word count of a tree in a
+        single traversal. Matches calc_yngve_score, calc_frazier_score and
+        word_score applied separately.
+        """
+        if type(tree) == str:
+            return yngve_parent, frazier_parent - 1, 1
+
+        yngve, frazier, words = 0, 0, 0
+        current_label = tree.label()
+        last = len(tree) - 1
+        for i, child in enumerate(tree):
+            score = 0
+            if i == 0:
+                if self.is_sent(current_label):
+                    score = (0 if self.is_sent(parent_label) else frazier_parent + 1.5)
+                elif current_label != '' and current_label != "ROOT" and current_label != "TOP":
+                    score = frazier_parent + 1
+            child_yngve, child_frazier, child_words = self.score_tree(child, yngve_parent + last - i,
+                                                                      score, current_label)
+            yngve += child_yngve
+            frazier += child_frazier
+            words += child_words
+        return yngve, frazier, words
+
+    def score_sentences(self, treestrings):
+        """
+        Parse each tree string once (into a CompactTree, scored without
+        recursion) and return a list of [yngve, frazier, words] totals, one per
+        non-empty sentence.
+        """
+        if type(treestrings) != list:
+            raise ValueError('Input to score_sentences() must be a list of strings.')
+
+        scores = []
+        for tree_line in treestrings:
+            if tree_line.strip() == "":
+                continue
+            yngve, frazier, words = CompactTree(tree_line).scores()
+            scores.append([float(yngve), float(frazier), float(words)])
+        return scores
+
+    def mean_scores(self, scores):
+        """ Corpus level Yngve and Frazier means from score_sentences() output. """
+        total_yngve = sum(s[0] for s in scores)
+        total_frazier = sum(s[1] for s in scores)
+        total_words = sum(s[2] for s in scores)
+        if total_words == 0:
+            print('ZeroDivisionError for Yngve/Frazier calculation.')
+            return 0.0, 0.0
+        return total_yngve / total_words, total_frazier / total_words
+
     def dependency_length(self, node, depth):
         if node.n_lefts + node.n_rights > 0:
             return max(self.dependency_length(child, depth + 1) for child in node.children)
         else:
             return depth
 
-    def syntactic_complexity(self, trees):
+    def parse_dependencies(self, sentences, nlp=None):
+        """
+        Dependency parse of each tree string as a list of sentences, each a list
+        of head offsets within the sentence (the root is its own head).
+        """
+        en_nlp = nlp or self.get_nlp()
+        parses = []
+        for s in sentences:
+            doc = en_nlp(s)
+            parses.append([[token.head.i - sent.start for token in sent] for sent in doc.sents])
+        return parses
+
+    def tree_depth(self, heads):
+        """ Depth of the deepest token below the root; same as dependency_length(root, 0). """
+        depths = {}
+        for i in range(len(heads)):
+            path = []
+            j = i
+            while j not in depths and heads[j] != j:
+                path.append(j)
+                j = heads[j]
+            depth = depths.setdefault(j, 0)
+            for k in reversed(path):
+                depth += 1
+                depths[k] = depth
+        return max(depths.values()) if depths else 0
+
+    def syntactic_complexity(self, trees, return_sentences=False, dependencies=None):
+        """
+        Mean Yngve, Frazier and SDL scores for a blob of bracketed parse trees.
+        Every tree is parsed once, so the cost is linear in the number of
+        sentences. With return_sentences=True a list of per-sentence scores is
+        returned as a fourth value. dependencies may hold a cached
+        parse_dependencies() result for the same trees.
+        """
         sentences = self.extract_sentences(trees)
+        scores = self.score_sentences(sentences)
+        if dependencies is None:
+            dependencies = self.parse_dependencies(sentences)
+        return self.summarize(scores, dependencies, return_sentences)
 
-        yngve_scores = []
-        frazier_scores = []
+    def parse_doc(self, doc):
+        """
+        Bracketed tree string and dependency head offsets of every sentence of a
+        spaCy Doc (or list of sentence Spans) carrying benepar constituents and
+        dependency arcs from the same pass.
+        """
+        sents = doc.sents if hasattr(doc, 'sents') else doc
+        trees, heads = [], []
+        for sent in sents:
+            trees.append(sent._.parse_string)
+            heads.append([token.head.i - sent.start for token in sent])
+        return trees, heads
+
+    def sentence_complexity(self, trees, heads, return_sentences=False):
+        """ Mean Yngve, Frazier and SDL scores from parse_doc() output. """
+        pairs = [(tree, sentence_heads) for tree, sentence_heads in zip(trees, heads) if tree.strip() != ""]
+        scores = self.score_sentences([tree for tree, _ in pairs])
+        return self.summarize(scores, [[sentence_heads] for _, sentence_heads in pairs], return_sentences)
+
+    def doc_complexity(self, doc, return_sentences=False):
+        """
+        Mean Yngve, Frazier and SDL scores of a parsed spaCy Doc or list of
+        sentence Spans, without re-parsing anything.
+        """
+        trees, heads = self.parse_doc(doc)
+        return self.sentence_complexity(trees, heads, return_sentences)
+
+    def sentence_measures(self, trees, heads, return_sentences=False):
+        """
+        Every registered syntactic measure of parse_doc() output as a dict
+        (Yngve, Frazier and SDL means as in sentence_complexity(), dependency
+        distance, tree depth, clauses, T-units, phrase counts, ...), all from
+        one walk per sentence. With return_sentences=True the per-sentence
+        values are returned as a second value.
+        """
+        sentences = self.measures.score(trees, heads)
+        summary = self.measures.summarize(sentences)
+
+        print("Mean Yngve score = ", summary['Yngve_mean'])
+        print("Mean Frazier score = ", summary['Frazier_mean'])
+        print("Mean SDL score = ", summary['Mean Syntactic Dependency Length'])
+
+        if return_sentences:
+            return summary, sentences
+        return summary
+
+    def summarize(self, scores, dependencies, return_sentences=False):
+        """
+        Corpus means (and optionally per-sentence scores) from score_sentences()
+        output and the matching dependency head offsets.
+        """
         sdl = []
-        for s in sentences:
-            yngve_scores.append(self.get_mean_yngve(sentences))
-            frazier_scores.append(self.get_mean_frazier(sentences))
-            doc = en_nlp(s)
-            for sent in doc.sents:
-                sdl.append(self.dependency_length(sent.root, 0))
+        per_sentence = []
+        for (yngve, frazier, words), sentence_heads in zip(scores, dependencies):
+            sentence_sdl = [self.tree_depth(heads) for heads in sentence_heads]
+            sdl.extend(sentence_sdl)
+            per_sentence.append({
+                'yngve': yngve / words if words else 0.0,
+                'frazier': frazier / words if words else 0.0,
+                'words': int(words),
+                'sdl': float(np.mean(sentence_sdl)) if sentence_sdl else 0.0,
+            })
 
-        yngve_mean = np.mean(yngve_scores)
-        frazier_mean = np.mean(frazier_scores)
+        if scores:
+            yngve_mean, frazier_mean = self.mean_scores(scores)
+        else:
+            yngve_mean, frazier_mean = np.nan, np.nan
         sdl_mean = np.mean(sdl)
 
         print("Mean Yngve score = ", yngve_mean)
         print("Mean Frazier score = ", frazier_mean)
         print("Mean SDL score = ", sdl_mean)
 
-        return yngve_mean, frazier_mean, sdl_mean
\ No newline at end of file
+        if return_sentences:
+            return yngve_mean, frazier_mean, sdl_mean, per_sentence
+        return yngve_mean, frazier_mean, sdl_mean
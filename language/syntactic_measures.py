@@ -0,0 +1,313 @@
+from array import array
+
+import numpy as np
+
+from compact_tree import CompactTree, LABELS, LEAF
+
+# Clause and T-unit labels, after Lu (2010): SBARQ wraps an SQ clause
+CLAUSES = ('S', 'SINV', 'SQ')
+T_UNITS = CLAUSES + ('SBARQ',)
+PHRASE_TYPES = ['NP', 'VP', 'PP', 'ADJP', 'ADVP', 'SBAR']
+
+# Registered SentenceMeasure classes, in output order
+MEASURES = []
+
+
+def register(measure):
+    """ Class decorator adding a SentenceMeasure to the measures computed by default. """
+    MEASURES.append(measure)
+    return measure
+
+
+def measure_names(measures=None):
+    """ Output names of the registered (or given) measures, in order. """
+    return [name for measure in (measures or MEASURES) for name in measure.names]
+
+
+def _ratio(total, count):
+    return total / count if count else np.nan
+
+
+class SentenceMeasure():
+    """
+    A syntactic measure fed by SyntacticMeasures during its single walk over
+    each sentence. Subclasses override the events they need: start() before
+    a sentence, constituent(tree, i) for every phrase and part-of-speech node
+    of its CompactTree and word(tree, i) for every word (in preorder, so
+    parents come first), arc(dependent, head) for every dependency, and end()
+    returning the sentence's values as a dict. summarize() turns the list of
+    per-sentence dicts into the corpus measures listed in names.
+    """
+
+    names = []
+
+    def start(self, tree, heads):
+        pass
+
+    def constituent(self, tree, i):
+        pass
+
+    def word(self, tree, i):
+        pass
+
+    def arc(self, dependent, head):
+        pass
+
+    def end(self):
+        return {}
+
+    def summarize(self, sentences):
+        return {}
+
+
+@register
+class YngveFrazier(SentenceMeasure):
+    """ Yngve and Frazier totals per sentence, as in CompactTree.scores(). """
+
+    names = ['Yngve_mean', 'Frazier_mean']
+
+    def start(self, tree, heads):
+        self.yngve = array('i', [0]) * len(tree)
+        self.frazier = array('d', [0.0]) * len(tree)
+        self.totals = [0, 0.0, 0]
+
+    def constituent(self, tree, i):
+        p = tree.parent[i]
+        if p < 0:
+            return
+        self.yngve[i] = self.yngve[p] + tree.n_children[p] - 1 - tree.position[i]
+        if tree.position[i] == 0:
+            parent_label = tree.label[p]
+            if LABELS.sentence[parent_label]:
+                grandparent = tree.parent[p]
+                self.frazier[i] = (0 if grandparent >= 0 and LABELS.sentence[tree.label[grandparent]]
+                                   else self.frazier[p] + 1.5)
+            elif not LABELS.neutral[parent_label]:
+                self.frazier[i] = self.frazier[p] + 1
+
+    def word(self, tree, i):
+        self.constituent(tree, i)
+        self.totals[0] += self.yngve[i]
+        self.totals[1] += self.frazier[i] - 1
+        self.totals[2] += 1
+
+    def end(self):
+        yngve, frazier, words = self.totals
+        return {'yngve': yngve, 'frazier': frazier, 'words': words}
+
+    def summarize(self, sentences):
+        if not sentences:
+            return {'Yngve_mean': np.nan, 'Frazier_mean': np.nan}
+        words = sum(s['words'] for s in sentences)
+        if words == 0:
+            return {'Yngve_mean': 0.0, 'Frazier_mean': 0.0}
+        return {'Yngve_mean': sum(s['yngve'] for s in sentences) / words,
+                'Frazier_mean': sum(s['frazier'] for s in sentences) / words}
+
+
+@register
+class DependencyDepth(SentenceMeasure):
+    """ Depth of the deepest token below the root (SDL), as in Complexity.tree_depth(). """
+
+    names = ['Mean Syntactic Dependency Length']
+
+    def start(self, tree, heads):
+        self.heads = heads
+        self.depths = {}
+
+    def arc(self, dependent, head):
+        heads, depths = self.heads, self.depths
+        path = []
+        j = dependent
+        while j not in depths and heads[j] != j:
+            path.append(j)
+            j = heads[j]
+        depth = depths.setdefault(j, 0)
+        for k in reversed(path):
+            depth += 1
+            depths[k] = depth
+
+    def end(self):
+        return {'sdl': max(self.depths.values()) if self.depths else 0}
+
+    def summarize(self, sentences):
+        return {'Mean Syntactic Dependency Length': _ratio(sum(s['sdl'] for s in sentences), len(sentences))}
+
+
+@register
+class DependencyDistance(SentenceMeasure):
+    """ Linear distance between each word and its head, the root excluded. """
+
+    names = ['Mean Dependency Distance']
+
+    def start(self, tree, heads):
+        self.distance, self.arcs = 0, 0
+
+    def arc(self, dependent, head):
+        if dependent != head:
+            self.distance += abs(dependent - head)
+            self.arcs += 1
+
+    def end(self):
+        return {'dependency_distance': self.distance, 'arcs': self.arcs}
+
+    def summarize(self, sentences):
+        return {'Mean Dependency Distance': _ratio(sum(s['dependency_distance'] for s in sentences),
+                                                   sum(s['arcs'] for s in sentences))}
+
+
+@register
+class TreeDepth(SentenceMeasure):
+    """ Height of the constituency tree, counted as in nltk.Tree.height(). """
+
+    names = ['Mean Tree Depth', 'Max Tree Depth']
+
+    def start(self, tree, heads):
+        self.depths = array('i', [0]) * len(tree)
+        self.max_depth = 0
+
+    def constituent(self, tree, i):
+        p = tree.parent[i]
+        if p >= 0:
+            self.depths[i] = self.depths[p] + 1
+
+    def word(self, tree, i):
+        depth = self.depths[i] = self.depths[tree.parent[i]] + 1
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def end(self):
+        return {'depth': self.max_depth + 1}
+
+    def summarize(self, sentences):
+        depths = [s['depth'] for s in sentences]
+        return {'Mean Tree Depth': _ratio(sum(depths), len(depths)),
+                'Max Tree Depth': max(depths) if depths else np.nan}
+
+
+@register
+class Clauses(SentenceMeasure):
+    """
+    Clauses (S, SINV, SQ) and T-units: main clauses that are not below an
+    SBAR, VP or other phrase. Clauses coordinated directly under a main
+    clause are one T-unit each. The subordination index is clauses per T-unit.
+    """
+
+    names = ['Clauses per Sentence', 'T-units', 'Subordination Index']
+
+    def __init__(self):
+        self.clause_ids = frozenset(LABELS.intern(label) for label in CLAUSES)
+        self.t_unit_ids = frozenset(LABELS.intern(label) for label in T_UNITS)
+
+    def start(self, tree, heads):
+        # main[i]: node i is reached from the root through T-unit or neutral labels only
+        self.main = array('b', [0]) * len(tree)
+        self.coordinated = set()
+        self.clauses, self.t_units = 0, 0
+
+    def constituent(self, tree, i):
+        label = tree.label[i]
+        if label in self.clause_ids:
+            self.clauses += 1
+        p = tree.parent[i]
+        if p < 0:
+            self.main[i] = 1
+        else:
+            parent_label = tree.label[p]
+            self.main[i] = self.main[p] and (parent_label in self.t_unit_ids or LABELS.neutral[parent_label])
+        if not (self.main[i] and label in self.t_unit_ids):
+            return
+        if p >= 0 and tree.label[p] in self.t_unit_ids:
+            # a clause directly inside a main clause: the first one replaces it, the others add to it
+            if p in self.coordinated:
+                self.t_units += 1
+            self.coordinated.add(p)
+        else:
+            self.t_units += 1
+
+    def end(self):
+        return {'clauses': self.clauses, 't_units': self.t_units}
+
+    def summarize(self, sentences):
+        clauses = sum(s['clauses'] for s in sentences)
+        t_units = sum(s['t_units'] for s in sentences)
+        return {'Clauses per Sentence': _ratio(clauses, len(sentences)),
+                'T-units': t_units,
+                'Subordination Index': _ratio(clauses, t_units)}
+
+
+@register
+class PhraseCounts(SentenceMeasure):
+    """ Number of NP, VP, PP, ADJP, ADVP and SBAR constituents. """
+
+    names = [phrase + '_count' for phrase in PHRASE_TYPES]
+
+    def __init__(self):
+        self.phrase_ids = {LABELS.intern(phrase): n for n, phrase in enumerate(PHRASE_TYPES)}
+
+    def start(self, tree, heads):
+        self.counts = [0] * len(PHRASE_TYPES)
+
+    def constituent(self, tree, i):
+        n = self.phrase_ids.get(tree.label[i])
+        if n is not None:
+            self.counts[n] += 1
+
+    def end(self):
+        return dict(zip(self.names, self.counts))
+
+    def summarize(self, sentences):
+        return {name: sum(s[name] for s in sentences) for name in self.names}
+
+
+class SyntacticMeasures():
+    """
+    Computes every registered measure in one walk per sentence: one preorder
+    loop over the CompactTree nodes and one loop over the dependency arcs,
+    each event dispatched only to the measures that override it. Adding a
+    measure adds handlers to those loops, not another pass.
+    """
+
+    def __init__(self, measures=None):
+        self.measures = [measure() for measure in (measures or MEASURES)]
+        self.names = measure_names(measures)
+        self.starts = self._handlers('start')
+        self.constituents = self._handlers('constituent')
+        self.words = self._handlers('word')
+        self.arcs = self._handlers('arc')
+
+    def _handlers(self, event):
+        base = getattr(SentenceMeasure, event)
+        return [getattr(m, event) for m in self.measures if getattr(type(m), event) is not base]
+
+    def sentence(self, treestring, heads):
+        """ Per-sentence values of every measure for one tree string and its head offsets. """
+        tree = CompactTree(treestring)
+        for handler in self.starts:
+            handler(tree, heads)
+
+        constituents, words = self.constituents, self.words
+        label = tree.label
+        for i in range(len(tree)):
+            for handler in (words if label[i] == LEAF else constituents):
+                handler(tree, i)
+        for dependent, head in enumerate(heads):
+            for handler in self.arcs:
+                handler(dependent, head)
+
+        values = {}
+        for measure in self.measures:
+            values.update(measure.end())
+        return values
+
+    def score(self, trees, heads):
+        """ sentence() for every non-empty tree, paired with its heads. """
+        return [self.sentence(tree, sentence_heads) for tree, sentence_heads in zip(trees, heads)
+                if tree.strip() != ""]
+
+    def summarize(self, sentences):
+        """ Corpus measures, keyed by name in registration order, from score() output. """
+        summary = {}
+        for measure in self.measures:
+            summary.update(measure.summarize(sentences))
+        return {name: summary[name] for name in self.names}
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import batch
+
+
+class FakePipeline():
+    def __init__(self, **kwargs):
+        pass
+
+    def score(self, text, spell_check=False, measures='all'):
+        if text == 'boom':
+            raise RuntimeError('bad transcript')
+        return text, '', {'Yngve_mean': float(len(text.split())), 'Frazier_mean': 1.0}
+
+    def score_many(self, texts, spell_check=False, batch_size=32, punctuation_batch_size=64, measures='all'):
+        return [self.score(text, spell_check, measures) for text in texts]
+
+    def report(self):
+        pass
+
+
+def init_fake_worker(*args):
+    pass
+
+
+def score_or_crash(path):
+    """ Stands in for batch._score_file in spawned workers; 'crash' kills the worker like the OOM killer. """
+    text = batch._read(path)
+    if text == 'crash':
+        os._exit(1)
+    return {'transcript': path, 'error': None, 'Yngve_mean': float(len(text.split())), 'seconds': 0.0}
+
+
+class BatchTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = []
+        for name, text in [('b.txt', 'the dog runs'), ('a.txt', 'boom'), ('c.txt', 'a cat')]:
+            path = os.path.join(self.tmp.name, name)
+            with open(path, 'w') as fp:
+                fp.write(text)
+            self.paths.append(path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_list_transcripts(self):
+        actual = batch.list_transcripts(self.tmp.name)
+        self.assertEqual(sorted(self.paths), actual)
+
+        manifest = os.path.join(self.tmp.name, 'manifest.lst')
+        with open(manifest, 'w') as fp:
+            fp.write('c.txt\n\n# skipped\nb.txt\n')
+        actual = batch.list_transcripts(manifest=manifest)
+        self.assertEqual([self.paths[2], self.paths[0]], actual)
+
+    def test_score_transcripts_isolates_failures(self):
+        with mock.patch.object(batch, 'LanguagePipeline', FakePipeline):
+            table = batch.score_transcripts(self.paths, workers=1)
+
+        self.assertEqual(self.paths, list(table['transcript']))
+        self.assertEqual(['transcript', 'Yngve_mean', 'Frazier_mean', 'seconds', 'error'], list(table.columns))
+        self.assertEqual(3.0, table['Yngve_mean'][0])
+        self.assertIn('bad transcript', table['error'][1])
+        self.assertTrue(table['error'][[0, 2]].isna().all())
+
+    def test_score_transcripts_survives_dead_worker(self):
+        crash = os.path.join(self.tmp.name, 'crash.txt')
+        with open(crash, 'w') as fp:
+            fp.write('crash')
+        # A manifest may list the same transcript twice
+        paths = [self.paths[0], crash, self.paths[2], self.paths[0]]
+        with mock.patch.object(batch, '_init_worker', init_fake_worker), \
+                mock.patch.object(batch, '_score_file', score_or_crash):
+            table = batch.score_transcripts(paths, workers=2)
+
+        self.assertEqual(paths, list(table['transcript']))
+        self.assertEqual([3.0, 2.0, 3.0], list(table['Yngve_mean'][[0, 2, 3]]))
+        self.assertTrue(table['error'][[0, 2, 3]].isna().all())
+        self.assertIn('BrokenProcessPool', table['error'][1])
+
+    def test_score_transcripts_batched(self):
+        with mock.patch.object(batch, 'LanguagePipeline', FakePipeline):
+            table = batch.score_transcripts_batched(self.paths[:1] + self.paths[2:] + [self.paths[1]], chunk_size=2)
+
+        self.assertEqual(['the dog runs', 'a cat', 'boom'],
+                         [open(path).read() for path in table['transcript']])
+        self.assertEqual([3.0, 2.0], list(table['Yngve_mean'][:2]))
+        self.assertTrue(table['error'][:2].isna().all())
+        self.assertIn('bad transcript', table['error'][2])
+
+
+if __name__ == '__main__':
+    unittest.main()
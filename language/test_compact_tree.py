@@ -0,0 +1,49 @@
+import sys
+import unittest
+
+from nltk.tree import Tree
+from compact_tree import CompactTree
+from syntactic_complexity import Complexity
+
+PARSES = [
+    '( (S (NP (NNP Colorless) (JJ green) (NNS ideas)) (VP (VBP sleep) (ADVP (RB furiously)))) )',
+    '(S (RB So) (NP (NP (CD 4) (JJ o) (NN ’) (NN clock)) (PP (IN in) (NP (DT the) (NN morning)))))',
+    '(TOP (S (NP (PRP I)) (VP (VBD said) (SBAR (IN that) (S (NP (PRP he)) (VP (VBD left))))) (. .)))',
+    '(ROOT (FRAG (NP (DT the) (NN cookie) (NN jar)) (. .)))',
+]
+
+
+class CompactTreeTestCase(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(CompactTreeTestCase, self).__init__(*args, **kwargs)
+
+        self.complexity = Complexity()
+
+    def test_matches_nltk_tree(self):
+        for parse in PARSES:
+            tree, compact = Tree.fromstring(parse), CompactTree(parse)
+            self.assertEqual(self.complexity.score_tree(tree), compact.scores())
+            self.assertEqual(tree.leaves(), compact.leaves())
+            self.assertEqual(tree.height(), compact.height())
+            self.assertEqual(self.complexity.word_score(tree), compact.word_count())
+
+    def test_scores(self):
+        self.assertEqual((7, 4.5, 5), CompactTree(PARSES[0]).scores())
+
+    def test_deep_tree(self):
+        depth = sys.getrecursionlimit() * 2
+        parse = '(S ' * depth + 'word' + ')' * depth
+        tree = CompactTree(parse)
+        self.assertEqual(depth + 1, tree.height())
+        self.assertEqual(1, tree.word_count())
+        self.assertEqual(0, tree.scores()[0])
+
+    def test_malformed(self):
+        for parse in ['(S (NP (NN dog))', '(S (NN dog)))', '(S (NN dog)) (S (NN cat))', 'dog', '']:
+            with self.assertRaises(ValueError):
+                CompactTree(parse)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,10 @@
 import unittest
+from unittest import mock
 
 from nltk.tree import Tree
-from lexical_complexity import LexicalComplexity
+import nltk
+import lexical_complexity
+from lexical_complexity import AnalyzedText, LemmaCache, LexicalComplexity
 
 class LexicalComplexityTest(unittest.TestCase):
     def __init__(self, *args, **kwargs):
@@ -46,6 +49,57 @@ class LexicalComplexityTest(unittest.TestCase):
         actual = self.complexity.calculate_coleman_liau_index(sent)
         self.assertEqual(expected, round(actual, 3))
 
+    def test_analyze(self):
+        sent = "Colorless green ideas sleep furiously. Trees leaves are green."
+
+        analysis = self.complexity.analyze(sent)
+        self.assertIsInstance(analysis, AnalyzedText)
+        self.assertIs(analysis, self.complexity.analyze(analysis))
+        self.assertEqual(11, analysis.num_tokens)
+        self.assertEqual(2, analysis.num_sentences)
+        self.assertEqual(round(self.complexity.calculate_brunet_index(sent), 3),
+                         round(self.complexity.calculate_brunet_index(analysis), 3))
+
+    def test_get_lexical_measures_single_pass(self):
+        sent = "Colorless green ideas sleep furiously. Trees leaves are green."
+
+        with mock.patch.object(nltk, 'pos_tag', wraps=nltk.pos_tag) as pos_tag:
+            measures = self.complexity.get_lexical_measures(sent)
+        self.assertEqual(1, pos_tag.call_count)
+        self.assertEqual(0.818, round(measures[1], 3))
+        self.assertEqual(390.197, round(measures[2], 3))
+
+    def test_readability_skips_nlp_pass(self):
+        sent = "Colorless green ideas sleep furiously. Trees leaves are green."
+
+        with mock.patch.object(nltk, 'word_tokenize') as word_tokenize:
+            self.complexity.automatic_readability_index(sent)
+            self.complexity.calculate_coleman_liau_index(sent)
+            self.assertEqual(4.5, self.complexity.calculate_word_to_sentence_ration(sent))
+        word_tokenize.assert_not_called()
+
+    def test_get_frequency_counts(self):
+        sent = "She saw the dog while walking the cat."
+        tags = ['PRP', 'VBD', 'DT', 'NN', 'IN', 'VBG', 'DT', 'NN', '.']
+
+        with mock.patch.object(nltk, 'pos_tag', side_effect=lambda tokens: list(zip(tokens, tags))):
+            counts = self.complexity.get_frequency_counts(sent)
+        self.assertEqual(0.5, counts['Pronoun to noun ratio'])
+        self.assertEqual(1, counts['Gerund count'])
+        self.assertEqual({'NP_chunks': 0, 'VP_chunks': 1, 'VPG_chunks': 1},
+                         {k: counts[k] for k in ['NP_chunks', 'VP_chunks', 'VPG_chunks']})
+
+    def test_lemma_cache(self):
+        cache = LemmaCache(max_size=2)
+        with mock.patch.object(lexical_complexity, 'lmtzr') as lemmatizer:
+            lemmatizer.lemmatize.side_effect = lambda token, pos: token.rstrip('s') + pos
+            self.assertEqual(['treen', 'treen', 'runv', 'leafn', 'treen'],
+                             [cache.lemmatize(token, pos) for token, pos in
+                              [('trees', 'n'), ('trees', 'n'), ('runs', 'v'), ('leafs', 'n'), ('trees', 'n')]])
+        # ('trees', 'n') was evicted by the third distinct key and lemmatized again
+        self.assertEqual(4, lemmatizer.lemmatize.call_count)
+        self.assertEqual({'size': 2, 'hits': 1, 'misses': 4, 'hit_rate': 0.2}, cache.stats())
+
 
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+
+from lexical_complexity import LexicalComplexity
+from lexical_corpus import LexicalCorpus
+
+
+class LexicalCorpusTest(unittest.TestCase):
+
+    def setUp(self):
+        self.texts = ["Colorless green ideas sleep furiously. Trees leaves are green.",
+                      "The boy is taking cookies. The stool is falling. The mother is washing dishes.",
+                      "She dried the dishes and looked out of the window?"]
+
+    def test_measures_match_get_lexical_measures(self):
+        complexity = LexicalComplexity()
+        table = LexicalCorpus(self.texts).measures()
+        self.assertEqual(len(self.texts), len(table))
+        for i, text in enumerate(self.texts):
+            ttr_lematized, ttr, honore_statistics, ARI, brunet_index, CLI = complexity.get_lexical_measures(text)
+            row = table.iloc[i]
+            self.assertAlmostEqual(ttr, row['Type to token ratio'])
+            self.assertAlmostEqual(ttr_lematized, row['Type to token ratio: Lemmatized text'])
+            self.assertAlmostEqual(honore_statistics, row['honore_statistics'])
+            self.assertAlmostEqual(ARI, row['Automatic Readability Index'])
+            self.assertAlmostEqual(brunet_index, row['brunet_index'])
+            self.assertAlmostEqual(CLI, row['Coleman Liau\'s index'])
+
+    def test_empty_text_is_nan(self):
+        table = LexicalCorpus(["", self.texts[0]]).measures()
+        self.assertTrue(np.isnan(table['Type to token ratio'][0]))
+        self.assertEqual(0.818, round(table['Type to token ratio'][1], 3))
+
+    def test_reference_coverage(self):
+        corpus = LexicalCorpus(["the boy the dog", "a cat"])
+        coverage = corpus.reference_coverage({'the', 'boy', 'a'}, lemmas=False)
+        np.testing.assert_allclose([0.75, 0.5], coverage)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,57 @@
+import os
+import sys
+import subprocess
+import unittest
+from unittest import mock
+
+from pipeline import LanguagePipeline
+
+LANGUAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+HEAVY = ['torch', 'spacy', 'nemo', 'benepar', 'contextualSpellCheck', 'transformers']
+
+
+def import_in_subprocess(statement):
+    """ Seconds taken by statement in a fresh interpreter, and the top-level packages it loaded. """
+    code = ("import sys, time\n"
+            "start = time.perf_counter()\n"
+            f"{statement}\n"
+            "print(time.perf_counter() - start)\n"
+            "print(' '.join(sorted({name.split('.')[0] for name in sys.modules})))")
+    output = subprocess.run([sys.executable, '-c', code], cwd=LANGUAGE_DIR, check=True,
+                            capture_output=True, text=True).stdout.splitlines()
+    return float(output[-2]), set(output[-1].split())
+
+
+class StartupTestCase(unittest.TestCase):
+
+    def test_main_imports_no_models(self):
+        seconds, modules = import_in_subprocess("import main")
+        self.assertFalse(modules & set(HEAVY + ['nltk', 'pandas']))
+        self.assertLess(seconds, 1.5, f"import main took {seconds:.2f}s")
+
+    def test_lexical_imports_no_models(self):
+        _, modules = import_in_subprocess("from lexical_complexity import LexicalComplexity")
+        self.assertFalse(modules & set(HEAVY))
+
+    def test_measure_sets_skip_models(self):
+        pipeline = LanguagePipeline()
+        pipeline._lexical = mock.Mock()
+        pipeline._lexical.lexical_measures.return_value = {'Type to token ratio': 0.5}
+        parse = {'trees': ['(S (NP (PRP He)) (VP (VBD left)))'], 'heads': [[1, 1]]}
+
+        with mock.patch.object(LanguagePipeline, 'load_punctuation_model') as punctuation, \
+                mock.patch.object(LanguagePipeline, 'parse', return_value=parse) as parsed:
+            _, parsed_text, lexical = pipeline.score("he left", measures='lexical')
+            refined_text, _, syntactic = pipeline.score("he left", measures='syntactic')
+
+        punctuation.assert_not_called()
+        parsed.assert_called_once_with("he left")
+        self.assertEqual(('', {'Type to token ratio': 0.5}), (parsed_text, lexical))
+        self.assertEqual("he left", refined_text)
+        self.assertEqual(1.0, syntactic['Mean Syntactic Dependency Length'])
+        self.assertNotIn('Type to token ratio', syntactic)
+        self.assertEqual({}, pipeline.load_times)
+
+
+if __name__ == '__main__':
+    unittest.main()
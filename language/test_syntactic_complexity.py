@@ -59,5 +59,40 @@ class ComplexityTestCase(unittest.TestCase):
         actual = self.complexity.calc_frazier_score("Hi!", 0, '')
         self.assertEqual(expected, actual)
 
+    def test_score_tree(self):
+        parse = ['( (S (NP (NNP Colorless) (JJ green) (NNS ideas)) (VP (VBP sleep) (ADVP (RB furiously)))) )']
+
+        expected = (7, 4.5, 5)
+        actual = self.complexity.score_tree(Tree.fromstring(parse[0]))
+        self.assertEqual(expected, actual)
+
+    def test_score_sentences(self):
+        parse = ['( (S (NP (NNP Colorless) (JJ green) (NNS ideas)) (VP (VBP sleep) (ADVP (RB furiously)))) )',
+                 '(S (RB So) (NP (NP (CD 4) (JJ o) (NN ’) (NN clock)) (PP (IN in) (NP (DT the) (NN morning)))))']
+
+        scores = self.complexity.score_sentences(parse)
+        self.assertEqual(2, len(scores))
+        yngve_mean, frazier_mean = self.complexity.mean_scores(scores)
+        self.assertEqual(self.complexity.get_mean_yngve(parse), yngve_mean)
+        self.assertEqual(self.complexity.get_mean_frazier(parse), frazier_mean)
+
+    def test_tree_depth(self):
+        # "Colorless green ideas sleep furiously": sleep is the root, ideas its subject
+        heads = [2, 2, 3, 3, 3]
+        self.assertEqual(2, self.complexity.tree_depth(heads))
+        self.assertEqual(0, self.complexity.tree_depth([0]))
+
+    def test_sentence_complexity(self):
+        trees = ['(S (NP (NNP Colorless) (JJ green) (NNS ideas)) (VP (VBP sleep) (ADVP (RB furiously))))',
+                 '(S (NP (PRP He)) (VP (VBD left)))']
+        heads = [[2, 2, 3, 3, 3], [1, 1]]
+
+        yngve_mean, frazier_mean, sdl_mean, sentences = self.complexity.sentence_complexity(
+            trees, heads, return_sentences=True)
+        self.assertEqual(self.complexity.get_mean_yngve(trees), yngve_mean)
+        self.assertEqual(self.complexity.get_mean_frazier(trees), frazier_mean)
+        self.assertEqual(1.5, sdl_mean)
+        self.assertEqual([2.0, 1.0], [s['sdl'] for s in sentences])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,77 @@
+import unittest
+
+from compact_tree import CompactTree
+from syntactic_complexity import Complexity
+from syntactic_measures import SentenceMeasure, SyntacticMeasures, MEASURES, measure_names
+
+TREES = ['(S (NP (NNP Colorless) (JJ green) (NNS ideas)) (VP (VBP sleep) (ADVP (RB furiously))))',
+         '(TOP (S (NP (PRP I)) (VP (VBD said) (SBAR (IN that) (S (NP (PRP he)) (VP (VBD left)))))))']
+HEADS = [[2, 2, 3, 3, 3], [1, 1, 4, 4, 1]]
+
+
+class WordCount(SentenceMeasure):
+    names = ['Words per Sentence']
+
+    def start(self, tree, heads):
+        self.words = 0
+
+    def word(self, tree, i):
+        self.words += 1
+
+    def end(self):
+        return {'word_count': self.words}
+
+    def summarize(self, sentences):
+        return {'Words per Sentence': sum(s['word_count'] for s in sentences) / len(sentences)}
+
+
+class SyntacticMeasuresTestCase(unittest.TestCase):
+
+    def __init__(self, *args, **kwargs):
+        super(SyntacticMeasuresTestCase, self).__init__(*args, **kwargs)
+
+        self.complexity = Complexity()
+
+    def test_matches_sentence_complexity(self):
+        yngve_mean, frazier_mean, sdl_mean = self.complexity.sentence_complexity(TREES, HEADS)
+        measures, sentences = self.complexity.sentence_measures(TREES, HEADS, return_sentences=True)
+
+        self.assertEqual(measure_names(), list(measures))
+        self.assertEqual(yngve_mean, measures['Yngve_mean'])
+        self.assertEqual(frazier_mean, measures['Frazier_mean'])
+        self.assertEqual(sdl_mean, measures['Mean Syntactic Dependency Length'])
+        self.assertEqual([CompactTree(tree).height() for tree in TREES], [s['depth'] for s in sentences])
+
+    def test_measures(self):
+        measures = self.complexity.sentence_measures(TREES, HEADS)
+
+        # (2 + 1 + 1 + 1) + (1 + 2 + 1 + 3) over the 8 non-root arcs
+        self.assertEqual(12 / 8, measures['Mean Dependency Distance'])
+        self.assertEqual(8, measures['Max Tree Depth'])
+        self.assertEqual(1.5, measures['Clauses per Sentence'])
+        self.assertEqual(2, measures['T-units'])
+        self.assertEqual(1.5, measures['Subordination Index'])
+        self.assertEqual(3, measures['NP_count'])
+        self.assertEqual(1, measures['SBAR_count'])
+
+    def test_t_units(self):
+        coordinated = '(TOP (S (S (NP (PRP I)) (VP (VBD ran))) (CC and) (S (NP (PRP she)) (VP (VBD left)))))'
+        question = '(TOP (SBARQ (WHNP (WP What)) (SQ (VBD did) (NP (PRP you)) (VP (VB see)))))'
+        fragment = '(TOP (FRAG (NP (DT the) (NN cookie))))'
+        sentences = SyntacticMeasures().score([coordinated, question, fragment], [[0] * 5, [0] * 4, [0] * 2])
+        self.assertEqual([(3, 2), (1, 1), (0, 0)], [(s['clauses'], s['t_units']) for s in sentences])
+
+    def test_custom_measure(self):
+        measures = SyntacticMeasures(MEASURES + [WordCount])
+        summary = measures.summarize(measures.score(TREES + [' '], HEADS + [[]]))
+        self.assertEqual(5.0, summary['Words per Sentence'])
+        self.assertEqual(measure_names() + ['Words per Sentence'], list(summary))
+
+    def test_empty(self):
+        measures = self.complexity.sentence_measures([], [])
+        self.assertEqual(0, measures['T-units'])
+        self.assertNotEqual(measures['Yngve_mean'], measures['Yngve_mean'])
+
+
+if __name__ == '__main__':
+    unittest.main()
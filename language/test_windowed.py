@@ -0,0 +1,68 @@
+import math
+import unittest
+from collections import Counter
+from types import SimpleNamespace
+
+import windowed
+from syntactic_complexity import Complexity
+
+
+class WindowedTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.complexity = Complexity()
+
+    def test_sliding_window(self):
+        window = windowed.SlidingWindow(size=2)
+        self.assertEqual([], window.push('a'))
+        self.assertEqual([], window.push('b'))
+        self.assertEqual(['a'], window.push('c'))
+
+        window = windowed.SlidingWindow(seconds=1.0)
+        window.push('a', 0.0)
+        window.push('b', 0.5)
+        self.assertEqual(['a'], window.push('c', 1.2))
+
+    def test_lexical_series_matches_recomputing_each_window(self):
+        tokens = "the cat saw the dog and the dog saw a cat , then it ran".split()
+        lemmas = [t[:-1] if t.endswith('s') else t for t in tokens]
+        analysis = SimpleNamespace(text=" ".join(tokens), tokens=tokens, lemmas=lemmas)
+
+        series = windowed.lexical_series(analysis, size=5)
+        self.assertEqual(len(tokens), len(series))
+        for i, row in series.iterrows():
+            window_tokens = tokens[max(0, i - 4):i + 1]
+            window_lemmas = lemmas[max(0, i - 4):i + 1]
+            n = len(window_tokens)
+            lemma_counts = Counter(window_lemmas)
+            self.assertEqual(n, row['tokens'])
+            self.assertAlmostEqual(len(set(window_tokens)) / n, row['Type to token ratio'])
+            self.assertAlmostEqual(len(lemma_counts) / n, row['Type to token ratio: Lemmatized text'])
+            self.assertEqual(sum(1 for c in lemma_counts.values() if c == 1), row['hapax_lemmas'])
+            self.assertAlmostEqual(len(lemma_counts) ** (n ** -0.0165), row['brunet_index'])
+
+    def test_syntactic_series(self):
+        trees = ['(S (NP (NNP Colorless) (JJ green) (NNS ideas)) (VP (VBP sleep) (ADVP (RB furiously))))',
+                 '(S (NP (PRP He)) (VP (VBD left)))',
+                 '(S (NP (PRP She)) (VP (VBD stayed)))']
+        heads = [[2, 2, 3, 3, 3], [1, 1], [1, 1]]
+        text = "Colorless green ideas sleep furiously He left She stayed"
+        word_times = [(i, i + 0.5) for i in range(9)]
+
+        series = windowed.syntactic_series(self.complexity, text, trees, heads, size=2, word_times=word_times)
+        self.assertEqual([4.5, 6.5, 8.5], list(series['time']))
+        for i in range(3):
+            window = slice(max(0, i - 1), i + 1)
+            expected = self.complexity.sentence_complexity(trees[window], heads[window])
+            actual = series.loc[i, ['Yngve_mean', 'Frazier_mean', 'Mean Syntactic Dependency Length']]
+            for e, a in zip(expected, actual):
+                self.assertTrue(math.isclose(e, a))
+
+    def test_align_tokens(self):
+        text = 'He said "hi." Then left'
+        tokens = ['He', 'said', '``', 'hi', '.', "''", 'Then', 'left']
+        self.assertEqual([0, 1, 1, 2, 2, 2, 3, 4], windowed.align_tokens(text, tokens))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+import re
+import math
+from bisect import bisect_right
+from collections import Counter, deque
+
+import pandas as pd
+
+from compact_tree import CompactTree
+
+
+class SlidingWindow():
+    """ Items in arrival order, evicted once there are more than size of them or they are older than seconds. """
+
+    def __init__(self, size=None, seconds=None):
+        self.size = size
+        self.seconds = seconds
+        self.items = deque()
+
+    def __len__(self):
+        return len(self.items)
+
+    def push(self, item, time=None):
+        """ Append item and return the items that fell out of the window. """
+        self.items.append((time, item))
+        expired = []
+        while self.items:
+            oldest = self.items[0][0]
+            too_many = self.size is not None and len(self.items) > self.size
+            too_old = (self.seconds is not None and time is not None and oldest is not None
+                       and oldest <= time - self.seconds)
+            if not (too_many or too_old):
+                break
+            expired.append(self.items.popleft()[1])
+        return expired
+
+
+class RunningLexical():
+    """
+    Type, lemma and hapax counts over a sliding window of tokens. Every push
+    updates the counters in O(1), so the window measures never rescan tokens.
+    Measures follow LexicalComplexity (Honore uses token types and lemma hapax).
+    """
+
+    def __init__(self, size=None, seconds=None):
+        self.window = SlidingWindow(size, seconds)
+        self.token_counts = Counter()
+        self.lemma_counts = Counter()
+        self.lemma_hapax = 0
+
+    def _add(self, counts, item, delta):
+        count = counts[item] + delta
+        if count:
+            counts[item] = count
+        else:
+            del counts[item]
+        return count
+
+    def _update(self, token, lemma, delta):
+        self._add(self.token_counts, token, delta)
+        before = self.lemma_counts[lemma]
+        after = self._add(self.lemma_counts, lemma, delta)
+        self.lemma_hapax += (after == 1) - (before == 1)
+
+    def push(self, token, lemma, time=None):
+        self._update(token, lemma, 1)
+        for old_token, old_lemma in self.window.push((token, lemma), time):
+            self._update(old_token, old_lemma, -1)
+
+    def measures(self):
+        n = len(self.window)
+        v = len(self.token_counts)
+        vl = len(self.lemma_counts)
+        v1 = self.lemma_hapax
+        return {
+            'tokens': n,
+            'types': v,
+            'hapax_lemmas': v1,
+            'Type to token ratio': v / n,
+            'Type to token ratio: Lemmatized text': vl / n,
+            'honore_statistics': 100 * math.log(n / (1 - (v1 / v))) if v1 < v else float('nan'),
+            'brunet_index': float(vl) ** (n ** -0.0165),
+        }
+
+
+class RunningSyntactic():
+    """ Cumulative Yngve, Frazier, word and SDL sums over a sliding window of sentences. """
+
+    def __init__(self, size=None, seconds=None):
+        self.window = SlidingWindow(size, seconds)
+        self.totals = [0.0, 0.0, 0.0, 0.0]
+
+    def push(self, yngve, frazier, words, sdl, time=None):
+        sentence = (yngve, frazier, words, sdl)
+        self.totals = [total + value for total, value in zip(self.totals, sentence)]
+        for old in self.window.push(sentence, time):
+            self.totals = [total - value for total, value in zip(self.totals, old)]
+
+    def measures(self):
+        yngve, frazier, words, sdl = self.totals
+        n = len(self.window)
+        return {
+            'sentences': n,
+            'words': int(words),
+            'Yngve_mean': yngve / words if words else 0.0,
+            'Frazier_mean': frazier / words if words else 0.0,
+            'Mean Syntactic Dependency Length': sdl / n,
+        }
+
+
+def align_tokens(text, tokens):
+    """
+    Index of the whitespace separated word of text that each token falls in.
+    Tokens that cannot be found in order (e.g. rewritten quotes) take the
+    index of the previous token.
+    """
+    word_starts = [m.start() for m in re.finditer(r'\S+', text)]
+    indices = []
+    pos, last = 0, 0
+    for token in tokens:
+        found = text.find(token, pos)
+        if found >= 0 and not any(c.isalnum() for c in text[pos:found]):
+            pos = found + len(token)
+            last = max(bisect_right(word_starts, found) - 1, 0)
+        indices.append(last)
+    return indices
+
+
+def token_times(text, tokens, word_times=None):
+    """ End time of the word each token belongs to, or None without word_times [(start, end), ...]. """
+    if not word_times:
+        return [None] * len(tokens)
+    return [word_times[min(i, len(word_times) - 1)][1] for i in align_tokens(text, tokens)]
+
+
+def lexical_series(analysis, size=50, seconds=None, word_times=None, step=1):
+    """
+    Lexical measures over a window of the last size tokens (and/or seconds of
+    speech when word_times are given), one row every step tokens. analysis is
+    a LexicalComplexity.analyze() result.
+    """
+    running = RunningLexical(size, seconds)
+    times = token_times(analysis.text, analysis.tokens, word_times)
+    last = len(analysis.tokens) - 1
+    rows = []
+    for i, (token, lemma, time) in enumerate(zip(analysis.tokens, analysis.lemmas, times)):
+        running.push(token, lemma, time)
+        if (i + 1) % step == 0 or i == last:
+            row = {'token': i, 'time': time}
+            row.update(running.measures())
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def syntactic_series(complexity, text, trees, heads, size=1, seconds=None, word_times=None):
+    """
+    Yngve, Frazier and SDL over a window of the last size sentences (and/or
+    seconds of speech when word_times are given), one row per sentence.
+    trees and heads are a LanguagePipeline.parse() result for text.
+    """
+    scored = []
+    for tree_string, sentence_heads in zip(trees, heads):
+        if tree_string.strip() == "":
+            continue
+        tree = CompactTree(tree_string)
+        yngve, frazier, words = tree.scores()
+        scored.append((yngve, frazier, words, complexity.tree_depth(sentence_heads), tree.words))
+
+    leaves = [leaf for *_, sentence_leaves in scored for leaf in sentence_leaves]
+    leaf_times = token_times(text, leaves, word_times)
+
+    running = RunningSyntactic(size, seconds)
+    rows = []
+    end = 0
+    for i, (yngve, frazier, words, sdl, sentence_leaves) in enumerate(scored):
+        end += len(sentence_leaves)
+        time = leaf_times[end - 1] if sentence_leaves else None
+        running.push(yngve, frazier, words, sdl, time)
+        row = {'sentence': i, 'time': time}
+        row.update(running.measures())
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def read_word_times(path):
+    """ [(start, end), ...] from a CSV or Parquet table with start and end columns (seconds). """
+    table = pd.read_parquet(path) if path.endswith('.parquet') else pd.read_csv(path)
+    return list(zip(table['start'].astype(float), table['end'].astype(float)))
@@ -0,0 +1,93 @@
+import os
+import argparse
+import json
+import socket
+
+
+class Client():
+    """ Blocking client for server.py, over a Unix socket or TCP. """
+
+    def __init__(self, socket_path=None, host='127.0.0.1', port=8765, timeout=None):
+        if socket_path:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(socket_path)
+        else:
+            self.sock = socket.create_connection((host, port))
+        self.sock.settimeout(timeout)
+        self.reader = self.sock.makefile('r', encoding='utf-8')
+        self.next_id = 0
+
+    def close(self):
+        self.reader.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _send(self, message):
+        self.sock.sendall((json.dumps(message) + '\n').encode('utf-8'))
+
+    def _receive(self):
+        line = self.reader.readline()
+        if not line:
+            raise ConnectionError("service closed the connection")
+        return json.loads(line)
+
+    def status(self):
+        self._send({'op': 'status'})
+        return self._receive()
+
+    def run(self, jobs):
+        """
+        Send every job at once, so the service can pipeline them, and return
+        the results in the order of jobs. Raises ValueError if the service
+        replies without an id, i.e. it could not parse a job.
+        """
+        ids = []
+        for job in jobs:
+            job = dict(job)
+            if job.get('id') is None:
+                job['id'] = self.next_id
+                self.next_id += 1
+            ids.append(job['id'])
+            self._send(job)
+        results = {}
+        while len(results) < len(ids):
+            result = self._receive()
+            if result.get('id') is None:
+                # The service could not read one of our lines, so no result will match it
+                raise ValueError(f"service rejected a job: {result.get('error')}")
+            results[result['id']] = result
+        return [results[i] for i in ids]
+
+    def score_text(self, text, **options):
+        return self.run([dict(options, text=text)])[0]
+
+    def score_audio(self, path, **options):
+        return self.run([dict(options, audio=os.path.abspath(path))])[0]
+
+
+def main(args):
+    jobs = [{'audio': os.path.abspath(path), 'word_offsets': args.word_offsets} for path in args.audio]
+    jobs += [{'text': text} for text in args.text]
+    for path in args.transcript:
+        with open(path, "r") as f:
+            jobs.append({'text': f.read().replace('\n', ''), 'id': path})
+    with Client(args.socket, args.host, args.port) as client:
+        results = client.run(jobs) if jobs else [client.status()]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Send jobs to a running server.py and print the JSON results.")
+    parser.add_argument('--socket', type=str, default=None)
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--audio', type=str, nargs='*', default=[], help="Recordings to transcribe and score.")
+    parser.add_argument('--transcript', type=str, nargs='*', default=[], help="Transcript files to score.")
+    parser.add_argument('--text', type=str, nargs='*', default=[], help="Raw transcripts to score.")
+    parser.add_argument('--word_offsets', action='store_true', help="Also return word times and pause statistics.")
+    main(parser.parse_args())
@@ -0,0 +1,322 @@
+import os
+import sys
+import argparse
+import asyncio
+import json
+import time
+import traceback
+from concurrent.futures import Future, ThreadPoolExecutor
+
+# The service serves both halves of the project from one process
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.append(os.path.join(ROOT, 'asr'))
+sys.path.append(os.path.join(ROOT, 'language'))
+
+
+def _json_safe(value):
+    """ numpy scalars and other float-likes as plain floats, for json.dumps. """
+    if isinstance(value, dict):
+        return {k: _json_safe(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_json_safe(v) for v in value]
+    if isinstance(value, (str, int, bool)) or value is None:
+        return value
+    return float(value)
+
+
+class ScoringService():
+    """
+    Keeps the ASR and language models loaded and scores jobs through two
+    pipelined stages: ASR (micro-batched) and language scoring. Each stage
+    runs on its own thread, so recording N+1 is transcribed while recording
+    N is scored; within ASR, a micro-batch is decoded while the next one
+    runs through the acoustic model. Queues between the stages are bounded; when they are full,
+    enqueue() waits, which stops the server reading from clients
+    (backpressure).
+
+    A job is a dict with either 'audio' (path to a local recording) or
+    'text' (a raw transcript), plus optional 'id', 'spell_check' and
+    'word_offsets'. The result is a JSON-ready dict with the transcript,
+    refined text, measures, stage timings and an error (or None).
+    """
+
+    def __init__(self, pipeline, asr=None, queue_size=8, asr_batch_size=4, spell_check=False,
+                 chunk_length_s=0, stride_length_s=5):
+        self.pipeline = pipeline
+        self.asr = asr
+        self.queue_size = queue_size
+        self.asr_batch_size = asr_batch_size
+        self.spell_check = spell_check
+        self.chunk_length_s = chunk_length_s
+        self.stride_length_s = stride_length_s
+        self.completed = 0
+        self.failed = 0
+        self._asr_executor = ThreadPoolExecutor(max_workers=1)
+        self._language_executor = ThreadPoolExecutor(max_workers=1)
+        self._tasks = []
+        self._decoding = None
+
+    async def start(self):
+        self.asr_queue = asyncio.Queue(self.queue_size)
+        self.language_queue = asyncio.Queue(self.queue_size)
+        self._tasks = [asyncio.ensure_future(self._asr_stage()), asyncio.ensure_future(self._language_stage())]
+        return self
+
+    async def stop(self):
+        if self._decoding is not None:
+            self._tasks.append(self._decoding)
+            self._decoding = None
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._asr_executor.shutdown(wait=False)
+        self._language_executor.shutdown(wait=False)
+
+    def status(self):
+        return {'asr_queue': self.asr_queue.qsize(), 'language_queue': self.language_queue.qsize(),
+                'completed': self.completed, 'failed': self.failed, 'asr_loaded': self.asr is not None,
+                'load_times': dict(self.pipeline.load_times)}
+
+    async def enqueue(self, job):
+        """ Queue a job, waiting while its first stage is full. Returns a future for the result. """
+        future = asyncio.get_event_loop().create_future()
+        item = {'job': job, 'future': future, 'result': {'id': job.get('id'), 'error': None, 'timings': {}}}
+        if 'audio' in job:
+            if self.asr is None:
+                item['result']['error'] = "audio job, but the service was started without an ASR model"
+                self._finish(item)
+            else:
+                await self.asr_queue.put(item)
+        elif 'text' in job:
+            item['result']['transcript'] = job['text']
+            await self.language_queue.put(item)
+        else:
+            item['result']['error'] = "job needs an 'audio' or a 'text' field"
+            self._finish(item)
+        return future
+
+    async def submit(self, job):
+        """ Queue a job and wait for its result. """
+        return await (await self.enqueue(job))
+
+    def _finish(self, item):
+        result = item['result']
+        if result['error']:
+            self.failed += 1
+        else:
+            self.completed += 1
+        if not item['future'].done():
+            item['future'].set_result(result)
+
+    def _transcribe(self, items):
+        """ Transcribe a micro-batch of audio jobs; runs on the ASR thread. """
+        word_offsets = any(item['job'].get('word_offsets') for item in items)
+        if self.chunk_length_s > 0:
+            return self.asr.transcribe_long_many([item['job']['audio'] for item in items], self.chunk_length_s,
+                                                 self.stride_length_s, output_word_offsets=word_offsets)
+        audios = [self.asr.load_audio(item['job']['audio']) for item in items]
+        return self.asr.transcribe_batch(audios, batch_size=len(audios), output_word_offsets=word_offsets)
+
+    def _submit(self, items):
+        """
+        Run a micro-batch through the acoustic model on the ASR thread and
+        return a future of its transcriptions, which are decoded in the
+        background while the next micro-batch goes through the model.
+        """
+        if self.chunk_length_s > 0:
+            future = Future()
+            future.set_result(self._transcribe(items))
+            return future
+        word_offsets = any(item['job'].get('word_offsets') for item in items)
+        audios = [self.asr.load_audio(item['job']['audio']) for item in items]
+        return self.asr.submit_batch(audios, output_word_offsets=word_offsets)
+
+    async def _asr_stage(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            items = [await self.asr_queue.get()]
+            # Batch whatever else is already waiting
+            while len(items) < self.asr_batch_size and not self.asr_queue.empty():
+                items.append(self.asr_queue.get_nowait())
+
+            start = time.perf_counter()
+            try:
+                decoded = await loop.run_in_executor(self._asr_executor, self._submit, items)
+            except Exception:
+                decoded = None
+            # At most one micro-batch waits to be decoded while the next one is read
+            if self._decoding is not None:
+                await self._decoding
+            self._decoding = asyncio.ensure_future(self._asr_results(items, decoded, start))
+
+    async def _asr_results(self, items, decoded, start):
+        """ Wait for a micro-batch's transcriptions and hand its jobs to the language stage. """
+        from audio import audio_duration
+        from timestamps import pause_statistics
+
+        loop = asyncio.get_event_loop()
+        transcriptions = None
+        if decoded is not None:
+            try:
+                transcriptions = await asyncio.wrap_future(decoded)
+            except Exception:
+                pass
+        if transcriptions is None:
+            # Retry one by one so a bad recording only fails its own job
+            transcriptions = []
+            for item in items:
+                try:
+                    transcriptions.extend(await loop.run_in_executor(self._asr_executor, self._transcribe, [item]))
+                except Exception:
+                    item['result']['error'] = traceback.format_exc(limit=1).strip().splitlines()[-1]
+                    transcriptions.append(None)
+        seconds = (time.perf_counter() - start) / len(items)
+
+        for item, transcription in zip(items, transcriptions):
+            item['result']['timings']['asr'] = seconds
+            if transcription is None:
+                self._finish(item)
+                continue
+            if isinstance(transcription, (tuple, list)):
+                transcription, words = transcription
+                if item['job'].get('word_offsets'):
+                    item['result']['words'] = words
+                    item['result']['pauses'] = pause_statistics(words, audio_duration(item['job']['audio']))
+            item['result']['transcript'] = transcription
+            # Blocks while the language stage is behind
+            await self.language_queue.put(item)
+
+    def _score(self, item):
+        """ Punctuate, parse and score one transcript; runs on the language thread. """
+        spell_check = item['job'].get('spell_check', self.spell_check)
+        refined_text, parsed, measures = self.pipeline.score(item['result']['transcript'], spell_check)
+        return refined_text, measures
+
+    async def _language_stage(self):
+        loop = asyncio.get_event_loop()
+        while True:
+            item = await self.language_queue.get()
+            start = time.perf_counter()
+            try:
+                refined_text, measures = await loop.run_in_executor(self._language_executor, self._score, item)
+                item['result']['refined_text'] = str(refined_text)
+                item['result']['measures'] = measures
+            except Exception:
+                item['result']['error'] = traceback.format_exc(limit=1).strip().splitlines()[-1]
+            item['result']['timings']['language'] = time.perf_counter() - start
+            self._finish(item)
+
+    async def handle(self, reader, writer):
+        """
+        One client connection speaking JSON lines: every line is a job (or
+        {"op": "status"}) and every reply is one line. Jobs on a connection
+        are processed concurrently, so replies may come back out of order;
+        match them by 'id'.
+        """
+        lock = asyncio.Lock()
+        pending = set()
+
+        async def reply(response):
+            async with lock:
+                writer.write((json.dumps(_json_safe(response)) + '\n').encode('utf-8'))
+                await writer.drain()
+
+        async def reply_when_done(future):
+            await reply(await future)
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    job = json.loads(line)
+                except ValueError as e:
+                    await reply({'id': None, 'error': f"invalid JSON: {e}"})
+                    continue
+                if job.get('op') == 'status':
+                    await reply(self.status())
+                    continue
+                # Waits (and so stops reading from this client) while the first stage is full
+                future = await self.enqueue(job)
+                task = asyncio.ensure_future(reply_when_done(future))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+            if pending:
+                await asyncio.gather(*pending)
+        finally:
+            writer.close()
+
+    async def serve(self, socket_path=None, host='127.0.0.1', port=8765):
+        await self.start()
+        if socket_path:
+            server = await asyncio.start_unix_server(self.handle, path=socket_path)
+            print(f"Listening on {socket_path}")
+        else:
+            server = await asyncio.start_server(self.handle, host, port)
+            print(f"Listening on {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+def build_service(args):
+    """ Load every model up front so the first job is as fast as the rest. """
+    from pipeline import LanguagePipeline
+
+    pipeline = LanguagePipeline(cache_dir=args.cache_dir).load()
+    asr = None
+    if args.model:
+        from model import ASR
+
+        start = time.perf_counter()
+        asr = ASR(args.sr, args.model, args.processor or args.model, args.use_lm, None, None,
+                  num_threads=args.num_threads, backend=args.backend, backend_cache_dir=args.backend_cache,
+                  decode_workers=args.decode_workers, beam_width=args.beam_width)
+        pipeline.load_times['asr'] = time.perf_counter() - start
+    print(f"Models loaded in {sum(pipeline.load_times.values()):.1f}s")
+    return ScoringService(pipeline, asr, args.queue_size, args.asr_batch_size, args.normalize,
+                          args.chunk_length_s, args.stride_length_s)
+
+
+def main(args):
+    service = build_service(args)
+    if args.socket and os.path.exists(args.socket):
+        os.remove(args.socket)
+    try:
+        asyncio.run(service.serve(args.socket, args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if service.asr is not None:
+            service.asr.close()
+        if args.socket and os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == '__main__':
+    from backends import BACKENDS
+
+    parser = argparse.ArgumentParser(description="Local transcription and complexity scoring service.")
+    parser.add_argument('--socket', type=str, default=None, help="Listen on this Unix socket instead of TCP.")
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--model', type=str, default=None, help="Wav2Vec2 checkpoint; without it only text "
+                                                                "jobs are accepted.")
+    parser.add_argument('--processor', type=str, default=None)
+    parser.add_argument('--use_lm', action='store_true')
+    parser.add_argument('--sr', type=int, default=16000)
+    parser.add_argument('--backend', type=str, default='torch', choices=BACKENDS,
+                        help="CPU inference backend: torch, int8, torchscript or onnx.")
+    parser.add_argument('--backend_cache', type=str, default='backend_cache')
+    parser.add_argument('--num_threads', type=int, default=None)
+    parser.add_argument('--decode_workers', type=int, default=None, help="Processes in the LM beam-search pool.")
+    parser.add_argument('--beam_width', type=int, default=None)
+    parser.add_argument('--chunk_length_s', type=float, default=0, help="Stream recordings in windows of this "
+                                                                           "many seconds (0 = one full pass).")
+    parser.add_argument('--stride_length_s', type=float, default=5)
+    parser.add_argument('--normalize', action='store_true', help="Lowercase before spell-check by default.")
+    parser.add_argument('--cache_dir', type=str, default=None, help="Language pipeline artifact cache.")
+    parser.add_argument('--queue_size', type=int, default=8, help="Jobs waiting per stage before clients "
+                                                                  "are held back.")
+    parser.add_argument('--asr_batch_size', type=int, default=4, help="Queued recordings transcribed together.")
+    main(parser.parse_args())
@@ -0,0 +1,134 @@
+import os
+import asyncio
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+import server
+from client import Client
+
+
+class FakePipeline():
+    def __init__(self):
+        self.load_times = {'punctuation': 1.0}
+        self.intervals = []
+
+    def score(self, text, spell_check=False):
+        start = time.perf_counter()
+        time.sleep(0.05)
+        self.intervals.append((start, time.perf_counter()))
+        if text == 'boom':
+            raise RuntimeError('bad transcript')
+        return text.capitalize() + '.', '', {'Yngve_mean': np.float64(len(text.split())), 'Frazier_mean': 1.0}
+
+
+class FakeASR():
+    def __init__(self):
+        self.intervals = []
+        self.batches = []
+        self.decode_intervals = []
+        self.decode_thread = ThreadPoolExecutor(max_workers=1)
+
+    def load_audio(self, path):
+        if path.endswith('missing.wav'):
+            raise FileNotFoundError(path)
+        return path
+
+    def transcribe_batch(self, audios, batch_size=8, output_word_offsets=False):
+        start = time.perf_counter()
+        time.sleep(0.05)
+        self.intervals.append((start, time.perf_counter()))
+        self.batches.append(len(audios))
+        return ['words of ' + os.path.basename(audio) for audio in audios]
+
+    def submit_batch(self, audios, output_word_offsets=False):
+        # The "forward pass" runs now and the "decoding" on the decode thread, like ASR.submit_batch
+        transcriptions = self.transcribe_batch(audios)
+
+        def decode():
+            start = time.perf_counter()
+            time.sleep(0.05)
+            self.decode_intervals.append((start, time.perf_counter()))
+            return transcriptions
+        return self.decode_thread.submit(decode)
+
+
+class ScoringServiceTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp.name, 'service.sock')
+        self.pipeline, self.asr = FakePipeline(), FakeASR()
+        self.service = server.ScoringService(self.pipeline, self.asr, queue_size=1, asr_batch_size=2)
+
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self.loop).result(5)
+
+    async def _start(self):
+        await self.service.start()
+        self.server = await asyncio.start_unix_server(self.service.handle, path=self.socket_path)
+
+    async def _stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await self.service.stop()
+
+    def tearDown(self):
+        asyncio.run_coroutine_threadsafe(self._stop(), self.loop).result(5)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(5)
+        self.loop.close()
+        self.tmp.cleanup()
+
+    def test_text_and_audio_jobs(self):
+        jobs = [{'audio': '/data/a.wav'}, {'text': 'the dog runs'}, {'audio': '/data/missing.wav'},
+                {'text': 'boom'}, {'audio': '/data/b.wav'}, {'nothing': True}]
+        with Client(self.socket_path, timeout=10) as client:
+            results = client.run(jobs)
+            status = client.status()
+
+        self.assertEqual([0, 1, 2, 3, 4, 5], [r['id'] for r in results])
+        self.assertEqual('words of a.wav', results[0]['transcript'])
+        self.assertEqual('Words of a.wav.', results[0]['refined_text'])
+        self.assertEqual(3.0, results[0]['measures']['Yngve_mean'])
+        self.assertIn('asr', results[0]['timings'])
+        self.assertIsNone(results[1]['error'])
+        self.assertIn('FileNotFoundError', results[2]['error'])
+        self.assertIn('bad transcript', results[3]['error'])
+        self.assertIsNone(results[4]['error'])
+        self.assertIn("'audio' or a 'text'", results[5]['error'])
+        self.assertEqual({'completed': 3, 'failed': 3}, {k: status[k] for k in ['completed', 'failed']})
+
+    def test_unreadable_job_raises(self):
+        with Client(self.socket_path, timeout=10) as client:
+            client.sock.sendall(b'{not json\n')
+            with self.assertRaisesRegex(ValueError, 'invalid JSON'):
+                client.run([{'text': 'the dog runs'}])
+            # The job itself still completes
+            self.assertEqual('The dog runs.', client._receive()['refined_text'])
+
+    def test_stages_overlap(self):
+        jobs = [{'audio': f'/data/{i}.wav'} for i in range(6)]
+        with Client(self.socket_path, timeout=10) as client:
+            results = client.run(jobs)
+
+        self.assertTrue(all(r['error'] is None for r in results))
+        self.assertEqual(6, sum(self.asr.batches))
+        # Some recording was transcribed while an earlier one was being scored
+        self.assertTrue(any(a_start < l_end and l_start < a_end
+                            for a_start, a_end in self.asr.intervals
+                            for l_start, l_end in self.pipeline.intervals))
+        # and some micro-batch was decoded while the next one went through the model
+        self.assertTrue(any(f_start < d_end and d_start < f_end
+                            for f_start, f_end in self.asr.intervals
+                            for d_start, d_end in self.asr.decode_intervals))
+
+
+if __name__ == '__main__':
+    unittest.main()